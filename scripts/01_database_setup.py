@@ -11,6 +11,11 @@ import sqlite3
 import os
 from datetime import datetime
 
+from data_validation import RowValidator, write_quarantine
+from date_parsing import detect_date_format, parse_dates, unparsed_values
+from derived_tables import refresh_derived_tables
+from shadow_db import carry_over, open_shadow, shadow_path, swap_in
+
 print("="*80)
 print("SUPERSTORE DATABASE SETUP")
 print("="*80)
@@ -58,13 +63,17 @@ else:
 # ============================================================================
 print("\n[3] Preparing data for database...")
 
-# Convert date columns to proper datetime format
-# The CSV might have different date formats, so we handle that
-if 'Order Date' in df.columns:
-    df['Order Date'] = pd.to_datetime(df['Order Date'], format='mixed', dayfirst=False)
-    
-if 'Ship Date' in df.columns:
-    df['Ship Date'] = pd.to_datetime(df['Ship Date'], format='mixed', dayfirst=False)
+# Convert date columns to ISO 'YYYY-MM-DD' text
+# The format is detected from a sample and only the distinct date strings are parsed
+unparsed_dates = {}
+for date_col in ['Order Date', 'Ship Date']:
+    if date_col in df.columns:
+        date_format = detect_date_format(df[date_col])
+        parsed = parse_dates(df[date_col], fmt=date_format)
+        # Strings no format could read are quarantined in step 4 (rule bad_date)
+        unparsed_dates[date_col.lower().replace(' ', '_')] = unparsed_values(df[date_col], parsed)
+        df[date_col] = parsed
+        print(f"   {date_col}: detected format {date_format or 'mixed (per distinct value)'}")
 
 # Standardize column names (remove spaces, lowercase)
 # This makes SQL queries easier
@@ -76,41 +85,59 @@ for col in df.columns:
     print(f"   - {col}")
 
 # ============================================================================
-# STEP 4: Create SQLite Database Connection
+# STEP 4: Validate Rows
+# ============================================================================
+print("\n[4] Validating rows...")
+
+# Rows failing any rule go to superstore_quarantine instead of superstore
+validator = RowValidator()
+df, df_quarantine = validator.validate(df, unparsed=unparsed_dates)
+
+df_rules = validator.report()
+print(df_rules[['rule', 'failed_rows']].to_string(index=False))
+if validator.rows_quarantined > 0:
+    print(f"\n⚠️  {validator.rows_quarantined:,} rows quarantined (see table 'superstore_quarantine')")
+else:
+    print(f"\n✅ All {validator.rows_checked:,} rows passed validation")
+
+# ============================================================================
+# STEP 5: Create SQLite Database Connection
 # ============================================================================
-print("\n[4] Creating database connection...")
+print("\n[5] Creating database connection...")
 
 # Create database folder if it doesn't exist
 os.makedirs('database', exist_ok=True)
 
-# Connect to SQLite database (creates file if doesn't exist)
+# Everything is built in a shadow copy and swapped in at the end (step 11), so
+# reports running meanwhile keep reading the previous load. The shadow starts
+# empty: superstore is rebuilt anyway, and tables written by other scripts
+# (e.g. customer_clv) are carried over before the swap.
 db_path = 'database/superstore.db'
-conn = sqlite3.connect(db_path)
+conn = open_shadow(db_path)
 cursor = conn.cursor()
 
-print(f"✅ Connected to database: {db_path}")
+print(f"✅ Connected to shadow database: {shadow_path(db_path)}")
 
 # ============================================================================
-# STEP 5: Create Table Schema
+# STEP 6: Create Table Schema
 # ============================================================================
-print("\n[5] Creating table schema...")
+print("\n[6] Creating table schema...")
 
 # Read and execute the CREATE TABLE SQL script
 with open('sql_queries/01_create_table.sql', 'r') as f:
     create_table_sql = f.read()
 
-# Execute the SQL (split by semicolon in case of multiple statements)
-for statement in create_table_sql.split(';'):
-    if statement.strip():
-        cursor.execute(statement)
+# executescript parses statement boundaries itself (a ';' inside a comment
+# or string literal would break a naive split)
+conn.executescript(create_table_sql)
 
 conn.commit()
 print(f"✅ Table 'superstore' created successfully!")
 
 # ============================================================================
-# STEP 6: Insert Data into Database
+# STEP 7: Insert Data into Database
 # ============================================================================
-print("\n[6] Inserting data into database...")
+print("\n[7] Inserting data into database...")
 print(f"   This may take a moment...")
 
 # Insert DataFrame into SQLite table
@@ -120,10 +147,14 @@ df.to_sql('superstore', conn, if_exists='replace', index=False)
 print(f"✅ Data inserted successfully!")
 print(f"   {len(df):,} rows inserted")
 
+# Replace last load's quarantine so it always matches the current table
+write_quarantine(conn, df_quarantine, replace=True)
+print(f"   {len(df_quarantine):,} rows written to superstore_quarantine")
+
 # ============================================================================
-# STEP 7: Verify Data
+# STEP 8: Verify Data
 # ============================================================================
-print("\n[7] Verifying database...")
+print("\n[8] Verifying database...")
 
 # Count rows in database
 cursor.execute("SELECT COUNT(*) FROM superstore")
@@ -146,16 +177,18 @@ for col in columns_info:
     print(f"   {col[1]:<20} {col[2]:<15}")
 
 # ============================================================================
-# STEP 8: Create Indexes for Performance
+# STEP 9: Create Indexes for Performance
 # ============================================================================
-print("\n[8] Creating indexes for better query performance...")
+print("\n[9] Creating indexes for better query performance...")
 
 indexes = [
     "CREATE INDEX IF NOT EXISTS idx_order_date ON superstore(order_date)",
     "CREATE INDEX IF NOT EXISTS idx_customer_id ON superstore(customer_id)",
     "CREATE INDEX IF NOT EXISTS idx_category ON superstore(category)",
     "CREATE INDEX IF NOT EXISTS idx_region ON superstore(region)",
-    "CREATE INDEX IF NOT EXISTS idx_product_id ON superstore(product_id)"
+    "CREATE INDEX IF NOT EXISTS idx_product_id ON superstore(product_id)",
+    # Market basket analysis streams line items in order_id order
+    "CREATE INDEX IF NOT EXISTS idx_order_id ON superstore(order_id)"
 ]
 
 for idx_sql in indexes:
@@ -165,10 +198,25 @@ conn.commit()
 print(f"✅ Indexes created successfully!")
 
 # ============================================================================
-# STEP 9: Cleanup and Close
+# STEP 10: Build Derived Tables
 # ============================================================================
-conn.close()
-print("\n[9] Database connection closed")
+print("\n[10] Building derived tables (preview sample, rollups, sketches, product summary, bitmaps)...")
+
+# Notebook previews and drill-down reports read these instead of the full table
+refresh_derived_tables(conn)
+print(f"✅ Derived tables built!")
+
+# ============================================================================
+# STEP 11: Swap In the New Database
+# ============================================================================
+print("\n[11] Swapping the new data into the live database...")
+
+kept = carry_over(conn, db_path)
+if kept:
+    print(f"   Kept from the live database: {', '.join(kept)}")
+# One WAL write transaction: readers never see a half-loaded table
+swap_in(conn, db_path)
+print(f"✅ {db_path} updated (shadow closed and removed)")
 
 print("\n" + "="*80)
 print("DATABASE SETUP COMPLETED SUCCESSFULLY!")
@@ -177,6 +225,7 @@ print(f"\n📊 Summary:")
 print(f"   Database file: {db_path}")
 print(f"   Table name: superstore")
 print(f"   Total records: {row_count:,}")
+print(f"   Quarantined rows: {len(df_quarantine):,}")
 print(f"   Columns: {len(df.columns)}")
 print(f"\n✅ You can now run SQL queries against the database!")
 print(f"✅ Next step: Run SQL analysis queries (02_sql_analysis.py)")
@@ -6,10 +6,19 @@ AUTHOR: yusufehtesham29
 ============================================================================
 """
 
-import pandas as pd
-import sqlite3
 import os
 
+from geo_hierarchy import build_geo_hierarchy, drill_down, drill_down_query
+from product_summary import build_product_summary, loss_makers, top_profit_products
+from report_args import parse_report_args
+from report_filters import ReportFilter
+from report_output import ReportOutput
+from shadow_db import begin_snapshot
+from sharding import report_connection, report_library
+
+# Every report flag, parsed once (see report_args.py)
+args = parse_report_args('Execute SQL queries and display results using Python')
+
 print("="*80)
 print("SUPERSTORE SQL ANALYSIS")
 print("="*80)
@@ -26,8 +35,18 @@ if not os.path.exists(db_path):
     print("Please run 01_database_setup.py first")
     exit(1)
 
-conn = sqlite3.connect(db_path)
-print(f"✅ Connected to: {db_path}\n")
+# Database file, or the shard set given by --shards / $SUPERSTORE_SHARDS (sharding.py).
+# One read snapshot for the whole report: a reload swapped in meanwhile is not seen
+conn = begin_snapshot(report_connection(db_path, args.shards))
+# Named queries from sql_queries/*.sql (run on conn, inside the snapshot)
+library = report_library(db_path, args.shards)
+print(f"✅ Connected to: {library.db_path}")
+
+# Same date range / dimension filter for every query (see report_filters.py)
+report_filter = ReportFilter.from_args(args).resolve(conn)
+print(f"🔎 Filters: {report_filter.describe()}\n")
+# Every table is also written as JSON/CSV/Parquet with --output-dir (see report_output.py)
+output = ReportOutput.from_args('sql_analysis', args, report_filter)
 
 # ============================================================================
 # BUSINESS METRICS QUERIES
@@ -40,21 +59,10 @@ print("="*80)
 print("\n[Query 1] Overall Business Performance")
 print("-"*80)
 
-query1 = """
-SELECT 
-    COUNT(DISTINCT order_id) AS total_orders,
-    COUNT(DISTINCT customer_id) AS total_customers,
-    SUM(sales) AS total_sales,
-    SUM(profit) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent,
-    SUM(quantity) AS total_quantity_sold,
-    ROUND(AVG(sales), 2) AS avg_order_value,
-    ROUND(AVG(profit), 2) AS avg_profit_per_order
-FROM superstore;
-"""
-
-df1 = pd.read_sql_query(query1, conn)
-print(df1.to_string(index=False))
+df1 = library.business_overview(conn, **report_filter.kwargs())
+# Aggregates over no rows are NULL: stop here rather than format them
+report_filter.require_rows(df1['total_orders'].iloc[0])
+output.table('business_overview', df1)
 
 print("\n💡 Business Insight:")
 print(f"   • Total Revenue: ${df1['total_sales'].values[0]:,.2f}")
@@ -66,20 +74,8 @@ print(f"   • Average Order Value: ${df1['avg_order_value'].values[0]:,.2f}")
 print("\n\n[Query 2] Sales and Profit by Year")
 print("-"*80)
 
-query2 = """
-SELECT 
-    CAST(strftime('%Y', order_date) AS INTEGER) AS year,
-    COUNT(DISTINCT order_id) AS orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY year
-ORDER BY year;
-"""
-
-df2 = pd.read_sql_query(query2, conn)
-print(df2.to_string(index=False))
+df2 = library.sales_by_year(conn, **report_filter.kwargs())
+output.table('sales_by_year', df2)
 
 print("\n💡 Business Insight:")
 if len(df2) > 1:
@@ -92,21 +88,8 @@ if len(df2) > 1:
 print("\n\n[Query 3] Sales and Profit by Region")
 print("-"*80)
 
-query3 = """
-SELECT 
-    region,
-    COUNT(DISTINCT order_id) AS orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent,
-    ROUND(AVG(sales), 2) AS avg_sales_per_order
-FROM superstore
-GROUP BY region
-ORDER BY total_sales DESC;
-"""
-
-df3 = pd.read_sql_query(query3, conn)
-print(df3.to_string(index=False))
+df3 = library.sales_by_region(conn, **report_filter.kwargs())
+output.table('sales_by_region', df3)
 
 print("\n💡 Business Insight:")
 print(f"   • Top Region by Sales: {df3.iloc[0]['region']} (${df3.iloc[0]['total_sales']:,.2f})")
@@ -117,21 +100,8 @@ print(f"   • Highest Profit Margin: {df3.loc[df3['profit_margin_percent'].idxm
 print("\n\n[Query 4] Sales and Profit by Category")
 print("-"*80)
 
-query4 = """
-SELECT 
-    category,
-    COUNT(DISTINCT order_id) AS orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent,
-    SUM(quantity) AS units_sold
-FROM superstore
-GROUP BY category
-ORDER BY total_profit DESC;
-"""
-
-df4 = pd.read_sql_query(query4, conn)
-print(df4.to_string(index=False))
+df4 = library.sales_by_category(conn, **report_filter.kwargs())
+output.table('sales_by_category', df4)
 
 print("\n💡 Business Insight:")
 print(f"   • Most Profitable Category: {df4.iloc[0]['category']} (${df4.iloc[0]['total_profit']:,.2f})")
@@ -141,22 +111,8 @@ print(f"   • Highest Volume: {df4.loc[df4['units_sold'].idxmax(), 'category']}
 print("\n\n[Query 5] Sales and Profit by Sub-Category (Top 10)")
 print("-"*80)
 
-query5 = """
-SELECT 
-    category,
-    sub_category,
-    COUNT(DISTINCT order_id) AS orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY category, sub_category
-ORDER BY total_profit DESC
-LIMIT 10;
-"""
-
-df5 = pd.read_sql_query(query5, conn)
-print(df5.to_string(index=False))
+df5 = library.sales_by_sub_category(conn, **report_filter.kwargs()).head(10)
+output.table('top_sub_categories', df5)
 
 print("\n💡 Business Insight:")
 print(f"   • Top Sub-Category: {df5.iloc[0]['sub_category']} (${df5.iloc[0]['total_profit']:,.2f} profit)")
@@ -165,24 +121,10 @@ print(f"   • Top Sub-Category: {df5.iloc[0]['sub_category']} (${df5.iloc[0]['t
 print("\n\n[Query 6] Loss-Making Sub-Categories ⚠️")
 print("-"*80)
 
-query6 = """
-SELECT 
-    category,
-    sub_category,
-    COUNT(DISTINCT order_id) AS orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY category, sub_category
-HAVING SUM(profit) < 0
-ORDER BY total_profit ASC;
-"""
-
-df6 = pd.read_sql_query(query6, conn)
+df6 = library.loss_making_sub_categories(conn, **report_filter.kwargs())
 
 if len(df6) > 0:
-    print(df6.to_string(index=False))
+    output.table('loss_making_sub_categories', df6)
     print("\n⚠️  Critical Insight:")
     print(f"   • {len(df6)} sub-categories are LOSING MONEY!")
     print(f"   • Worst Performer: {df6.iloc[0]['sub_category']} (${df6.iloc[0]['total_profit']:,.2f} loss)")
@@ -202,22 +144,8 @@ print("="*80)
 print("\n[Query 7] Top 10 Customers by Sales")
 print("-"*80)
 
-query7 = """
-SELECT 
-    customer_id,
-    customer_name,
-    COUNT(DISTINCT order_id) AS total_orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(AVG(sales), 2) AS avg_order_value
-FROM superstore
-GROUP BY customer_id, customer_name
-ORDER BY total_sales DESC
-LIMIT 10;
-"""
-
-df7 = pd.read_sql_query(query7, conn)
-print(df7.to_string(index=False))
+df7 = library.top_customers_by_sales(conn, limit=10, **report_filter.kwargs())
+output.table('top_customers', df7)
 
 print("\n💡 Business Insight:")
 print(f"   • Top Customer: {df7.iloc[0]['customer_name']} (${df7.iloc[0]['total_sales']:,.2f})")
@@ -227,22 +155,8 @@ print(f"   • Average Orders per VIP: {df7['total_orders'].mean():.1f} orders")
 print("\n\n[Query 8] Customer Segmentation Analysis")
 print("-"*80)
 
-query8 = """
-SELECT 
-    segment,
-    COUNT(DISTINCT customer_id) AS total_customers,
-    COUNT(DISTINCT order_id) AS total_orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(AVG(sales), 2) AS avg_order_value,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY segment
-ORDER BY total_sales DESC;
-"""
-
-df8 = pd.read_sql_query(query8, conn)
-print(df8.to_string(index=False))
+df8 = library.customer_segments(conn, **report_filter.kwargs())
+output.table('customer_segments', df8)
 
 print("\n💡 Business Insight:")
 print(f"   • Largest Segment: {df8.iloc[0]['segment']} ({df8.iloc[0]['total_customers']:,} customers)")
@@ -259,48 +173,49 @@ print("="*80)
 print("\n[Query 9] Top 10 Products by Profit")
 print("-"*80)
 
-query9 = """
-SELECT 
-    product_name,
-    category,
-    sub_category,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY product_name, category, sub_category
-ORDER BY total_profit DESC
-LIMIT 10;
-"""
+# Indexed read from product_summary (maintained at load time) instead of a GROUP BY.
+# The summary holds all-time totals, so filtered runs aggregate the fact table.
+if report_filter.active:
+    df9 = library.top_products_by_profit(conn, limit=10, **report_filter.kwargs())
+else:
+    if not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_summary'").fetchone():
+        print("⚠️  Table 'product_summary' not found - building it now (re-run 01_database_setup.py to refresh)")
+        build_product_summary(conn)
+    df9 = top_profit_products(conn, limit=10)
+output.table('top_products_by_profit', df9,
+             shown=df9[['product_name', 'category', 'sub_category', 'total_sales', 'total_profit',
+                        'profit_margin_percent']])
+
+# Query 9b: Top 10 Loss-Making Products
+print("\n\n[Query 9b] Top 10 Loss-Making Products ⚠️")
+print("-"*80)
 
-df9 = pd.read_sql_query(query9, conn)
-print(df9.to_string(index=False))
+if report_filter.active:
+    # limit=-1: no limit, so the count below covers every loss maker
+    df_loss = library.loss_making_products(conn, limit=-1, **report_filter.kwargs())
+    n_loss_makers = len(df_loss)
+    df9b = df_loss.head(10)
+    discount_column = 'avg_discount_percent'
+else:
+    df9b = loss_makers(conn, limit=10)
+    n_loss_makers = conn.execute("SELECT COUNT(*) FROM product_summary WHERE is_loss_maker = 1").fetchone()[0]
+    discount_column = 'sales_weighted_discount_percent'
+output.table('loss_making_products', df9b,
+             shown=df9b[['product_name', 'sub_category', 'times_ordered', 'total_sales', 'total_profit',
+                         discount_column]])
+
+print("\n⚠️  Critical Insight:")
+print(f"   • {n_loss_makers} products are LOSING MONEY overall")
+if n_loss_makers:
+    print(f"   • Worst Product: {df9b.iloc[0]['product_name']} (${df9b.iloc[0]['total_profit']:,.2f})")
 
 # Query 10: Discount Impact Analysis
 print("\n\n[Query 10] Discount Impact on Profitability")
 print("-"*80)
 
-query10 = """
-SELECT 
-    CASE 
-        WHEN discount = 0 THEN 'No Discount'
-        WHEN discount > 0 AND discount <= 0.1 THEN '1-10% Discount'
-        WHEN discount > 0.1 AND discount <= 0.2 THEN '11-20% Discount'
-        WHEN discount > 0.2 AND discount <= 0.3 THEN '21-30% Discount'
-        ELSE 'Over 30% Discount'
-    END AS discount_range,
-    COUNT(DISTINCT order_id) AS total_orders,
-    ROUND(AVG(discount) * 100, 2) AS avg_discount_percent,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
-FROM superstore
-GROUP BY discount_range
-ORDER BY avg_discount_percent;
-"""
-
-df10 = pd.read_sql_query(query10, conn)
-print(df10.to_string(index=False))
+df10 = library.discount_impact(conn, **report_filter.kwargs())
+output.table('discount_impact', df10)
 
 print("\n💡 Business Insight:")
 print(f"   • Higher discounts correlate with lower profit margins")
@@ -312,28 +227,58 @@ if len(no_discount_margin) > 0:
 print("\n\n[Query 11] Sales by Shipping Mode")
 print("-"*80)
 
-query11 = """
-SELECT 
-    ship_mode,
-    COUNT(DISTINCT order_id) AS total_orders,
-    ROUND(SUM(sales), 2) AS total_sales,
-    ROUND(SUM(profit), 2) AS total_profit,
-    ROUND(AVG(sales), 2) AS avg_order_value
-FROM superstore
-GROUP BY ship_mode
-ORDER BY total_sales DESC;
-"""
-
-df11 = pd.read_sql_query(query11, conn)
-print(df11.to_string(index=False))
+df11 = library.sales_by_ship_mode(conn, **report_filter.kwargs())
+output.table('sales_by_ship_mode', df11)
 
 print("\n💡 Business Insight:")
 print(f"   • Most Popular: {df11.iloc[0]['ship_mode']} ({df11.iloc[0]['total_orders']:,} orders)")
 
+# ============================================================================
+# GEOGRAPHIC DRILL-DOWN
+# ============================================================================
+print("\n\n" + "="*80)
+print("SECTION 4: GEOGRAPHIC DRILL-DOWN")
+print("="*80)
+
+# Read from the geo_hierarchy rollup built at load time (no fact-table scan);
+# the rollup is all-time, so filtered runs aggregate the matching line items instead
+print("\n[Query 12] Drill-Down: Top Region -> States -> Cities")
+print("-"*80)
+
+if report_filter.active:
+    def geo_children(*path, limit=None):
+        query, params = drill_down_query(*path, limit=limit)
+        return report_filter.read_sql(query, conn, params)
+else:
+    has_hierarchy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'geo_hierarchy'").fetchone()
+    if not has_hierarchy:
+        print("⚠️  Table 'geo_hierarchy' not found - building it now (re-run 01_database_setup.py to refresh)")
+        build_geo_hierarchy(conn)
+
+    def geo_children(*path, limit=None):
+        return drill_down(conn, *path, limit=limit)
+
+df_regions = geo_children('United States')
+top_region = df_regions.iloc[0]['name']
+df_states = geo_children('United States', top_region, limit=5)
+top_state = df_states.iloc[0]['name']
+df_cities = geo_children('United States', top_region, top_state, limit=5)
+
+geo_columns = ['name', 'total_sales', 'total_profit', 'profit_margin_percent', 'orders', 'customers']
+print(f"\nTop 5 states in {top_region}:")
+output.table('geo_top_states', df_states[geo_columns].round(2))
+print(f"\nTop 5 cities in {top_state}:")
+output.table('geo_top_cities', df_cities[geo_columns].round(2))
+
+print("\n💡 Business Insight:")
+print(f"   • Drill path: {top_region} → {top_state} → {df_cities.iloc[0]['name']} (${df_cities.iloc[0]['total_sales']:,.2f})")
+
 # ============================================================================
 # Close Database Connection
 # ============================================================================
 conn.close()
+output.finish()
 
 print("\n\n" + "="*80)
 print("SQL ANALYSIS COMPLETED SUCCESSFULLY!")
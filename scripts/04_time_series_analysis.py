@@ -6,17 +6,30 @@ AUTHOR: yusufehtesham29
 ============================================================================
 """
 
-import pandas as pd
-import sqlite3
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
+# matplotlib is imported inside each chart block: text-only runs (--no-charts,
+# or charts whose data is unchanged) never pay for it
+from rolling_metrics import load_daily_series, rolling_metrics, monthly_growth
+from report_args import parse_report_args
+from report_filters import ReportFilter
+from report_output import ReportOutput
+from shadow_db import begin_snapshot
+from sharding import report_connection
+from shipping_sketches import ship_time_report
+
+# Every report flag, parsed once (see report_args.py)
+args = parse_report_args('Analyze sales patterns, seasonality, and time-based trends')
 
 print("="*80)
 print("TIME-SERIES & SEASONALITY ANALYSIS")
 print("="*80)
 
-conn = sqlite3.connect('database/superstore.db')
+# One read snapshot for the whole report: a reload swapped in meanwhile is not seen
+conn = begin_snapshot(report_connection(shard_dir=args.shards))
+# Same date range / dimension filter for every query (see report_filters.py)
+report_filter = ReportFilter.from_args(args).resolve(conn)
+print(f"\n🔎 Filters: {report_filter.describe()}")
+# Every table is also written as JSON/CSV/Parquet with --output-dir (see report_output.py)
+output = ReportOutput.from_args('time_series_analysis', args, report_filter)
 
 # ============================================================================
 # ANALYSIS 1: Day of Week Performance
@@ -46,48 +59,52 @@ GROUP BY day_num
 ORDER BY day_num;
 """
 
-df_dow = pd.read_sql_query(query1, conn)
+df_dow = report_filter.read_sql(query1, conn)
+report_filter.require_rows(len(df_dow))
 print("\n[Analysis 1] Sales Performance by Day of Week:")
-print(df_dow[['day_of_week', 'orders', 'total_sales', 'total_profit', 'avg_order_value']].to_string(index=False))
+output.table('day_of_week', df_dow,
+             shown=df_dow[['day_of_week', 'orders', 'total_sales', 'total_profit', 'avg_order_value']])
 
 best_day = df_dow.loc[df_dow['total_sales'].idxmax()]
 print(f"\n💡 Insight:")
 print(f"   • Best Day: {best_day['day_of_week']} (${best_day['total_sales']:,.2f})")
 
-# Visualization
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-# Chart 1: Orders by Day
-axes[0, 0].bar(df_dow['day_of_week'], df_dow['orders'], color='steelblue')
-axes[0, 0].set_title('Orders by Day of Week', fontweight='bold')
-axes[0, 0].set_ylabel('Number of Orders')
-axes[0, 0].tick_params(axis='x', rotation=45)
-for i, v in enumerate(df_dow['orders']):
-    axes[0, 0].text(i, v, str(v), ha='center', va='bottom')
-
-# Chart 2: Sales by Day
-axes[0, 1].bar(df_dow['day_of_week'], df_dow['total_sales'], color='green', alpha=0.7)
-axes[0, 1].set_title('Sales by Day of Week', fontweight='bold')
-axes[0, 1].set_ylabel('Total Sales ($)')
-axes[0, 1].tick_params(axis='x', rotation=45)
-
-# Chart 3: Avg Order Value
-axes[1, 0].plot(df_dow['day_of_week'], df_dow['avg_order_value'], marker='o', linewidth=2, color='purple')
-axes[1, 0].set_title('Average Order Value by Day', fontweight='bold')
-axes[1, 0].set_ylabel('Avg Order Value ($)')
-axes[1, 0].tick_params(axis='x', rotation=45)
-axes[1, 0].grid(True, alpha=0.3)
-
-# Chart 4: Profit by Day
-axes[1, 1].bar(df_dow['day_of_week'], df_dow['total_profit'], color='orange', alpha=0.7)
-axes[1, 1].set_title('Profit by Day of Week', fontweight='bold')
-axes[1, 1].set_ylabel('Total Profit ($)')
-axes[1, 1].tick_params(axis='x', rotation=45)
-
-plt.tight_layout()
-plt.savefig('visualizations/09_day_of_week_analysis.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("\n✅ Visualization saved: 09_day_of_week_analysis.png")
+# Visualization (redrawn only when its data changed since the last --output-dir run)
+if output.needs_chart('visualizations/09_day_of_week_analysis.png', 'day_of_week'):
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+    # Chart 1: Orders by Day
+    axes[0, 0].bar(df_dow['day_of_week'], df_dow['orders'], color='steelblue')
+    axes[0, 0].set_title('Orders by Day of Week', fontweight='bold')
+    axes[0, 0].set_ylabel('Number of Orders')
+    axes[0, 0].tick_params(axis='x', rotation=45)
+    for i, v in enumerate(df_dow['orders']):
+        axes[0, 0].text(i, v, str(v), ha='center', va='bottom')
+
+    # Chart 2: Sales by Day
+    axes[0, 1].bar(df_dow['day_of_week'], df_dow['total_sales'], color='green', alpha=0.7)
+    axes[0, 1].set_title('Sales by Day of Week', fontweight='bold')
+    axes[0, 1].set_ylabel('Total Sales ($)')
+    axes[0, 1].tick_params(axis='x', rotation=45)
+
+    # Chart 3: Avg Order Value
+    axes[1, 0].plot(df_dow['day_of_week'], df_dow['avg_order_value'], marker='o', linewidth=2, color='purple')
+    axes[1, 0].set_title('Average Order Value by Day', fontweight='bold')
+    axes[1, 0].set_ylabel('Avg Order Value ($)')
+    axes[1, 0].tick_params(axis='x', rotation=45)
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Chart 4: Profit by Day
+    axes[1, 1].bar(df_dow['day_of_week'], df_dow['total_profit'], color='orange', alpha=0.7)
+    axes[1, 1].set_title('Profit by Day of Week', fontweight='bold')
+    axes[1, 1].set_ylabel('Total Profit ($)')
+    axes[1, 1].tick_params(axis='x', rotation=45)
+
+    plt.tight_layout()
+    plt.savefig('visualizations/09_day_of_week_analysis.png', dpi=300, bbox_inches='tight')
+    plt.show()
+    print("\n✅ Visualization saved: 09_day_of_week_analysis.png")
 
 # ============================================================================
 # ANALYSIS 2: Monthly Seasonality
@@ -113,9 +130,9 @@ GROUP BY month_num
 ORDER BY month_num;
 """
 
-df_monthly = pd.read_sql_query(query2, conn)
+df_monthly = report_filter.read_sql(query2, conn)
 print("\n[Analysis 2] Sales by Month:")
-print(df_monthly[['month_name', 'orders', 'total_sales', 'total_profit']].to_string(index=False))
+output.table('monthly_seasonality', df_monthly, shown=df_monthly[['month_name', 'orders', 'total_sales', 'total_profit']])
 
 peak_month = df_monthly.loc[df_monthly['total_sales'].idxmax()]
 low_month = df_monthly.loc[df_monthly['total_sales'].idxmin()]
@@ -124,30 +141,32 @@ print(f"   • Peak Month: {peak_month['month_name']} (${peak_month['total_sales
 print(f"   • Lowest Month: {low_month['month_name']} (${low_month['total_sales']:,.2f})")
 print(f"   • Variation: {((peak_month['total_sales'] - low_month['total_sales']) / low_month['total_sales'] * 100):.1f}%")
 
-# Visualization
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 8))
-
-# Sales by Month
-ax1.plot(df_monthly['month_name'], df_monthly['total_sales'], marker='o', linewidth=2.5, color='blue', markersize=8)
-ax1.fill_between(range(len(df_monthly)), df_monthly['total_sales'], alpha=0.3, color='blue')
-ax1.set_title('Monthly Sales Seasonality', fontweight='bold', fontsize=14)
-ax1.set_ylabel('Total Sales ($)')
-ax1.tick_params(axis='x', rotation=45)
-ax1.grid(True, alpha=0.3)
-ax1.axhline(y=df_monthly['total_sales'].mean(), color='red', linestyle='--', label=f"Average: ${df_monthly['total_sales'].mean():,.0f}")
-ax1.legend()
-
-# Profit by Month
-ax2.bar(df_monthly['month_name'], df_monthly['total_profit'], color='green', alpha=0.7)
-ax2.set_title('Monthly Profit Patterns', fontweight='bold', fontsize=14)
-ax2.set_ylabel('Total Profit ($)')
-ax2.tick_params(axis='x', rotation=45)
-ax2.grid(axis='y', alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('visualizations/10_monthly_seasonality.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("\n✅ Visualization saved: 10_monthly_seasonality.png")
+# Visualization (redrawn only when its data changed since the last --output-dir run)
+if output.needs_chart('visualizations/10_monthly_seasonality.png', 'monthly_seasonality'):
+    import matplotlib.pyplot as plt
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 8))
+
+    # Sales by Month
+    ax1.plot(df_monthly['month_name'], df_monthly['total_sales'], marker='o', linewidth=2.5, color='blue', markersize=8)
+    ax1.fill_between(range(len(df_monthly)), df_monthly['total_sales'], alpha=0.3, color='blue')
+    ax1.set_title('Monthly Sales Seasonality', fontweight='bold', fontsize=14)
+    ax1.set_ylabel('Total Sales ($)')
+    ax1.tick_params(axis='x', rotation=45)
+    ax1.grid(True, alpha=0.3)
+    ax1.axhline(y=df_monthly['total_sales'].mean(), color='red', linestyle='--', label=f"Average: ${df_monthly['total_sales'].mean():,.0f}")
+    ax1.legend()
+
+    # Profit by Month
+    ax2.bar(df_monthly['month_name'], df_monthly['total_profit'], color='green', alpha=0.7)
+    ax2.set_title('Monthly Profit Patterns', fontweight='bold', fontsize=14)
+    ax2.set_ylabel('Total Profit ($)')
+    ax2.tick_params(axis='x', rotation=45)
+    ax2.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig('visualizations/10_monthly_seasonality.png', dpi=300, bbox_inches='tight')
+    plt.show()
+    print("\n✅ Visualization saved: 10_monthly_seasonality.png")
 
 # ============================================================================
 # ANALYSIS 3: Shipping Time Analysis
@@ -170,14 +189,30 @@ GROUP BY ship_mode
 ORDER BY avg_ship_days;
 """
 
-df_shipping = pd.read_sql_query(query3, conn)
+df_shipping = report_filter.read_sql(query3, conn)
 print("\n[Analysis 3] Shipping Performance by Mode:")
-print(df_shipping.to_string(index=False))
+output.table('shipping_by_mode', df_shipping)
 
 print(f"\n💡 Shipping Insights:")
 for _, row in df_shipping.iterrows():
     print(f"   • {row['ship_mode']}: Avg {row['avg_ship_days']:.1f} days, Avg Order ${row['avg_order_value']:,.2f}")
 
+# Percentiles and SLA breaches come from the daily shipping sketches built at load time;
+# sketches are keyed by day, ship mode and region, so only those filters apply to them
+sketch_columns = ('ship_mode', 'region')
+if not report_filter.covers(sketch_columns):
+    print("\n⚠️  Shipping sketches have no category/segment breakdown - percentiles use the date/region filters only")
+sla_where, sla_params = report_filter.where_clause(columns=sketch_columns)
+df_sla = ship_time_report(conn, group_by=['ship_mode'], where=sla_where, params=sla_params)
+print("\n[Analysis 3] Ship-Day Percentiles and SLA Breaches (per order):")
+output.table('ship_day_percentiles', df_sla)
+
+df_sla_region = ship_time_report(conn, group_by=['ship_mode', 'region'], where=sla_where, params=sla_params)
+worst = df_sla_region.loc[df_sla_region['sla_breach_percent'].idxmax()]
+print(f"\n⚠️  SLA Insight:")
+print(f"   • Total SLA breaches: {df_sla['sla_breaches'].sum():,} of {df_sla['orders'].sum():,} orders")
+print(f"   • Worst: {worst['ship_mode']} in {worst['region']} ({worst['sla_breach_percent']:.1f}% of orders late, p90 {worst['p90_ship_days']} days)")
+
 # ============================================================================
 # ANALYSIS 4: Quarter Performance
 # ============================================================================
@@ -203,44 +238,94 @@ GROUP BY year, quarter
 ORDER BY year, quarter;
 """
 
-df_quarterly = pd.read_sql_query(query4, conn)
+df_quarterly = report_filter.read_sql(query4, conn)
 print("\n[Analysis 4] Quarterly Performance:")
-print(df_quarterly.to_string(index=False))
+output.table('quarterly_performance', df_quarterly)
 
 # Create year-quarter label
 df_quarterly['year_quarter'] = df_quarterly['year'].astype(str) + '-' + df_quarterly['quarter']
 
-# Visualization
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
-
-# Sales by Quarter
-ax1.bar(df_quarterly['year_quarter'], df_quarterly['total_sales'], color='teal', alpha=0.7)
-ax1.set_title('Quarterly Sales Performance', fontweight='bold', fontsize=14)
-ax1.set_ylabel('Total Sales ($)')
-ax1.tick_params(axis='x', rotation=45)
-ax1.grid(axis='y', alpha=0.3)
-
-# Profit Margin by Quarter
-ax2.plot(df_quarterly['year_quarter'], df_quarterly['profit_margin_percent'], 
-         marker='o', linewidth=2.5, color='red', markersize=8)
-ax2.set_title('Quarterly Profit Margin Trend', fontweight='bold', fontsize=14)
-ax2.set_ylabel('Profit Margin (%)')
-ax2.tick_params(axis='x', rotation=45)
-ax2.grid(True, alpha=0.3)
-ax2.axhline(y=df_quarterly['profit_margin_percent'].mean(), color='black', linestyle='--', 
-            label=f"Avg: {df_quarterly['profit_margin_percent'].mean():.2f}%")
-ax2.legend()
-
-plt.tight_layout()
-plt.savefig('visualizations/11_quarterly_performance.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("\n✅ Visualization saved: 11_quarterly_performance.png")
+# Visualization (redrawn only when its data changed since the last --output-dir run)
+if output.needs_chart('visualizations/11_quarterly_performance.png', 'quarterly_performance'):
+    import matplotlib.pyplot as plt
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+
+    # Sales by Quarter
+    ax1.bar(df_quarterly['year_quarter'], df_quarterly['total_sales'], color='teal', alpha=0.7)
+    ax1.set_title('Quarterly Sales Performance', fontweight='bold', fontsize=14)
+    ax1.set_ylabel('Total Sales ($)')
+    ax1.tick_params(axis='x', rotation=45)
+    ax1.grid(axis='y', alpha=0.3)
+
+    # Profit Margin by Quarter
+    ax2.plot(df_quarterly['year_quarter'], df_quarterly['profit_margin_percent'], 
+             marker='o', linewidth=2.5, color='red', markersize=8)
+    ax2.set_title('Quarterly Profit Margin Trend', fontweight='bold', fontsize=14)
+    ax2.set_ylabel('Profit Margin (%)')
+    ax2.tick_params(axis='x', rotation=45)
+    ax2.grid(True, alpha=0.3)
+    ax2.axhline(y=df_quarterly['profit_margin_percent'].mean(), color='black', linestyle='--', 
+                label=f"Avg: {df_quarterly['profit_margin_percent'].mean():.2f}%")
+    ax2.legend()
+
+    plt.tight_layout()
+    plt.savefig('visualizations/11_quarterly_performance.png', dpi=300, bbox_inches='tight')
+    plt.show()
+    print("\n✅ Visualization saved: 11_quarterly_performance.png")
 
 print(f"\n💡 Quarterly Insight:")
 best_q = df_quarterly.loc[df_quarterly['total_sales'].idxmax()]
 print(f"   • Best Quarter: {best_q['year_quarter']} (${best_q['total_sales']:,.2f})")
 
+# ============================================================================
+# ANALYSIS 5: Rolling Windows and Month-over-Month Growth
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 5: ROLLING WINDOWS & GROWTH")
+print("="*80)
+
+# One daily aggregate per region; every window comes from the same prefix sums
+daily_where, daily_params = report_filter.where_clause()
+df_daily_region = load_daily_series(conn, dimensions=['region'], where=daily_where, params=daily_params)
+# The calendar ends at the filter's end or the latest order in the database, whichever
+# is first: days after the data are not padded on as zero-sales days
+data_end = conn.execute("SELECT DATE(MAX(order_date), '+1 day') FROM superstore").fetchone()[0]
+period = {'start_date': report_filter.start_date,
+          'end_date': min(report_filter.end_date or data_end, data_end)}
+df_rolling = rolling_metrics(df_daily_region, dimensions=['region'], **period)
+df_latest = df_rolling.groupby('region').tail(1)
+df_latest = df_latest.assign(order_date=df_latest['order_date'].dt.strftime('%Y-%m-%d'))
+
+print("\n[Analysis 5] Latest Rolling Sales by Region:")
+output.table('rolling_sales_by_region', df_latest[['region', 'order_date', 'running_total', 'rolling_7d_sum',
+                                                   'rolling_30d_sum', 'rolling_90d_sum', 'rolling_30d_avg']].round(2))
+
+# Months run to their last day unless the filter cuts them: data ending on the
+# 30th still makes a complete last month with growth figures
+data_month_end = conn.execute(
+    "SELECT DATE(MAX(order_date), 'start of month', '+1 month') FROM superstore").fetchone()[0]
+growth_period = {'start_date': report_filter.start_date,
+                 'end_date': min(report_filter.end_date or data_month_end, data_month_end)}
+df_growth = monthly_growth(load_daily_series(conn, where=daily_where, params=daily_params), **growth_period)
+print("\n[Analysis 5] Month-over-Month and Year-over-Year Sales Growth (last 12 months):")
+output.table('monthly_growth', df_growth.round(2), shown=df_growth.tail(12).round(2))
+
+top_region = df_latest.loc[df_latest['rolling_90d_sum'].idxmax()]
+print(f"\n💡 Momentum Insight:")
+print(f"   • Strongest Region (90 days to {top_region['order_date']}): {top_region['region']} "
+      f"(${top_region['rolling_90d_sum']:,.2f})")
+# Growth is only quoted for whole months
+df_complete = df_growth[df_growth['complete_month']]
+if len(df_complete) > 0:
+    latest_month = df_complete.iloc[-1]
+    print(f"   • Latest MoM Growth ({latest_month['year_month']}): {latest_month['mom_growth_percent']:.1f}%")
+    print(f"   • Latest YoY Growth ({latest_month['year_month']}): {latest_month['yoy_growth_percent']:.1f}%")
+partial = df_growth.loc[~df_growth['complete_month'], 'year_month'].tolist()
+if partial:
+    print(f"   • Partial months (no growth figures): {', '.join(partial)}")
+
 conn.close()
+output.finish()
 
 print("\n" + "="*80)
 print("TIME-SERIES ANALYSIS COMPLETED")
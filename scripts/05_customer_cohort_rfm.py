@@ -6,17 +6,35 @@ AUTHOR: yusufehtesham29
 ============================================================================
 """
 
-import pandas as pd
+# matplotlib is imported inside each chart block: text-only runs (--no-charts,
+# or charts whose data is unchanged) never pay for it
 import sqlite3
-import matplotlib.pyplot as plt
 import numpy as np
-from datetime import datetime
+from contextlib import closing
+
+from clv_models import fit_clv_models, load_rfm_summary, score_customers, write_clv
+from entity_store import EntityStore
+from report_args import parse_report_args
+from report_filters import ReportFilter
+from report_output import ReportOutput
+from shadow_db import begin_snapshot
+from sharding import report_connection, report_library
+
+# Every report flag, parsed once (see report_args.py)
+args = parse_report_args('Advanced customer segmentation using RFM and cohort analysis')
 
 print("="*80)
 print("CUSTOMER COHORT & RFM ANALYSIS")
 print("="*80)
 
-conn = sqlite3.connect('database/superstore.db')
+# One read snapshot for the whole report: a reload swapped in meanwhile is not seen
+conn = begin_snapshot(report_connection(shard_dir=args.shards))
+library = report_library(shard_dir=args.shards)
+# Same date range / dimension filter for every query (see report_filters.py)
+report_filter = ReportFilter.from_args(args).resolve(conn)
+print(f"\n🔎 Filters: {report_filter.describe()}")
+# Every table is also written as JSON/CSV/Parquet with --output-dir (see report_output.py)
+output = ReportOutput.from_args('customer_cohort_rfm', args, report_filter)
 
 # ============================================================================
 # ANALYSIS 1: Customer Purchase Frequency
@@ -61,44 +79,48 @@ ORDER BY
     END;
 """
 
-df_frequency = pd.read_sql_query(query1, conn)
+df_frequency = report_filter.read_sql(query1, conn)
+report_filter.require_rows(len(df_frequency))
 print("\n[Analysis 1] Customer Purchase Frequency:")
-print(df_frequency.to_string(index=False))
+output.table('purchase_frequency', df_frequency)
 
-one_time = df_frequency[df_frequency['purchase_count'].str.contains('One-time')]['percentage'].values[0]
+# No row for a band without customers (a filter may leave no one-time buyers)
+one_time = df_frequency[df_frequency['purchase_count'].str.contains('One-time')]['percentage'].sum()
 print(f"\n⚠️  Customer Retention Insight:")
 print(f"   • {one_time}% of customers made only ONE purchase")
 print(f"   • High customer acquisition cost not being recovered")
 print(f"   • Need retention strategy for one-time buyers")
 
-# Visualization
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-
-# Frequency Distribution
-colors = ['red', 'orange', 'yellow', 'lightgreen', 'green']
-ax1.bar(df_frequency['purchase_count'], df_frequency['customer_count'], color=colors)
-ax1.set_title('Customer Purchase Frequency Distribution', fontweight='bold', fontsize=14)
-ax1.set_ylabel('Number of Customers')
-ax1.set_xlabel('Purchase Frequency')
-ax1.tick_params(axis='x', rotation=45)
-for i, v in enumerate(df_frequency['customer_count']):
-    ax1.text(i, v, f'{v}\n({df_frequency["percentage"].iloc[i]}%)', ha='center', va='bottom')
-
-# Cumulative Percentage
-ax2.plot(df_frequency['purchase_count'], df_frequency['cumulative_percentage'], 
-         marker='o', linewidth=2.5, markersize=10, color='blue')
-ax2.fill_between(range(len(df_frequency)), df_frequency['cumulative_percentage'], alpha=0.3, color='blue')
-ax2.set_title('Cumulative Customer Distribution', fontweight='bold', fontsize=14)
-ax2.set_ylabel('Cumulative %')
-ax2.set_xlabel('Purchase Frequency')
-ax2.tick_params(axis='x', rotation=45)
-ax2.grid(True, alpha=0.3)
-ax2.set_ylim(0, 105)
-
-plt.tight_layout()
-plt.savefig('visualizations/12_customer_frequency.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("\n✅ Visualization saved: 12_customer_frequency.png")
+# Visualization (redrawn only when its data changed since the last --output-dir run)
+if output.needs_chart('visualizations/12_customer_frequency.png', 'purchase_frequency'):
+    import matplotlib.pyplot as plt
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Frequency Distribution
+    colors = ['red', 'orange', 'yellow', 'lightgreen', 'green']
+    ax1.bar(df_frequency['purchase_count'], df_frequency['customer_count'], color=colors)
+    ax1.set_title('Customer Purchase Frequency Distribution', fontweight='bold', fontsize=14)
+    ax1.set_ylabel('Number of Customers')
+    ax1.set_xlabel('Purchase Frequency')
+    ax1.tick_params(axis='x', rotation=45)
+    for i, v in enumerate(df_frequency['customer_count']):
+        ax1.text(i, v, f'{v}\n({df_frequency["percentage"].iloc[i]}%)', ha='center', va='bottom')
+
+    # Cumulative Percentage
+    ax2.plot(df_frequency['purchase_count'], df_frequency['cumulative_percentage'], 
+             marker='o', linewidth=2.5, markersize=10, color='blue')
+    ax2.fill_between(range(len(df_frequency)), df_frequency['cumulative_percentage'], alpha=0.3, color='blue')
+    ax2.set_title('Cumulative Customer Distribution', fontweight='bold', fontsize=14)
+    ax2.set_ylabel('Cumulative %')
+    ax2.set_xlabel('Purchase Frequency')
+    ax2.tick_params(axis='x', rotation=45)
+    ax2.grid(True, alpha=0.3)
+    ax2.set_ylim(0, 105)
+
+    plt.tight_layout()
+    plt.savefig('visualizations/12_customer_frequency.png', dpi=300, bbox_inches='tight')
+    plt.show()
+    print("\n✅ Visualization saved: 12_customer_frequency.png")
 
 # ============================================================================
 # ANALYSIS 2: Customer Lifetime Value (CLV)
@@ -123,40 +145,87 @@ ORDER BY lifetime_value DESC
 LIMIT 20;
 """
 
-df_clv = pd.read_sql_query(query2, conn)
+df_clv = report_filter.read_sql(query2, conn)
 print("\n[Analysis 2] Top 20 Customers by Lifetime Value:")
-print(df_clv.to_string(index=False))
+output.table('top_customers_clv', df_clv)
 
 print(f"\n💰 CLV Insights:")
 print(f"   • Top Customer Lifetime Value: ${df_clv['lifetime_value'].iloc[0]:,.2f}")
 print(f"   • Top 10 Customers Combined: ${df_clv['lifetime_value'].head(10).sum():,.2f}")
 print(f"   • Average Orders (Top 20): {df_clv['total_orders'].mean():.1f}")
 
-# Visualization
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-
-# Top 20 by Lifetime Value
-ax1.barh(range(len(df_clv)), df_clv['lifetime_value'], color='gold')
-ax1.set_yticks(range(len(df_clv)))
-ax1.set_yticklabels(df_clv['customer_name'], fontsize=8)
-ax1.set_title('Top 20 Customers by Lifetime Value', fontweight='bold', fontsize=14)
-ax1.set_xlabel('Lifetime Value ($)')
-ax1.invert_yaxis()
-
-# Lifetime Profit
-colors_profit = ['green' if x > 0 else 'red' for x in df_clv['lifetime_profit']]
-ax2.barh(range(len(df_clv)), df_clv['lifetime_profit'], color=colors_profit, alpha=0.7)
-ax2.set_yticks(range(len(df_clv)))
-ax2.set_yticklabels(df_clv['customer_name'], fontsize=8)
-ax2.set_title('Top 20 Customers by Lifetime Profit', fontweight='bold', fontsize=14)
-ax2.set_xlabel('Lifetime Profit ($)')
-ax2.invert_yaxis()
-ax2.axvline(x=0, color='black', linestyle='-', linewidth=1)
-
-plt.tight_layout()
-plt.savefig('visualizations/13_customer_lifetime_value.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("\n✅ Visualization saved: 13_customer_lifetime_value.png")
+# Visualization (redrawn only when its data changed since the last --output-dir run)
+if output.needs_chart('visualizations/13_customer_lifetime_value.png', 'top_customers_clv'):
+    import matplotlib.pyplot as plt
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Top 20 by Lifetime Value
+    ax1.barh(range(len(df_clv)), df_clv['lifetime_value'], color='gold')
+    ax1.set_yticks(range(len(df_clv)))
+    ax1.set_yticklabels(df_clv['customer_name'], fontsize=8)
+    ax1.set_title('Top 20 Customers by Lifetime Value', fontweight='bold', fontsize=14)
+    ax1.set_xlabel('Lifetime Value ($)')
+    ax1.invert_yaxis()
+
+    # Lifetime Profit
+    colors_profit = ['green' if x > 0 else 'red' for x in df_clv['lifetime_profit']]
+    ax2.barh(range(len(df_clv)), df_clv['lifetime_profit'], color=colors_profit, alpha=0.7)
+    ax2.set_yticks(range(len(df_clv)))
+    ax2.set_yticklabels(df_clv['customer_name'], fontsize=8)
+    ax2.set_title('Top 20 Customers by Lifetime Profit', fontweight='bold', fontsize=14)
+    ax2.set_xlabel('Lifetime Profit ($)')
+    ax2.invert_yaxis()
+    ax2.axvline(x=0, color='black', linestyle='-', linewidth=1)
+
+    plt.tight_layout()
+    plt.savefig('visualizations/13_customer_lifetime_value.png', dpi=300, bbox_inches='tight')
+    plt.show()
+    print("\n✅ Visualization saved: 13_customer_lifetime_value.png")
+
+# Predictive CLV: BG/NBD (purchase rate + dropout) x Gamma-Gamma (spend per purchase)
+print("\n[Analysis 2b] Predicted 12-Month Customer Value (BG/NBD + Gamma-Gamma):")
+rfm_where, rfm_params = report_filter.where_clause()
+df_rfm = load_rfm_summary(conn, where=rfm_where, params=rfm_params)
+try:
+    clv_models = fit_clv_models(df_rfm)
+except ValueError as exc:
+    # Too few repeat buyers in the filter, or a fit that ran to its bounds
+    clv_models = None
+    print(f"   ⚠️  Predictive CLV skipped: {exc}")
+if clv_models is not None:
+    r, alpha, a, b = clv_models['bgnbd']
+    p, q, v = clv_models['gamma_gamma']
+    print(f"   BG/NBD: r={r:.3f}, alpha={alpha:.3f}, a={a:.4f}, b={b:.3f}")
+    print(f"   Gamma-Gamma: p={p:.3f}, q={q:.3f}, v={v:.3f}")
+
+    df_predicted = score_customers(df_rfm, clv_models, horizon=52)
+    # customer_clv holds the full-history scores; filtered runs only print theirs
+    # Written on its own connection so the read snapshot stays open
+    if not report_filter.active:
+        with closing(sqlite3.connect(library.db_path)) as writer:
+            write_clv(writer, df_rfm, clv_models, horizon=52)
+    customer_names = report_filter.read_sql(
+        "SELECT customer_id, MIN(customer_name) AS customer_name, MIN(segment) AS segment FROM superstore GROUP BY customer_id",
+        conn)
+    # Compact per-customer store: names in one shared string table, metrics in a
+    # NumPy struct array, O(1) lookup by customer_id (see entity_store.py)
+    customers = EntityStore.from_frame(
+        df_predicted.merge(customer_names, on='customer_id', how='left'), 'customer_id',
+        dtypes={'frequency': np.int32, 'recency_weeks': np.float32, 'tenure_weeks': np.float32})
+    del df_predicted
+    top_predicted = customers.top_rows(20, 'predicted_clv')
+    output.table('predicted_clv_top', customers.to_frame(top_predicted),
+                 shown=customers.to_frame(top_predicted, ['customer_name', 'segment', 'frequency', 'probability_alive',
+                                                          'expected_purchases', 'expected_spend', 'predicted_clv']))
+
+    overlap = len(np.intersect1d(top_predicted, customers.rows(df_clv['customer_id'])))
+    print(f"\n🔮 Predictive CLV Insights:")
+    print(f"   • Predicted sales (next 12 months, all {len(customers)} customers): ${customers.column('predicted_clv').sum():,.2f}")
+    print(f"   • Expected purchases per customer: {customers.column('expected_purchases').mean():.2f}")
+    print(f"   • Held in {customers.nbytes / 1024:,.0f} KB ({len(customers.strings)} distinct strings)")
+    print(f"   • {overlap} of the top 20 predicted customers are also top 20 by historical value")
+    if not report_filter.active:
+        print(f"   • Scores saved to table 'customer_clv'")
 
 # ============================================================================
 # ANALYSIS 3: Customer Segment Comparison
@@ -190,14 +259,14 @@ GROUP BY segment
 ORDER BY segment_total_sales DESC;
 """
 
-df_segment_detail = pd.read_sql_query(query3, conn)
+df_segment_detail = report_filter.read_sql(query3, conn)
 print("\n[Analysis 3] Segment Comparison:")
-print(df_segment_detail.to_string(index=False))
+output.table('segment_comparison', df_segment_detail)
 
 print(f"\n💡 Segment Insights:")
-for _, row in df_segment_detail.iterrows():
-    print(f"   • {row['segment']}: {row['customers']} customers, ")
-    print(f"     Avg {row['avg_orders_per_customer']:.1f} orders/customer, ${row['avg_lifetime_value']:,.2f} avg CLV")
+for row in df_segment_detail.itertuples(index=False):
+    print(f"   • {row.segment}: {row.customers} customers, ")
+    print(f"     Avg {row.avg_orders_per_customer:.1f} orders/customer, ${row.avg_lifetime_value:,.2f} avg CLV")
 
 # ============================================================================
 # ANALYSIS 4: At-Risk Customers (Haven't Ordered Recently)
@@ -206,46 +275,13 @@ print("\n" + "="*80)
 print("SECTION 4: AT-RISK CUSTOMER IDENTIFICATION")
 print("="*80)
 
-query4 = """
-WITH customer_last_order AS (
-    SELECT 
-        customer_id,
-        customer_name,
-        segment,
-        MAX(order_date) AS last_order_date,
-        COUNT(DISTINCT order_id) AS total_orders,
-        ROUND(SUM(sales), 2) AS lifetime_value,
-        ROUND(SUM(profit), 2) AS lifetime_profit
-    FROM superstore
-    GROUP BY customer_id, customer_name, segment
-)
-SELECT 
-    customer_id,
-    customer_name,
-    segment,
-    last_order_date,
-    ROUND(JULIANDAY((SELECT MAX(order_date) FROM superstore)) - JULIANDAY(last_order_date)) AS days_since_last_order,
-    total_orders,
-    lifetime_value,
-    lifetime_profit,
-    CASE 
-        WHEN JULIANDAY((SELECT MAX(order_date) FROM superstore)) - JULIANDAY(last_order_date) > 365 THEN 'High Risk'
-        WHEN JULIANDAY((SELECT MAX(order_date) FROM superstore)) - JULIANDAY(last_order_date) > 180 THEN 'Medium Risk'
-        ELSE 'Active'
-    END AS risk_status
-FROM customer_last_order
-WHERE total_orders >= 3 
-  AND JULIANDAY((SELECT MAX(order_date) FROM superstore)) - JULIANDAY(last_order_date) > 180
-ORDER BY days_since_last_order DESC, lifetime_value DESC
-LIMIT 20;
-"""
-
-df_at_risk = pd.read_sql_query(query4, conn)
+df_at_risk = library.at_risk_customers(conn, min_orders=3, inactive_days=180, limit=20, **report_filter.kwargs())
 
 if len(df_at_risk) > 0:
     print("\n[Analysis 4] Top 20 At-Risk Valuable Customers (3+ orders, no purchase in 180+ days):")
-    print(df_at_risk[['customer_name', 'segment', 'days_since_last_order', 'total_orders', 
-                      'lifetime_value', 'risk_status']].to_string(index=False))
+    output.table('at_risk_customers', df_at_risk,
+                 shown=df_at_risk[['customer_name', 'segment', 'days_since_last_order', 'total_orders',
+                                   'lifetime_value', 'risk_status']])
     
     print(f"\n⚠️  Customer Retention Alert:")
     print(f"   • {len(df_at_risk)} valuable customers at risk of churning")
@@ -255,6 +291,7 @@ else:
     print("\n✅ No at-risk customers identified (all active within 180 days)")
 
 conn.close()
+output.finish()
 
 print("\n" + "="*80)
 print("CUSTOMER COHORT & RFM ANALYSIS COMPLETED")
@@ -276,6 +313,6 @@ if len(df_at_risk) > 0:
     print(f"   • Potential recovery: ${df_at_risk['lifetime_value'].sum():,.2f}")
 
 print("\n4. SEGMENT-SPECIFIC STRATEGIES")
-for _, row in df_segment_detail.iterrows():
-    if row['avg_orders_per_customer'] < 5:
-        print(f"   • {row['segment']}: Increase purchase frequency through loyalty program")
+for row in df_segment_detail.itertuples(index=False):
+    if row.avg_orders_per_customer < 5:
+        print(f"   • {row.segment}: Increase purchase frequency through loyalty program")
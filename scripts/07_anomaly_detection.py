@@ -0,0 +1,71 @@
+"""
+============================================================================
+FILE: 07_anomaly_detection.py
+PURPOSE: Flag unusual days in daily sales/profit per region and category
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import argparse
+import sqlite3
+
+import pandas as pd
+
+from anomaly_detection import late_rows, update, reset_state
+
+parser = argparse.ArgumentParser(description="Flag unusual days in daily sales/profit per region and category")
+parser.add_argument('--rebuild', action='store_true', help="Replay the full history instead of only the new days")
+args = parser.parse_args()
+
+print("="*80)
+print("DAILY ANOMALY DETECTION")
+print("="*80)
+
+conn = sqlite3.connect('database/superstore.db')
+
+# ============================================================================
+# STEP 1: Update State With New Days
+# ============================================================================
+n_late = 0 if args.rebuild else late_rows(conn)
+if args.rebuild:
+    print("\n[1] Rebuilding anomaly state from scratch...")
+    reset_state(conn)
+elif n_late:
+    # Rows dated before the last scored day: the state cannot be rewound, so replay
+    print(f"\n[1] {n_late:,} late rows since the last run, replaying the history...")
+else:
+    print("\n[1] Scoring days since the last run...")
+
+df_new = update(conn)
+print(f"✅ {len(df_new):,} new anomalies flagged")
+
+# ============================================================================
+# STEP 2: Report
+# ============================================================================
+print("\n[2] Most recent anomalies:")
+
+query = """
+SELECT order_date, region, category, metric, day_value, trailing_7d_value, expected, z_score, direction
+FROM anomalies
+ORDER BY order_date DESC, ABS(z_score) DESC
+LIMIT 20;
+"""
+df_recent = pd.read_sql_query(query, conn)
+
+if len(df_recent) > 0:
+    print(df_recent.to_string(index=False))
+
+    loss_days = df_recent[(df_recent['metric'] == 'profit') & (df_recent['day_value'] < 0)]
+    print(f"\n⚠️  Anomaly Alert:")
+    print(f"   • {len(loss_days)} of the latest anomalies are loss-making days")
+    if len(loss_days) > 0:
+        worst = loss_days.loc[loss_days['day_value'].idxmin()]
+        print(f"   • Worst: {worst['region']} / {worst['category']} on {worst['order_date']} (${worst['day_value']:,.2f})")
+else:
+    print("✅ No anomalies detected")
+
+conn.close()
+
+print("\n" + "="*80)
+print("ANOMALY DETECTION COMPLETED")
+print("="*80)
@@ -0,0 +1,68 @@
+"""
+============================================================================
+FILE: 08_market_basket.py
+PURPOSE: Find products and sub-categories that are bought together
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+from market_basket import association_rules, frequent_itemsets
+
+print("="*80)
+print("MARKET BASKET ANALYSIS")
+print("="*80)
+
+conn = sqlite3.connect('database/superstore.db')
+
+# ============================================================================
+# ANALYSIS 1: Sub-Category Pairs
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 1: SUB-CATEGORIES BOUGHT TOGETHER")
+print("="*80)
+
+df_rules = association_rules(conn, item_level='sub_category', min_support=0.002)
+df_rules.to_sql('basket_rules', conn, if_exists='replace', index=False)
+
+print("\n[Analysis 1] Top 15 Sub-Category Rules by Lift (support >= 0.2%):")
+print(df_rules.head(15).round(4).to_string(index=False))
+
+best = df_rules.iloc[0]
+print(f"\n💡 Cross-Sell Insight:")
+print(f"   • Customers buying {best['antecedent']} are {best['lift']:.2f}x as likely to buy {best['consequent']}")
+print(f"   • {len(df_rules)} rules saved to table 'basket_rules'")
+
+# ============================================================================
+# ANALYSIS 2: Larger Itemsets (FP-growth)
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 2: FREQUENT ITEMSETS")
+print("="*80)
+
+df_itemsets = frequent_itemsets(conn, item_level='sub_category', min_support=0.002, max_size=4)
+df_larger = df_itemsets[df_itemsets['size'] >= 3]
+
+print("\n[Analysis 2] Top 10 Itemsets of 3+ Sub-Categories:")
+print(df_larger.head(10).round(4).to_string(index=False))
+
+# ============================================================================
+# ANALYSIS 3: Product Pairs
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 3: PRODUCTS BOUGHT TOGETHER")
+print("="*80)
+
+# Individual products are rarely repeated, so keep every pair seen in 2+ orders
+df_product_rules = association_rules(conn, item_level='product_name', min_support=0.0)
+df_product_rules = df_product_rules[df_product_rules['pair_orders'] >= 2]
+print("\n[Analysis 3] Top 10 Product Pairs by Support:")
+df_top_pairs = df_product_rules[df_product_rules['antecedent'] < df_product_rules['consequent']]
+print(df_top_pairs.sort_values('support', ascending=False).head(10).round(4).to_string(index=False))
+
+conn.close()
+
+print("\n" + "="*80)
+print("MARKET BASKET ANALYSIS COMPLETED")
+print("="*80)
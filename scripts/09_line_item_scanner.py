@@ -0,0 +1,71 @@
+"""
+============================================================================
+FILE: 09_line_item_scanner.py
+PURPOSE: Find the individual line items that drive the losses
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from line_item_scanner import (DISCOUNT_BAND, FLAG_DEEP_DISCOUNT, FLAG_NEGATIVE_PROFIT, describe_flags,
+                               flag_summary, scan_line_items, worst_line_items)
+
+print("="*80)
+print("LINE-ITEM LOSS SCANNER")
+print("="*80)
+
+conn = sqlite3.connect('database/superstore.db')
+
+# ============================================================================
+# STEP 1: Scan
+# ============================================================================
+print("\n[1] Scanning line items (one streaming pass)...")
+stats = scan_line_items(conn)
+print(f"✅ {stats['rows_scanned']:,} line items scanned in {stats['chunks']} chunks "
+      f"({stats['seconds']:.2f}s), {stats['rows_flagged']:,} flagged")
+print("   Results saved to table 'line_item_flags'")
+
+# ============================================================================
+# STEP 2: Rules
+# ============================================================================
+print("\n[2] Flagged line items by rule:")
+df_rules = flag_summary(conn)
+print(df_rules.to_string(index=False))
+
+# ============================================================================
+# STEP 3: Worst Line Items
+# ============================================================================
+print("\n[3] Top 20 loss-making line items:")
+df_worst = worst_line_items(conn, limit=20)
+df_worst['rules'] = df_worst['flags'].map(describe_flags)
+print(df_worst.drop(columns='flags').to_string(index=False))
+
+print("\n[4] Losses on deeply discounted line items by sub-category:")
+query = """
+SELECT sub_category, COUNT(*) AS line_items, ROUND(SUM(profit), 2) AS total_loss
+FROM line_item_flags
+WHERE flags & ? = ?
+GROUP BY sub_category
+ORDER BY total_loss ASC;
+"""
+both = FLAG_NEGATIVE_PROFIT | FLAG_DEEP_DISCOUNT
+df_discount_losses = pd.read_sql_query(query, conn, params=(both, both))
+print(df_discount_losses.to_string(index=False))
+
+total_loss = conn.execute("SELECT SUM(profit) FROM line_item_flags WHERE flags & ?",
+                          (FLAG_NEGATIVE_PROFIT,)).fetchone()[0] or 0
+print(f"\n⚠️  Loss Insight:")
+print(f"   • Loss-making line items cost ${-total_loss:,.2f} in total")
+if len(df_discount_losses) > 0:
+    share = df_discount_losses['total_loss'].sum() / total_loss * 100 if total_loss else 0
+    print(f"   • {share:.1f}% of that comes from line items discounted above {DISCOUNT_BAND:.0%}")
+    print(f"   • Worst: {df_discount_losses.iloc[0]['sub_category']} (${df_discount_losses.iloc[0]['total_loss']:,.2f})")
+
+conn.close()
+
+print("\n" + "="*80)
+print("LINE-ITEM SCAN COMPLETED")
+print("="*80)
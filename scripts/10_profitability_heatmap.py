@@ -0,0 +1,108 @@
+"""
+============================================================================
+FILE: 10_profitability_heatmap.py
+PURPOSE: Segment x region x category profitability from one pivot pass
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+# matplotlib is imported by plot_profitability_heatmaps() only when the chart is drawn
+from pivot_cube import build_cube, plot_profitability_heatmaps
+from report_args import parse_report_args
+from report_filters import ReportFilter
+from report_output import ReportOutput
+from shadow_db import begin_snapshot
+from sharding import report_connection
+
+# Every report flag, parsed once (see report_args.py)
+args = parse_report_args('Segment x region x category profitability from one pivot pass')
+
+print("="*80)
+print("PROFITABILITY HEATMAP: SEGMENT x REGION x CATEGORY")
+print("="*80)
+
+# One read snapshot for the whole report: a reload swapped in meanwhile is not seen
+conn = begin_snapshot(report_connection(shard_dir=args.shards))
+# Same date range / dimension filter as the other reports (see report_filters.py)
+report_filter = ReportFilter.from_args(args).resolve(conn)
+print(f"\n🔎 Filters: {report_filter.describe()}")
+output = ReportOutput.from_args('profitability_heatmap', args, report_filter)
+
+# ============================================================================
+# STEP 1: Build the Cube (the only query of this report)
+# ============================================================================
+print("\n[1] Building the segment x region x category cube (one scan)...")
+cube = build_cube(conn, report_filter=report_filter)
+conn.close()
+report_filter.require_rows(cube.measures['line_items'].sum())
+print(f"✅ {' x '.join(str(n) for n in cube.shape)} cells from "
+      f"{int(cube.measures['line_items'].sum()):,} line items")
+
+# ============================================================================
+# SECTION 1: Every Cell
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 1: SALES, PROFIT AND MARGIN PER CELL")
+print("="*80)
+
+df_cube = cube.to_frame().round({'sales': 2, 'profit': 2, 'margin_percent': 2})
+print("\n[Analysis 1] Segment x Region x Category:")
+output.table('cube', df_cube)
+
+# ============================================================================
+# SECTION 2: Margin Matrices (slices and marginals of the cube)
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 2: PROFIT MARGIN (%) MATRICES")
+print("="*80)
+
+for segment in cube.labels['segment']:
+    print(f"\n[Analysis 2] {segment}: Region x Category Margin %")
+    df_segment = cube.matrix('region', 'category', segment=segment).round(2).reset_index()
+    output.table(f"margin_region_category_{segment.lower().replace(' ', '_')}", df_segment)
+
+for rows, cols in [('region', 'category'), ('segment', 'category'), ('segment', 'region')]:
+    print(f"\n[Analysis 2] All Segments: {rows.title()} x {cols.title()} Margin %")
+    output.table(f"margin_{rows}_{cols}", cube.matrix(rows, cols).round(2).reset_index())
+
+# ============================================================================
+# SECTION 3: Sales Mix
+# ============================================================================
+print("\n" + "="*80)
+print("SECTION 3: SALES MIX")
+print("="*80)
+
+region_category = cube.marginal('region', 'category')
+df_mix = region_category.to_frame()[['region', 'category', 'sales']]
+df_mix['share_of_region_percent'] = region_category.share(within=('region',)).ravel().round(2)
+df_mix['share_of_category_percent'] = region_category.share(within=('category',)).ravel().round(2)
+print("\n[Analysis 3] Category Share of Each Region's Sales (and Region Share of Each Category):")
+output.table('sales_mix_region_category', df_mix.round({'sales': 2}))
+
+# ============================================================================
+# INSIGHTS
+# ============================================================================
+total_sales = cube.measures['sales'].sum()
+# Ignore cells too small for their margin to matter
+material = df_cube[df_cube['sales'] >= 0.01 * total_sales]
+print(f"\n💡 Profitability Insights:")
+if len(material) > 0:
+    worst = material.loc[material['margin_percent'].idxmin()]
+    best = material.loc[material['margin_percent'].idxmax()]
+    print(f"   • Weakest cell: {worst['segment']} / {worst['region']} / {worst['category']} "
+          f"({worst['margin_percent']:.2f}% margin on ${worst['sales']:,.2f})")
+    print(f"   • Strongest cell: {best['segment']} / {best['region']} / {best['category']} "
+          f"({best['margin_percent']:.2f}% margin on ${best['sales']:,.2f})")
+losing = df_cube[df_cube['profit'] < 0]
+print(f"   • {len(losing)} of {len(df_cube)} cells lose money (${-losing['profit'].sum():,.2f} in total)")
+
+# Visualization (redrawn only when the cube changed since the last --output-dir run)
+if output.needs_chart('visualizations/14_profitability_heatmap.png', 'cube'):
+    plot_profitability_heatmaps(cube, 'visualizations/14_profitability_heatmap.png')
+    print("\n✅ Visualization saved: 14_profitability_heatmap.png")
+
+output.finish()
+
+print("\n" + "="*80)
+print("PROFITABILITY HEATMAP COMPLETED")
+print("="*80)
@@ -0,0 +1,238 @@
+"""
+============================================================================
+FILE: anomaly_detection.py
+PURPOSE: Incremental anomaly detection over daily sales/profit per series
+AUTHOR: yusufehtesham29
+============================================================================
+
+Single-day totals per region x category are mostly zeros, so the
+baseline is kept on the trailing 7-day total: every region x category x
+metric series keeps a small fixed state of the last 7 daily values, an
+exponentially weighted mean and mean absolute deviation of the 7-day
+total, and an observation count. A day is scored on its own residual -
+its value minus the expected day (a seventh of the expected 7-day
+total) - in units of the 7-day scale, so an outlier is reported on the
+day it happened and not again while it stays in the window. The day is
+then folded in, with the 7-day total clipped to the expected band first
+so a single outlier cannot drag the baseline.
+
+State lives in the `anomaly_state` table, so a run after an incremental
+load only reads the days after the last processed date and touches
+O(series) state per day. Flagged days are appended to `anomalies`.
+
+`anomaly_watermark` records the highest superstore rowid seen by the last
+run. Rows above it dated on or before the last processed day arrived late:
+their days were already folded into the state, which cannot be rewound,
+so update() replays the history once to take them in.
+"""
+
+import numpy as np
+import pandas as pd
+
+# The anomalies table has one column per dimension
+DIMENSIONS = ['region', 'category']
+METRICS = ('sales', 'profit')
+
+WINDOW_DAYS = 7
+HALF_LIFE_DAYS = 28
+Z_THRESHOLD = 4.5
+MIN_HISTORY_DAYS = 28
+
+# Mean absolute deviation -> standard deviation for normal data
+MAD_TO_STD = 1.2533
+
+
+def _decay(half_life=HALF_LIFE_DAYS):
+    return 1 - 0.5 ** (1 / half_life)
+
+
+def create_tables(conn):
+    """Create the state and output tables if they do not exist yet."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS anomaly_state (
+        series_key TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        last_date TEXT NOT NULL,
+        ewm_mean REAL NOT NULL,
+        ewm_mad REAL NOT NULL,
+        n_obs INTEGER NOT NULL,
+        recent_values TEXT NOT NULL,
+        PRIMARY KEY (series_key, metric)
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS anomalies (
+        order_date TEXT NOT NULL,
+        region TEXT,
+        category TEXT,
+        metric TEXT NOT NULL,
+        day_value REAL,
+        trailing_7d_value REAL,
+        expected REAL,
+        z_score REAL,
+        direction TEXT
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_anomalies_date ON anomalies(order_date)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS anomaly_watermark (
+        last_date TEXT NOT NULL,
+        max_rowid INTEGER NOT NULL,
+        row_count INTEGER NOT NULL
+    )""")
+    conn.commit()
+
+
+def reset_state(conn):
+    """Forget all state and flagged anomalies so the next run starts over."""
+    create_tables(conn)
+    conn.execute("DELETE FROM anomaly_state")
+    conn.execute("DELETE FROM anomalies")
+    conn.execute("DELETE FROM anomaly_watermark")
+    conn.commit()
+
+
+def late_rows(conn):
+    """Rows loaded since the last run but dated on or before its last processed day.
+
+    A replaced table, or one that gained rows below the watermark (rowid is
+    row_id in the ingest schema, so appends need not be in rowid order),
+    counts as late in full: the rows up to the watermark changed.
+    """
+    create_tables(conn)
+    mark = conn.execute("SELECT last_date, max_rowid, row_count FROM anomaly_watermark").fetchone()
+    if mark is None:
+        return 0
+    last_date, max_rowid, row_count = mark
+    kept = conn.execute("SELECT COUNT(*) FROM superstore WHERE rowid <= ?", (max_rowid,)).fetchone()[0]
+    if kept != row_count:
+        return conn.execute("SELECT COUNT(*) FROM superstore").fetchone()[0]
+    # order_date is an ISO date string: compare the bare column so idx_order_date is used
+    return conn.execute(
+        "SELECT COUNT(*) FROM superstore WHERE rowid > ? AND order_date < DATE(?, '+1 day')",
+        (max_rowid, last_date),
+    ).fetchone()[0]
+
+
+def _load_state(conn):
+    state = pd.read_sql_query("SELECT * FROM anomaly_state", conn)
+    last_date = state['last_date'].max() if len(state) else None
+    return state.set_index(['series_key', 'metric']), last_date
+
+
+def _load_new_days(conn, last_date, dimensions):
+    """Daily per-series totals strictly after last_date."""
+    dims_sql = ', '.join(dimensions)
+    # Not DATE(order_date) > ?, which wraps the column and scans the whole table
+    where = "WHERE order_date >= DATE(?, '+1 day')" if last_date else ""
+    params = (last_date,) if last_date else ()
+    query = f"""
+    SELECT
+        DATE(order_date) AS order_date,
+        {dims_sql},
+        SUM(sales) AS sales,
+        SUM(profit) AS profit
+    FROM superstore
+    {where}
+    GROUP BY DATE(order_date), {dims_sql}
+    ORDER BY order_date;
+    """
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def _write_watermark(conn, last_date, max_rowid, row_count):
+    conn.execute("DELETE FROM anomaly_watermark")
+    conn.execute("INSERT INTO anomaly_watermark VALUES (?, ?, ?)", (last_date, max_rowid, row_count))
+
+
+def update(conn, z_threshold=Z_THRESHOLD, half_life=HALF_LIFE_DAYS, min_history=MIN_HISTORY_DAYS):
+    """Score every day since the last run, update state, append anomalies.
+
+    Late rows (see late_rows) make it replay the full history first.
+    Returns the DataFrame of newly flagged anomalies.
+    """
+    dimensions = DIMENSIONS
+    create_tables(conn)
+    if late_rows(conn):
+        reset_state(conn)
+    state, last_date = _load_state(conn)
+    # Read before the days: anything loaded in between is caught as late next run
+    max_rowid, row_count = conn.execute("SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM superstore").fetchone()
+    new_days = _load_new_days(conn, last_date, dimensions)
+    if new_days.empty:
+        if last_date:
+            _write_watermark(conn, last_date, max_rowid, row_count)
+            conn.commit()
+        return pd.DataFrame()
+
+    # Series seen before keep their order; new series are appended with empty state
+    new_days['series_key'] = new_days[dimensions].astype(str).agg('|'.join, axis=1)
+    known = state.index.get_level_values('series_key').unique().tolist()
+    series = known + sorted(set(new_days['series_key']) - set(known))
+    n_series, n_metrics = len(series), len(METRICS)
+
+    mean = np.zeros((n_series, n_metrics))
+    mad = np.zeros((n_series, n_metrics))
+    n_obs = np.zeros((n_series, n_metrics), dtype=np.int64)
+    recent = np.zeros((WINDOW_DAYS, n_series, n_metrics))
+    for s, key in enumerate(series):
+        for m, metric in enumerate(METRICS):
+            if (key, metric) in state.index:
+                row = state.loc[(key, metric)]
+                mean[s, m], mad[s, m], n_obs[s, m] = row['ewm_mean'], row['ewm_mad'], row['n_obs']
+                recent[:, s, m] = [float(v) for v in row['recent_values'].split(',')]
+
+    # Dense day x series x metric cube; days without orders are zeros
+    first = pd.Timestamp(last_date) + pd.Timedelta(days=1) if last_date else pd.Timestamp(new_days['order_date'].min())
+    calendar = pd.date_range(first, new_days['order_date'].max(), freq='D')
+    day_idx = (pd.to_datetime(new_days['order_date']) - calendar[0]).dt.days.to_numpy()
+    series_idx = pd.Index(series).get_indexer(new_days['series_key'])
+    cube = np.zeros((len(calendar), n_series, n_metrics))
+    cube[day_idx, series_idx] = new_days[list(METRICS)].to_numpy(dtype=float)
+
+    decay = _decay(half_life)
+    flagged = []
+    for d in range(len(calendar)):
+        # Ring buffer of the last WINDOW_DAYS daily values, oldest first
+        recent = np.roll(recent, -1, axis=0)
+        recent[-1] = cube[d]
+        value = recent.sum(axis=0)
+        scale = np.maximum(mad * MAD_TO_STD, 1e-9)
+        z = (value - mean) / scale
+        # The day's own residual: later days in the window do not repeat its outlier
+        expected_day = mean / WINDOW_DAYS
+        z_day = (cube[d] - expected_day) / scale
+        hits = (n_obs >= min_history) & (np.abs(z_day) > z_threshold) & (mad > 0)
+        for s, m in zip(*np.nonzero(hits)):
+            flagged.append((calendar[d].strftime('%Y-%m-%d'), series[s], METRICS[m],
+                            cube[d, s, m], value[s, m], expected_day[s, m], z_day[s, m]))
+
+        # Winsorize before updating so the baseline is robust to the outlier itself
+        warm = n_obs >= min_history
+        band = z_threshold * scale
+        clipped = np.where(warm, np.clip(value, mean - band, mean + band), value)
+        first_obs = n_obs == 0
+        deviation = np.abs(clipped - mean)
+        mean = np.where(first_obs, clipped, mean + decay * (clipped - mean))
+        mad = np.where(first_obs, 0.0, mad + decay * (deviation - mad))
+        n_obs += 1
+
+    processed_through = calendar[-1].strftime('%Y-%m-%d')
+    conn.executemany(
+        "INSERT OR REPLACE INTO anomaly_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(key, metric, processed_through, float(mean[s, m]), float(mad[s, m]), int(n_obs[s, m]),
+          ','.join(repr(float(v)) for v in recent[:, s, m]))
+         for s, key in enumerate(series) for m, metric in enumerate(METRICS)],
+    )
+    _write_watermark(conn, processed_through, max_rowid, row_count)
+
+    numeric = ['day_value', 'trailing_7d_value', 'expected', 'z_score']
+    anomalies = pd.DataFrame(flagged, columns=['order_date', 'series_key', 'metric'] + numeric)
+    if len(anomalies):
+        keys = anomalies['series_key'].str.split('|', expand=True)
+        for i, dim in enumerate(dimensions):
+            anomalies[dim] = keys[i]
+        anomalies['direction'] = np.where(anomalies['z_score'] < 0, 'drop', 'spike')
+        anomalies = anomalies[['order_date'] + dimensions + ['metric'] + numeric + ['direction']]
+        anomalies[numeric] = anomalies[numeric].round(2)
+        anomalies.to_sql('anomalies', conn, if_exists='append', index=False)
+    conn.commit()
+    return anomalies
@@ -0,0 +1,567 @@
+"""
+============================================================================
+FILE: bitmap_index.py
+PURPOSE: Exact distinct customer/order counts from compressed bitmaps
+AUTHOR: yusufehtesham29
+============================================================================
+
+At load time every customer and order gets a dense integer code, and for
+every dimension value (region = 'West', category = 'Technology', ...) the
+set of customers and the set of orders with at least one line item
+carrying that value is stored as a compressed bitmap in `bitmap_index`.
+A distinct count for any combination of filters is then set algebra on
+a few bitmaps plus a popcount - no rescan of superstore:
+
+    index = BitmapIndex(conn)
+    index.count('customers', {'region': 'West', 'category': 'Technology'})
+    index.count('orders', {'segment': ['Consumer', 'Corporate'], 'year': '2017'})
+    (index.bitmap('customers', 'region', 'West')
+     - index.bitmap('customers', 'category', 'Furniture')).cardinality()
+
+    python scripts/bitmap_index.py --count customers region=West category=Technology
+    python scripts/bitmap_index.py --count orders state=Texas,Ohio category!=Furniture
+    python scripts/bitmap_index.py --check
+
+Filters use the report_filters convention: {dimension: value or list of
+values}. Values of one dimension are OR'ed, dimensions are AND'ed, and
+dimension!=value removes a set. For orders, region / state / segment /
+ship_mode / year are order attributes, so a filter with at most one
+product dimension (category, sub_category) counts exactly what
+COUNT(DISTINCT order_id) ... WHERE ... AND ... counts. Two product
+dimensions mean baskets: orders with a Furniture line AND a Phones line.
+
+Customers are the customers of the matching orders (the order bitmaps,
+mapped through customers_of), so they count what COUNT(DISTINCT
+customer_id) ... WHERE ... AND ... counts, under the same rule. With
+any_order=True (--any-order) the customer bitmaps are combined instead:
+every condition may then be met by a different order ("ordered in the
+West at some point, and bought Technology at some point").
+
+The bitmaps are roaring-style: codes are split into 2^16-wide chunks,
+and each chunk is stored either as a sorted uint16 array (up to
+ARRAY_MAX members) or as a 1024-word bitset (8 KB) - whichever is
+smaller - so sparse and dense sets both stay compact.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = 'database/superstore.db'
+
+# dimension -> SQL expression over superstore
+DIMENSIONS = {
+    'segment': 'segment',
+    'region': 'region',
+    'state': 'state',
+    'category': 'category',
+    'sub_category': 'sub_category',
+    'ship_mode': 'ship_mode',
+    'year': "strftime('%Y', order_date)",
+}
+# entity -> id column
+ENTITIES = {'customers': 'customer_id', 'orders': 'order_id'}
+SCAN_ROWS = 250_000
+
+CONTAINER_BITS = 16
+CONTAINER_SIZE = 1 << CONTAINER_BITS
+ARRAY_MAX = 4096  # above this a bitset (8 KB) is smaller than a uint16 array
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+# ============================================================================
+# CONTAINERS (one 2^16-wide chunk: uint16 array or uint64 bitset)
+# ============================================================================
+
+def _is_bitset(container):
+    return container.dtype == np.uint64
+
+
+def _cardinality(container):
+    if _is_bitset(container):
+        return int(_POPCOUNT[container.view(np.uint8)].sum())
+    return len(container)
+
+
+def _to_bitset(container):
+    if _is_bitset(container):
+        return container
+    present = np.zeros(CONTAINER_SIZE, dtype=bool)
+    present[container] = True
+    return np.packbits(present, bitorder='little').view('<u8')
+
+
+def _to_array(container):
+    if not _is_bitset(container):
+        return container
+    bits = np.unpackbits(container.view(np.uint8), bitorder='little')
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _shrink(container):
+    """Smallest representation, or None when the chunk is empty."""
+    n = _cardinality(container)
+    if n == 0:
+        return None
+    if n <= ARRAY_MAX:
+        return _to_array(container)
+    return _to_bitset(container)
+
+
+def _container_and(a, b):
+    if not _is_bitset(a) and not _is_bitset(b):
+        return _shrink(np.intersect1d(a, b, assume_unique=True))
+    if _is_bitset(a) and _is_bitset(b):
+        return _shrink(a & b)
+    array, bitset = (a, b) if _is_bitset(b) else (b, a)
+    # Keep the array members whose bit is set - no 64K expansion needed
+    hit = (bitset[array >> 6] >> (array & 63).astype(np.uint64)) & np.uint64(1)
+    return _shrink(array[hit.astype(bool)])
+
+
+def _container_or(a, b):
+    if not _is_bitset(a) and not _is_bitset(b) and len(a) + len(b) <= ARRAY_MAX:
+        return _shrink(np.union1d(a, b))
+    return _shrink(_to_bitset(a) | _to_bitset(b))
+
+
+def _container_andnot(a, b):
+    if not _is_bitset(a):
+        if _is_bitset(b):
+            hit = (b[a >> 6] >> (a & 63).astype(np.uint64)) & np.uint64(1)
+            return _shrink(a[~hit.astype(bool)])
+        return _shrink(np.setdiff1d(a, b, assume_unique=True))
+    return _shrink(a & ~_to_bitset(b))
+
+
+class RoaringBitmap:
+    """Compressed set of non-negative integer codes (< 2^32)."""
+
+    __slots__ = ('keys', 'containers')
+
+    def __init__(self, keys=(), containers=()):
+        self.keys = list(keys)
+        self.containers = list(containers)
+
+    @classmethod
+    def from_codes(cls, codes):
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(codes) > 1 and not (codes[1:] > codes[:-1]).all():
+            codes = np.sort(pd.unique(codes))
+        if len(codes) and (codes[0] < 0 or codes[-1] >= 1 << 32):
+            raise ValueError("Codes must be in [0, 2^32)")
+        high = codes >> CONTAINER_BITS
+        starts = np.flatnonzero(np.r_[True, high[1:] != high[:-1]]) if len(codes) else []
+        ends = list(starts[1:]) + [len(codes)]
+        keys, containers = [], []
+        for start, end in zip(starts, ends):
+            keys.append(int(high[start]))
+            containers.append(_shrink((codes[start:end] & (CONTAINER_SIZE - 1)).astype(np.uint16)))
+        return cls(keys, containers)
+
+    def to_codes(self):
+        if not self.keys:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([(key << CONTAINER_BITS) + _to_array(c).astype(np.int64)
+                               for key, c in zip(self.keys, self.containers)])
+
+    def cardinality(self):
+        return sum(_cardinality(c) for c in self.containers)
+
+    __len__ = cardinality
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.containers) + 8 * len(self.keys)
+
+    def _merge(self, other, op, keep_left, keep_right):
+        left = dict(zip(self.keys, self.containers))
+        right = dict(zip(other.keys, other.containers))
+        keys, containers = [], []
+        for key in sorted(left.keys() | right.keys()):
+            if key in left and key in right:
+                container = op(left[key], right[key])
+            elif key in left:
+                container = left[key] if keep_left else None
+            else:
+                container = right[key] if keep_right else None
+            if container is not None:
+                keys.append(key)
+                containers.append(container)
+        return RoaringBitmap(keys, containers)
+
+    def __and__(self, other):
+        return self._merge(other, _container_and, False, False)
+
+    def __or__(self, other):
+        return self._merge(other, _container_or, True, True)
+
+    def __sub__(self, other):
+        return self._merge(other, _container_andnot, True, False)
+
+    def __eq__(self, other):
+        return isinstance(other, RoaringBitmap) and np.array_equal(self.to_codes(), other.to_codes())
+
+    def __repr__(self):
+        return f"RoaringBitmap({self.cardinality():,} codes, {len(self.keys)} chunks, {self.nbytes:,} bytes)"
+
+    # Layout: n, then n keys (uint32), n kinds (uint8: 0 array, 1 bitset),
+    # n sizes (uint32, members or words), then the containers back to back
+    def to_bytes(self):
+        n = len(self.keys)
+        kinds = np.array([_is_bitset(c) for c in self.containers], dtype=np.uint8)
+        sizes = np.array([len(c) for c in self.containers], dtype='<u4')
+        parts = [np.array([n], dtype='<u4').tobytes(), np.array(self.keys, dtype='<u4').tobytes(),
+                 kinds.tobytes(), sizes.tobytes()]
+        parts += [c.astype('<u8' if _is_bitset(c) else '<u2').tobytes() for c in self.containers]
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        n = int(np.frombuffer(data, dtype='<u4', count=1)[0])
+        offset = 4
+        keys = np.frombuffer(data, dtype='<u4', count=n, offset=offset)
+        offset += 4 * n
+        kinds = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset)
+        offset += n
+        sizes = np.frombuffer(data, dtype='<u4', count=n, offset=offset)
+        offset += 4 * n
+        containers = []
+        for kind, size in zip(kinds, sizes):
+            dtype = np.uint64 if kind else np.uint16
+            containers.append(np.frombuffer(data, dtype=dtype, count=int(size), offset=offset))
+            offset += int(size) * np.dtype(dtype).itemsize
+        return cls([int(k) for k in keys], containers)
+
+
+# ============================================================================
+# BUILD (called by the loaders through derived_tables)
+# ============================================================================
+
+def build_bitmap_index(conn, chunk_rows=SCAN_ROWS):
+    """Rebuild bitmap_index and its id dictionaries; returns the number of bitmaps."""
+    # Codes follow id order; orders also record their customer's code
+    customers = pd.read_sql_query("SELECT DISTINCT customer_id FROM superstore ORDER BY customer_id", conn)
+    customer_index = pd.Index(customers['customer_id'])
+    orders = pd.read_sql_query(
+        "SELECT order_id, MIN(customer_id) AS customer_id FROM superstore GROUP BY order_id ORDER BY order_id", conn)
+    orders['customer_code'] = customer_index.get_indexer(orders['customer_id'])
+    order_index = pd.Index(orders['order_id'])
+
+    # One pass over superstore: each chunk adds its distinct (value, code) pairs,
+    # packed as value << 32 | code so a sort groups them by value
+    vocabulary = {dimension: {} for dimension in DIMENSIONS}
+    pairs = {(entity, dimension): [] for entity in ENTITIES for dimension in DIMENSIONS}
+    columns = ', '.join(f"{expression} AS {dimension}" for dimension, expression in DIMENSIONS.items())
+    query = f"SELECT customer_id, order_id, {columns} FROM superstore"
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+        codes = {'customers': customer_index.get_indexer(chunk['customer_id']),
+                 'orders': order_index.get_indexer(chunk['order_id'])}
+        for dimension in DIMENSIONS:
+            local, uniques = pd.factorize(chunk[dimension])
+            known = vocabulary[dimension]
+            value_codes = np.array([known.setdefault(str(u), len(known)) for u in uniques],
+                                   dtype=np.int64)[local]
+            present = local >= 0  # NULL values belong to no bitmap
+            for entity, entity_codes in codes.items():
+                packed = (value_codes[present] << 32) | entity_codes[present]
+                pairs[(entity, dimension)].append(pd.unique(packed))
+
+    conn.execute("DROP TABLE IF EXISTS bitmap_index")
+    conn.execute("DROP TABLE IF EXISTS bitmap_customers")
+    conn.execute("DROP TABLE IF EXISTS bitmap_orders")
+    conn.execute("""
+    CREATE TABLE bitmap_index (
+        entity TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        cardinality INTEGER NOT NULL,
+        bitmap BLOB NOT NULL,
+        PRIMARY KEY (entity, dimension, value)
+    )""")
+    conn.execute("CREATE TABLE bitmap_customers (code INTEGER PRIMARY KEY, customer_id TEXT NOT NULL)")
+    conn.execute("""
+    CREATE TABLE bitmap_orders (
+        code INTEGER PRIMARY KEY,
+        order_id TEXT NOT NULL,
+        customer_code INTEGER NOT NULL
+    )""")
+    conn.executemany("INSERT INTO bitmap_customers VALUES (?, ?)",
+                     enumerate(customers['customer_id'].astype(str).tolist()))
+    conn.executemany("INSERT INTO bitmap_orders VALUES (?, ?, ?)",
+                     zip(range(len(orders)), orders['order_id'].astype(str).tolist(),
+                         orders['customer_code'].tolist()))
+
+    n_bitmaps = 0
+    for (entity, dimension), parts in pairs.items():
+        packed = np.sort(pd.unique(np.concatenate(parts))) if parts else np.zeros(0, dtype=np.int64)
+        values = list(vocabulary[dimension])
+        bounds = np.searchsorted(packed >> 32, np.arange(len(values) + 1))
+        rows = []
+        for i, value in enumerate(values):
+            bitmap = RoaringBitmap.from_codes(packed[bounds[i]:bounds[i + 1]] & 0xFFFFFFFF)
+            rows.append((entity, dimension, value, bitmap.cardinality(), bitmap.to_bytes()))
+        conn.executemany("INSERT INTO bitmap_index VALUES (?, ?, ?, ?, ?)", rows)
+        n_bitmaps += len(rows)
+    conn.commit()
+    return n_bitmaps
+
+
+# ============================================================================
+# QUERY
+# ============================================================================
+
+class BitmapIndex:
+    """Reads bitmap_index; bitmaps are loaded one dimension at a time and cached."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._bitmaps = {}
+        self._universe = {}
+        self._ids = {}
+        self._order_customers = None
+
+    def values(self, entity, dimension):
+        """{value: RoaringBitmap} for every value of a dimension."""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity {entity!r}; choose from {tuple(ENTITIES)}")
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Cannot filter on {dimension!r}; choose from {tuple(DIMENSIONS)}")
+        key = (entity, dimension)
+        if key not in self._bitmaps:
+            rows = self.conn.execute(
+                "SELECT value, bitmap FROM bitmap_index WHERE entity = ? AND dimension = ?", key).fetchall()
+            self._bitmaps[key] = {value: RoaringBitmap.from_bytes(blob) for value, blob in rows}
+        return self._bitmaps[key]
+
+    def bitmap(self, entity, dimension, value):
+        return self.values(entity, dimension).get(str(value), RoaringBitmap())
+
+    def universe(self, entity):
+        """Every customer or order."""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity {entity!r}; choose from {tuple(ENTITIES)}")
+        if entity not in self._universe:
+            n = self.conn.execute(f"SELECT COUNT(*) FROM bitmap_{entity}").fetchone()[0]
+            self._universe[entity] = RoaringBitmap.from_codes(np.arange(n))
+        return self._universe[entity]
+
+    def select(self, entity, filters=None, exclude=None, any_order=False):
+        """Bitmap of the entities matching filters (OR within a dimension, AND across).
+
+        Customers are those of the matching orders unless any_order is set.
+        """
+        if entity == 'customers' and not any_order:
+            return self.customers_of(self.select('orders', filters, exclude))
+        selected = [reduce(RoaringBitmap.__or__,
+                           [self.bitmap(entity, dimension, v) for v in _as_list(value)], RoaringBitmap())
+                    for dimension, value in (filters or {}).items()]
+        result = reduce(RoaringBitmap.__and__, selected) if selected else self.universe(entity)
+        for dimension, value in (exclude or {}).items():
+            for v in _as_list(value):
+                result = result - self.bitmap(entity, dimension, v)
+        return result
+
+    def count(self, entity, filters=None, exclude=None, any_order=False):
+        """Exact COUNT(DISTINCT ...) for a filter."""
+        return self.select(entity, filters, exclude, any_order).cardinality()
+
+    def counts_by(self, entity, dimension, filters=None, exclude=None, any_order=False):
+        """Distinct count per value of a dimension, within a filter."""
+        if entity == 'customers' and not any_order:
+            # Same dimension value and filter on one order, then its customers
+            base = self.select('orders', filters, exclude)
+            rows = [(value, self.customers_of(bitmap & base).cardinality())
+                    for value, bitmap in self.values('orders', dimension).items()]
+        else:
+            base = self.select(entity, filters, exclude, any_order)
+            rows = [(value, (bitmap & base).cardinality())
+                    for value, bitmap in self.values(entity, dimension).items()]
+        df = pd.DataFrame(rows, columns=[dimension, f"distinct_{entity}"])
+        return df.sort_values(f"distinct_{entity}", ascending=False, kind='stable').reset_index(drop=True)
+
+    def customers_of(self, orders):
+        """Customers who placed any of these orders."""
+        if self._order_customers is None:
+            rows = self.conn.execute("SELECT customer_code FROM bitmap_orders ORDER BY code")
+            self._order_customers = np.fromiter((c for (c,) in rows), dtype=np.int64)
+        return RoaringBitmap.from_codes(self._order_customers[orders.to_codes()])
+
+    def ids(self, entity, bitmap):
+        """The customer_id / order_id values in a bitmap."""
+        if entity not in self._ids:
+            id_column = ENTITIES[entity]
+            query = f"SELECT {id_column} FROM bitmap_{entity} ORDER BY code"
+            self._ids[entity] = np.array([i for (i,) in self.conn.execute(query)], dtype=object)
+        return self._ids[entity][bitmap.to_codes()].tolist()
+
+    def stats(self):
+        """Bitmaps, members and stored bytes per entity and dimension."""
+        query = """
+        SELECT entity, dimension, COUNT(*) AS bitmaps, SUM(cardinality) AS members,
+               SUM(LENGTH(bitmap)) AS bytes
+        FROM bitmap_index
+        GROUP BY entity, dimension
+        ORDER BY entity, dimension;
+        """
+        return pd.read_sql_query(query, self.conn)
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def parse_terms(terms):
+    """['region=West', 'category!=Furniture,Office Supplies'] -> (filters, exclude)."""
+    filters, exclude = {}, {}
+    for term in terms:
+        negate = '!=' in term
+        dimension, sep, values = term.partition('!=' if negate else '=')
+        if not sep or not values:
+            raise ValueError(f"Expected dimension=value[,value...] or dimension!=value, got {term!r}")
+        target = exclude if negate else filters
+        target.setdefault(dimension.strip(), []).extend(v.strip() for v in values.split(','))
+    return filters, exclude
+
+
+# ============================================================================
+# CHECK AGAINST SQLITE
+# ============================================================================
+
+# (entity, filters, exclude) combinations checked against SQL; customer rows
+# are checked both as customers of the matching orders and with any_order
+COMBINATIONS = [
+    ('customers', {'region': 'West', 'category': 'Technology'}, {}),
+    ('orders', {'region': 'West', 'category': 'Technology'}, {}),
+    ('orders', {'segment': ['Consumer', 'Corporate'], 'year': '2017'}, {}),
+    ('customers', {'state': ['California', 'New York'], 'sub_category': 'Phones'}, {}),
+    ('orders', {'region': ['East', 'Central'], 'ship_mode': 'First Class'}, {'category': 'Furniture'}),
+    ('customers', {'segment': 'Home Office'}, {'region': 'South'}),
+    ('orders', {'category': 'Furniture', 'sub_category': 'Phones'}, {}),
+]
+
+
+def sql_distinct(entity, filters=None, exclude=None, any_order=False):
+    """The same set in SQL: one SELECT DISTINCT per condition, INTERSECT / EXCEPT.
+
+    Customers are those of the matching orders unless any_order is set.
+    """
+    if entity == 'customers' and not any_order:
+        orders_sql, params = sql_distinct('orders', filters, exclude)
+        orders_sql = orders_sql.replace('SELECT COUNT(*) FROM ', '', 1)
+        return (f"SELECT COUNT(DISTINCT customer_id) FROM superstore WHERE order_id IN {orders_sql}",
+                params)
+    id_column = ENTITIES[entity]
+    parts, params = [], []
+    for dimension, value in (filters or {}).items():
+        values = _as_list(value)
+        parts.append(f"SELECT {id_column} FROM superstore WHERE {DIMENSIONS[dimension]} "
+                     f"IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    sql = ' INTERSECT '.join(parts) if parts else f"SELECT {id_column} FROM superstore"
+    for dimension, value in (exclude or {}).items():
+        values = _as_list(value)
+        sql += (f" EXCEPT SELECT {id_column} FROM superstore WHERE {DIMENSIONS[dimension]} "
+                f"IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    return f"SELECT COUNT(*) FROM ({sql})", params
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_check(conn):
+    index = BitmapIndex(conn)
+    rows = []
+    # Every single value: one GROUP BY per dimension
+    for entity, id_column in ENTITIES.items():
+        for dimension, expression in DIMENSIONS.items():
+            expected, sql_ms = _timed(lambda: dict(conn.execute(
+                f"SELECT {expression}, COUNT(DISTINCT {id_column}) FROM superstore GROUP BY 1").fetchall()))
+            actual, bitmap_ms = _timed(lambda: {v: b.cardinality() for v, b in index.values(entity, dimension).items()})
+            rows.append({'entity': entity, 'filter': f"by {dimension}", 'distinct': sum(actual.values()),
+                         'status': 'match' if {str(k): v for k, v in expected.items()} == actual else 'MISMATCH',
+                         'sql_ms': round(sql_ms, 2), 'bitmap_ms': round(bitmap_ms, 2)})
+    # AND / OR / NOT combinations
+    index.customers_of(RoaringBitmap())  # loads the order -> customer map once
+    for entity, filters, exclude in COMBINATIONS:
+        for any_order in ((False, True) if entity == 'customers' else (False,)):
+            sql, params = sql_distinct(entity, filters, exclude, any_order)
+            (expected,), sql_ms = _timed(lambda: conn.execute(sql, params).fetchone())
+            actual, bitmap_ms = _timed(index.count, entity, filters, exclude, any_order)
+            label = ' & '.join(f"{d}={'|'.join(_as_list(v))}" for d, v in filters.items())
+            label += ''.join(f" - {d}={'|'.join(_as_list(v))}" for d, v in exclude.items())
+            rows.append({'entity': entity + (' (any order)' if any_order else ''), 'filter': label,
+                         'distinct': actual, 'status': 'match' if expected == actual else 'MISMATCH',
+                         'sql_ms': round(sql_ms, 2), 'bitmap_ms': round(bitmap_ms, 2)})
+    # The default customer count is the plain WHERE ... AND ... count
+    filters = {'region': 'West', 'category': 'Technology'}
+    (expected,), sql_ms = _timed(lambda: conn.execute(
+        "SELECT COUNT(DISTINCT customer_id) FROM superstore WHERE region = ? AND category = ?",
+        ('West', 'Technology')).fetchone())
+    actual, bitmap_ms = _timed(index.count, 'customers', filters)
+    rows.append({'entity': 'customers', 'filter': 'region=West & category=Technology (WHERE ... AND ...)',
+                 'distinct': actual, 'status': 'match' if expected == actual else 'MISMATCH',
+                 'sql_ms': round(sql_ms, 2), 'bitmap_ms': round(bitmap_ms, 2)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distinct customer/order counts from bitmap indexes")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--build', action='store_true', help="(Re)build the bitmaps without a full reload")
+    parser.add_argument('--count', nargs='+', metavar=('ENTITY', 'TERM'),
+                        help="customers|orders then dimension=value[,value] or dimension!=value terms")
+    parser.add_argument('--by', help="With --count: break the count down by this dimension")
+    parser.add_argument('--any-order', action='store_true',
+                        help="With --count customers: each condition may be met by a different order")
+    parser.add_argument('--check', action='store_true', help="Compare every count with SQLite")
+    args = parser.parse_args()
+
+    if args.build:
+        conn = sqlite3.connect(args.db)
+        start = time.perf_counter()
+        n = build_bitmap_index(conn)
+        print(f"✅ bitmap_index: {n:,} bitmaps ({time.perf_counter() - start:.2f}s)")
+        print(BitmapIndex(conn).stats().to_string(index=False))
+        conn.close()
+        return
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    if args.count:
+        entity, terms = args.count[0], args.count[1:]
+        index = BitmapIndex(conn)
+        try:
+            filters, exclude = parse_terms(terms)
+            if args.by:
+                print(index.counts_by(entity, args.by, filters, exclude, args.any_order).to_string(index=False))
+            else:
+                count, ms = _timed(index.count, entity, filters, exclude, args.any_order)
+                print(f"{count:,} distinct {entity} ({ms:.2f} ms)")
+        except ValueError as exc:
+            parser.error(str(exc))
+    elif args.check:
+        print("="*80)
+        print("BITMAP DISTINCT COUNTS vs SQLITE")
+        print("="*80)
+        df_check = run_check(conn)
+        print(df_check.to_string(index=False))
+        matched = (df_check['status'] == 'match').sum()
+        print(f"\n✅ {matched}/{len(df_check)} distinct counts match SQLite")
+        if matched < len(df_check):
+            raise SystemExit(1)
+    else:
+        parser.print_help()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
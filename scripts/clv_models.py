@@ -0,0 +1,383 @@
+"""
+============================================================================
+FILE: clv_models.py
+PURPOSE: Predictive customer lifetime value (BG/NBD + Gamma-Gamma)
+AUTHOR: yusufehtesham29
+============================================================================
+
+BG/NBD models how often a customer buys and when they silently stop;
+Gamma-Gamma models how much each purchase is worth. Both are fitted on
+per-customer arrays:
+
+    frequency  repeat purchase days (distinct order days - 1)
+    recency    weeks between the first and the last purchase
+    T          weeks between the first purchase and the end of the data
+    monetary   average value of the repeat purchases
+
+Likelihoods are evaluated for all customers at once with NumPy, and
+customers sharing the same (frequency, recency, T) are evaluated once and
+weighted by their count, so fitting cost depends on the number of
+distinct histories rather than the number of customers. Parameters are
+found with a NumPy Nelder-Mead search (no scipy) over log-parameters
+measured against their natural scale (alpha against the mean tenure, v
+against the mean spend; q = 1 + e^theta so the mean spend exists). The
+search is bounded and ridge-penalized towards that scale; a fit that ends
+on a bound is rejected with ValueError, as is a sample with fewer than
+MIN_REPEAT_CUSTOMERS repeat buyers. Scoring runs in fixed-size chunks so
+memory stays bounded.
+"""
+
+import numpy as np
+import pandas as pd
+
+DAYS_PER_WEEK = 7.0
+DEFAULT_HORIZON_WEEKS = 52
+SCORE_CHUNK_SIZE = 1_000_000
+# Ridge penalty on the scaled log-parameters; keeps flat likelihoods from drifting off
+DEFAULT_PENALIZER = 0.01
+# Scaled log-parameters stay within +-LOG_PARAM_LIMIT; a fit this close to it is rejected
+LOG_PARAM_LIMIT = 10.0
+BOUND_MARGIN = 0.1
+# Fewer repeat buyers than this leaves Gamma-Gamma (and BG/NBD's dropout) unidentified
+MIN_REPEAT_CUSTOMERS = 20
+
+# Gauss hypergeometric series: stop once every term is this small
+HYP2F1_TOL = 1e-10
+HYP2F1_MAX_TERMS = 2000
+
+
+# ============================================================================
+# RFM SUMMARY
+# ============================================================================
+
+def load_rfm_summary(conn, value_col='sales', end_date=None, where=None, params=()):
+    """One row per customer with frequency, recency, T (weeks) and monetary.
+
+    `where` is an optional SQL predicate on superstore with `?` params;
+    T is then measured up to the last order day that matches it.
+    """
+    predicates, values = [], []
+    if end_date:
+        predicates.append("DATE(order_date) <= ?")
+        values.append(end_date)
+    if where:
+        predicates.append(f"({where})")
+        values.extend(params)
+    where_sql = f"WHERE {' AND '.join(predicates)}" if predicates else ""
+    end_sql = "?" if end_date else "(SELECT MAX(order_day) FROM purchases)"
+    if end_date:
+        values.append(end_date)
+    # One transaction per customer per order day; monetary skips the first purchase
+    query = f"""
+    WITH purchases AS (
+        SELECT
+            customer_id,
+            DATE(order_date) AS order_day,
+            SUM({value_col}) AS value
+        FROM superstore
+        {where_sql}
+        GROUP BY customer_id, order_day
+    ),
+    ranked AS (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY order_day) AS purchase_number
+        FROM purchases
+    )
+    SELECT
+        customer_id,
+        COUNT(*) - 1 AS frequency,
+        CAST(JULIANDAY(MAX(order_day)) - JULIANDAY(MIN(order_day)) AS INTEGER) AS recency_days,
+        CAST(JULIANDAY({end_sql}) - JULIANDAY(MIN(order_day)) AS INTEGER) AS age_days,
+        AVG(CASE WHEN purchase_number > 1 THEN value END) AS monetary
+    FROM ranked
+    GROUP BY customer_id;
+    """
+    summary = pd.read_sql_query(query, conn, params=values)
+    summary['recency'] = summary['recency_days'] / DAYS_PER_WEEK
+    summary['T'] = summary['age_days'] / DAYS_PER_WEEK
+    summary['monetary'] = summary['monetary'].fillna(0.0)
+    return summary[['customer_id', 'frequency', 'recency', 'T', 'monetary']]
+
+
+def _compress(*columns):
+    """Distinct rows of the given columns plus how many customers share each."""
+    stacked = np.column_stack(columns)
+    unique, inverse, counts = np.unique(stacked, axis=0, return_inverse=True, return_counts=True)
+    return unique.T, inverse.ravel(), counts
+
+
+# ============================================================================
+# NUMERICAL HELPERS (NumPy only)
+# ============================================================================
+
+_STIRLING = (1 / 12, -1 / 360, 1 / 1260, -1 / 1680)
+
+
+def _gammaln(x):
+    """log Gamma(x) for x > 0: recurrence up to x >= 7, then Stirling's series."""
+    x = np.asarray(x, dtype=float)
+    shift = np.zeros_like(x)
+    z = x.copy()
+    for _ in range(7):
+        small = z < 7
+        if not small.any():
+            break
+        shift = shift + np.where(small, np.log(np.where(small, z, 1.0)), 0.0)
+        z = np.where(small, z + 1, z)
+    inv = 1 / z
+    inv2 = inv * inv
+    series = inv * (_STIRLING[0] + inv2 * (_STIRLING[1] + inv2 * (_STIRLING[2] + inv2 * _STIRLING[3])))
+    return (z - 0.5) * np.log(z) - z + 0.5 * np.log(2 * np.pi) + series - shift
+
+
+def _hyp2f1(a, b, c, z):
+    """Gauss hypergeometric 2F1(a, b; c; z) for 0 <= z < 1, summed term by term."""
+    a, b, c, z = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, z)))
+    term = np.ones_like(z)
+    total = np.ones_like(z)
+    for k in range(HYP2F1_MAX_TERMS):
+        term = term * (a + k) * (b + k) / ((c + k) * (k + 1)) * z
+        total += term
+        if np.all(np.abs(term) <= HYP2F1_TOL * np.abs(total)):
+            break
+    return total
+
+
+def _nelder_mead(f, x0, max_iter=2000, tol=1e-8, step=0.5):
+    """Minimize f over R^n with the Nelder-Mead simplex method."""
+    n = len(x0)
+    simplex = np.vstack([x0, x0 + step * np.eye(n)])
+    values = np.array([f(x) for x in simplex])
+
+    for _ in range(max_iter):
+        order = np.argsort(values)
+        simplex, values = simplex[order], values[order]
+        if abs(values[-1] - values[0]) <= tol * (abs(values[0]) + tol):
+            break
+
+        centroid = simplex[:-1].mean(axis=0)
+        reflected = centroid + (centroid - simplex[-1])
+        f_reflected = f(reflected)
+        if f_reflected < values[0]:
+            expanded = centroid + 2 * (centroid - simplex[-1])
+            f_expanded = f(expanded)
+            if f_expanded < f_reflected:
+                simplex[-1], values[-1] = expanded, f_expanded
+            else:
+                simplex[-1], values[-1] = reflected, f_reflected
+        elif f_reflected < values[-2]:
+            simplex[-1], values[-1] = reflected, f_reflected
+        else:
+            contracted = centroid + 0.5 * (simplex[-1] - centroid)
+            f_contracted = f(contracted)
+            if f_contracted < values[-1]:
+                simplex[-1], values[-1] = contracted, f_contracted
+            else:
+                # Shrink everything towards the best point
+                simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+                values[1:] = [f(x) for x in simplex[1:]]
+
+    best = np.argmin(values)
+    return simplex[best], values[best]
+
+
+def _fit_scaled(neg_log_likelihood, n_params, penalizer, model):
+    """Minimize the mean negative log-likelihood over bounded scaled log-parameters.
+
+    Returns (theta, mean log-likelihood); raises ValueError when the optimum is on a bound.
+    """
+    def objective(theta):
+        if np.abs(theta).max() > LOG_PARAM_LIMIT:
+            return np.inf
+        value = neg_log_likelihood(theta) + penalizer * (theta ** 2).sum()
+        return value if np.isfinite(value) else np.inf
+
+    theta, _ = _nelder_mead(objective, np.zeros(n_params))
+    if np.abs(theta).max() >= LOG_PARAM_LIMIT - BOUND_MARGIN:
+        raise ValueError(f"{model} fit did not converge (a parameter ran to its bound); "
+                         f"the data do not identify the model - try a larger penalizer")
+    return theta, -neg_log_likelihood(theta)
+
+
+# ============================================================================
+# BG/NBD: PURCHASE FREQUENCY AND DROPOUT
+# ============================================================================
+
+def _bgnbd_log_likelihood(params, levels, index, recency, T):
+    """BG/NBD log-likelihood; frequency is given as distinct levels[index]."""
+    r, alpha, a, b = params
+    # Gamma-function terms only depend on the purchase count: evaluate once per count
+    x = levels
+    by_count = (_gammaln(r + x) - _gammaln(r) + r * np.log(alpha)
+                + _gammaln(a + b) + _gammaln(b + x) - _gammaln(b) - _gammaln(a + b + x))
+    dropout = np.log(a) - np.log(np.maximum(b + x - 1, 1e-300))
+
+    x = levels[index]
+    a3 = -(r + x) * np.log(alpha + T)
+    # Dropout after the last purchase is only possible once a repeat purchase happened
+    a4 = np.where(x > 0, dropout[index] - (r + x) * np.log(alpha + recency), -np.inf)
+    return by_count[index] + np.logaddexp(a3, a4)
+
+
+def bgnbd_log_likelihood(params, frequency, recency, T):
+    """Per-customer BG/NBD log-likelihood for params (r, alpha, a, b)."""
+    levels, index = np.unique(frequency, return_inverse=True)
+    return _bgnbd_log_likelihood(params, levels, index.ravel(), recency, T)
+
+
+def fit_bgnbd(frequency, recency, T, penalizer=DEFAULT_PENALIZER):
+    """Maximum-likelihood (r, alpha, a, b); returns (params, total log-likelihood)."""
+    (x, t_x, age), _, weights = _compress(frequency, recency, T)
+    levels, index = np.unique(x, return_inverse=True)
+    index = index.ravel()
+    # alpha is on the time scale of T
+    scale = np.array([1.0, max(np.average(age, weights=weights), 1.0), 1.0, 1.0])
+
+    def neg_log_likelihood(theta):
+        params = scale * np.exp(theta)
+        return -(_bgnbd_log_likelihood(params, levels, index, t_x, age) @ weights) / weights.sum()
+
+    theta, mean_ll = _fit_scaled(neg_log_likelihood, 4, penalizer, 'BG/NBD')
+    return scale * np.exp(theta), mean_ll * weights.sum()
+
+
+def probability_alive(params, frequency, recency, T):
+    """P(customer is still active | purchase history)."""
+    r, alpha, a, b = params
+    x = frequency
+    ratio = np.where(
+        x > 0,
+        a / np.maximum(b + x - 1, 1e-300) * ((alpha + T) / (alpha + recency)) ** (r + x),
+        0.0,
+    )
+    return 1 / (1 + ratio)
+
+
+def expected_purchases(params, frequency, recency, T, horizon):
+    """Expected repeat purchases in the next `horizon` weeks given the history."""
+    r, alpha, a, b = params
+    x = frequency
+    z = horizon / (alpha + T + horizon)
+    hyp = _hyp2f1(r + x, b + x, a + b + x - 1, z)
+    numerator = (a + b + x - 1) / (a - 1) * (1 - ((alpha + T) / (alpha + T + horizon)) ** (r + x) * hyp)
+    return numerator * probability_alive(params, x, recency, T)
+
+
+# ============================================================================
+# GAMMA-GAMMA: SPEND PER PURCHASE
+# ============================================================================
+
+def _gamma_gamma_log_likelihood(params, levels, index, monetary, log_monetary):
+    """Gamma-Gamma log-likelihood; frequency is given as distinct levels[index]."""
+    p, q, v = params
+    x = levels
+    by_count = (_gammaln(p * x + q) - _gammaln(p * x) - _gammaln(q) + q * np.log(v)
+                + p * x * np.log(x))
+    x = levels[index]
+    return by_count[index] + (p * x - 1) * log_monetary - (p * x + q) * np.log(x * monetary + v)
+
+
+def gamma_gamma_log_likelihood(params, frequency, monetary):
+    """Per-customer Gamma-Gamma log-likelihood for params (p, q, v); frequency > 0."""
+    levels, index = np.unique(frequency, return_inverse=True)
+    return _gamma_gamma_log_likelihood(params, levels, index.ravel(), monetary, np.log(monetary))
+
+
+def fit_gamma_gamma(frequency, monetary, penalizer=DEFAULT_PENALIZER):
+    """Maximum-likelihood (p, q, v) on repeat customers with positive spend; q > 1."""
+    keep = (frequency > 0) & (monetary > 0)
+    if keep.sum() < MIN_REPEAT_CUSTOMERS:
+        raise ValueError(f"only {keep.sum()} customers with a repeat purchase "
+                         f"(at least {MIN_REPEAT_CUSTOMERS} needed)")
+    (x, m), _, weights = _compress(frequency[keep], monetary[keep])
+    levels, index = np.unique(x, return_inverse=True)
+    index, log_m = index.ravel(), np.log(m)
+    # v is on the scale of the spend
+    mean_spend = np.average(m, weights=weights)
+
+    def params_of(theta):
+        return np.array([np.exp(theta[0]), 1 + np.exp(theta[1]), mean_spend * np.exp(theta[2])])
+
+    def neg_log_likelihood(theta):
+        ll = _gamma_gamma_log_likelihood(params_of(theta), levels, index, m, log_m) @ weights
+        return -ll / weights.sum()
+
+    theta, mean_ll = _fit_scaled(neg_log_likelihood, 3, penalizer, 'Gamma-Gamma')
+    return params_of(theta), mean_ll * weights.sum()
+
+
+def expected_spend(params, frequency, monetary):
+    """Expected value of a future purchase, shrunk towards the population mean."""
+    p, q, v = params
+    if q <= 1:
+        raise ValueError(f"Gamma-Gamma q must be > 1 for a finite mean spend, got {q}")
+    x = frequency
+    population_mean = p * v / (q - 1)
+    individual = p * (v + x * monetary) / (p * x + q - 1)
+    return np.where((x > 0) & (monetary > 0), individual, population_mean)
+
+
+# ============================================================================
+# FITTING AND SCORING
+# ============================================================================
+
+def fit_clv_models(summary, penalizer=DEFAULT_PENALIZER):
+    """Fit both models on an RFM summary; returns a dict of parameters.
+
+    Raises ValueError when the summary cannot support a fit (see the module docstring).
+    """
+    frequency = summary['frequency'].to_numpy(dtype=float)
+    # Checked first: without repeat buyers neither model is identified
+    gamma_gamma, gg_ll = fit_gamma_gamma(frequency, summary['monetary'].to_numpy(dtype=float),
+                                         penalizer)
+    bgnbd, bgnbd_ll = fit_bgnbd(frequency, summary['recency'].to_numpy(dtype=float),
+                                summary['T'].to_numpy(dtype=float), penalizer)
+    return {
+        'bgnbd': bgnbd,
+        'gamma_gamma': gamma_gamma,
+        'bgnbd_log_likelihood': bgnbd_ll,
+        'gamma_gamma_log_likelihood': gg_ll,
+    }
+
+
+def iter_clv_scores(summary, models, horizon=DEFAULT_HORIZON_WEEKS, chunk_size=SCORE_CHUNK_SIZE):
+    """Yield scored DataFrames of at most chunk_size customers."""
+    for start in range(0, len(summary), chunk_size):
+        chunk = summary.iloc[start:start + chunk_size]
+        frequency = chunk['frequency'].to_numpy(dtype=float)
+        recency = chunk['recency'].to_numpy(dtype=float)
+        T = chunk['T'].to_numpy(dtype=float)
+        monetary = chunk['monetary'].to_numpy(dtype=float)
+
+        # Purchases only depend on (frequency, recency, T): score each distinct history once
+        (x, t_x, age), inverse, _ = _compress(frequency, recency, T)
+        alive = probability_alive(models['bgnbd'], x, t_x, age)[inverse]
+        purchases = expected_purchases(models['bgnbd'], x, t_x, age, horizon)[inverse]
+        spend = expected_spend(models['gamma_gamma'], frequency, monetary)
+
+        yield pd.DataFrame({
+            'customer_id': chunk['customer_id'].to_numpy(),
+            'frequency': frequency.astype(int),
+            'recency_weeks': recency.round(2),
+            'tenure_weeks': T.round(2),
+            'probability_alive': alive.round(4),
+            'expected_purchases': purchases.round(3),
+            'expected_spend': spend.round(2),
+            'predicted_clv': (purchases * spend).round(2),
+        })
+
+
+def score_customers(summary, models, horizon=DEFAULT_HORIZON_WEEKS, chunk_size=SCORE_CHUNK_SIZE):
+    """Score every customer and return one DataFrame."""
+    return pd.concat(iter_clv_scores(summary, models, horizon, chunk_size), ignore_index=True)
+
+
+def write_clv(conn, summary, models, horizon=DEFAULT_HORIZON_WEEKS, chunk_size=SCORE_CHUNK_SIZE):
+    """Score chunk by chunk straight into the customer_clv table; returns rows written."""
+    conn.execute("DROP TABLE IF EXISTS customer_clv")
+    rows = 0
+    for scores in iter_clv_scores(summary, models, horizon, chunk_size):
+        scores.to_sql('customer_clv', conn, if_exists='append', index=False)
+        rows += len(scores)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_clv_value ON customer_clv(predicted_clv)")
+    conn.commit()
+    return rows
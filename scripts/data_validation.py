@@ -0,0 +1,150 @@
+"""
+============================================================================
+FILE: data_validation.py
+PURPOSE: Vectorized row validation with a quarantine table for bad rows
+AUTHOR: yusufehtesham29
+============================================================================
+
+Each rule is a vectorized check over a whole chunk (standardized column
+names, dates already as 'YYYY-MM-DD' text) returning a boolean mask of
+failing rows. Rows failing any rule are kept out of `superstore` and
+written to `superstore_quarantine` with a comma-separated reason code.
+
+RowValidator is stateful so it can be fed chunk by chunk: duplicate
+row_id detection and the per-rule counts span every chunk of a load.
+A row_id is taken by the first row with that id that passes every rule;
+a quarantined row does not take it.
+
+Date strings that parse_dates() could not read arrive as missing dates;
+the loaders pass the original strings as `unparsed`, so those rows fail
+bad_date (not missing_required) and keep their raw value in quarantine.
+"""
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['row_id', 'order_id', 'order_date', 'ship_date',
+                    'customer_id', 'product_id', 'sales', 'quantity']
+
+RULES = {
+    'missing_required': 'A required column (ids, dates, sales, quantity) is empty',
+    'bad_date': 'order_date or ship_date is not a recognizable date',
+    'non_positive_quantity': 'quantity <= 0',
+    'negative_sales': 'sales < 0',
+    'discount_out_of_range': 'discount outside 0-1',
+    'ship_before_order': 'ship_date earlier than order_date',
+    'invalid_row_id': 'row_id is not a whole number',
+    'duplicate_row_id': 'row_id already loaded',
+}
+
+
+def _rule_masks(df, unparsed):
+    """Failure mask per rule, except the row_id rules (see RowValidator)."""
+    present = [c for c in REQUIRED_COLUMNS if c in df.columns]
+    # Rows whose value in a column was present but could not be converted
+    failed_parse = {c: df.index.isin(values.index) for c, values in unparsed.items()}
+    missing = [df[c].isna().to_numpy() & ~failed_parse.get(c, False) for c in present]
+    return {
+        'missing_required': np.logical_or.reduce(missing),
+        'bad_date': np.logical_or.reduce([np.zeros(len(df), dtype=bool)] + list(failed_parse.values())),
+        'non_positive_quantity': (df['quantity'] <= 0).to_numpy(),
+        'negative_sales': (df['sales'] < 0).to_numpy(),
+        'discount_out_of_range': ((df['discount'] < 0) | (df['discount'] > 1)).to_numpy(),
+        # ISO dates compare correctly as strings
+        'ship_before_order': (df['ship_date'].fillna('') < df['order_date'].fillna('')).to_numpy()
+        & df['ship_date'].notna().to_numpy(),
+    }
+
+
+class RowValidator:
+    """Split chunks into valid and quarantined rows, counting failures per rule."""
+
+    def __init__(self):
+        # Seen row ids as sorted unique runs, each more than twice the size of the
+        # next: memory follows the number of ids, not their largest value
+        self.seen_runs = []
+        self.counts = dict.fromkeys(RULES, 0)
+        self.rows_checked = 0
+        self.rows_quarantined = 0
+
+    def _seen(self, ids):
+        found = np.zeros(len(ids), dtype=bool)
+        for run in self.seen_runs:
+            pos = np.minimum(np.searchsorted(run, ids), len(run) - 1)
+            found |= run[pos] == ids
+        return found
+
+    def _add_seen(self, ids):
+        run = np.unique(ids)
+        # Merge while the last run is not much bigger, so each id is re-merged O(log n) times
+        while self.seen_runs and len(self.seen_runs[-1]) <= 2 * len(run):
+            run = np.union1d(self.seen_runs.pop(), run)
+        if len(run):
+            self.seen_runs.append(run)
+
+    def mark_seen(self, row_ids):
+        """Register row ids that are already in the table (append loads)."""
+        self._add_seen(np.asarray(row_ids, dtype=np.int64))
+
+    def validate(self, df, unparsed=None):
+        """Return (valid rows, quarantined rows with a 'reason' column).
+
+        unparsed maps a date column to its original values that failed to
+        parse (date_parsing.unparsed_values), indexed like df.
+        """
+        unparsed = unparsed or {}
+        masks = _rule_masks(df, unparsed)
+
+        # Text, fractional or out-of-range ids would not survive the int64 cast below
+        row_ids = pd.to_numeric(df['row_id'], errors='coerce')
+        whole = ((row_ids % 1 == 0) & (row_ids.abs() < 2 ** 63)).to_numpy()
+        masks['invalid_row_id'] = df['row_id'].notna().to_numpy() & ~whole
+
+        failed = np.logical_or.reduce(list(masks.values()))
+
+        # Duplicates of a row loaded earlier or of an earlier valid row in this chunk.
+        # Only rows that pass every rule take their id, so a quarantined row does
+        # not block a corrected copy that arrives later.
+        ids = row_ids[whole].to_numpy(dtype=np.int64)
+        passed = ~failed[whole]
+        duplicate = self._seen(ids)
+        duplicate[passed] |= pd.Series(ids[passed]).duplicated(keep='first').to_numpy()
+        masks['duplicate_row_id'] = np.zeros(len(df), dtype=bool)
+        masks['duplicate_row_id'][whole] = duplicate
+        self._add_seen(ids[passed & ~duplicate])
+        failed |= masks['duplicate_row_id']
+
+        for rule, mask in masks.items():
+            self.counts[rule] += int(mask.sum())
+
+        self.rows_checked += len(df)
+        self.rows_quarantined += int(failed.sum())
+        if not failed.any():
+            return df, df.iloc[0:0].assign(reason=pd.Series(dtype=str))
+
+        # Reason codes only for the failing rows
+        bad = df[failed].copy()
+        reasons = np.full(len(bad), '', dtype=object)
+        for rule, mask in masks.items():
+            hit = mask[failed]
+            reasons[hit] = np.where(reasons[hit] == '', rule, reasons[hit] + ',' + rule)
+        bad['reason'] = reasons
+        # Quarantine shows what was in the file, not the missing parse result
+        for col, values in unparsed.items():
+            bad[col] = bad[col].astype(object)
+            bad.loc[values.index, col] = values
+        return df[~failed], bad
+
+    def report(self):
+        """Failure counts per rule as a DataFrame."""
+        return pd.DataFrame({
+            'rule': list(RULES),
+            'description': list(RULES.values()),
+            'failed_rows': [self.counts[r] for r in RULES],
+        })
+
+
+def write_quarantine(conn, quarantined, replace=False):
+    """Append (or replace) rows in superstore_quarantine."""
+    quarantined.to_sql('superstore_quarantine', conn, if_exists='replace' if replace else 'append',
+                       index=False)
@@ -0,0 +1,52 @@
+"""
+============================================================================
+FILE: derived_tables.py
+PURPOSE: Rebuild every table derived from superstore after a load
+AUTHOR: yusufehtesham29
+============================================================================
+
+Both loaders (01_database_setup.py and parallel_ingest.py) call
+refresh_derived_tables() once the fact table is in place, so the
+preview sample, rollups and sketches never drift from it. Tables a
+loader already maintained batch by batch (product_summary, and the
+sample on parallel_ingest --append) are passed in skip.
+"""
+
+import time
+
+from bitmap_index import build_bitmap_index
+from geo_hierarchy import build_geo_hierarchy
+from preview_sample import build_sample
+from product_summary import build_product_summary
+from shipping_sketches import build_shipping_sketches
+
+
+def _build_preview_sample(conn):
+    return len(build_sample(conn))
+
+
+# (table name, builder returning a row count), in build order
+DERIVED_TABLES = [
+    ('superstore_sample', _build_preview_sample),
+    ('geo_hierarchy', build_geo_hierarchy),
+    ('shipping_sketches', build_shipping_sketches),
+    ('product_summary', build_product_summary),
+    ('bitmap_index', build_bitmap_index),
+]
+
+
+def refresh_derived_tables(conn, verbose=True, skip=()):
+    """Rebuild all derived tables; returns {table: (rows, seconds)}.
+
+    Tables in skip were maintained incrementally during the load.
+    """
+    results = {}
+    for table, builder in DERIVED_TABLES:
+        if table in skip:
+            continue
+        start = time.perf_counter()
+        rows = builder(conn)
+        results[table] = (rows, time.perf_counter() - start)
+        if verbose:
+            print(f"   ✅ {table}: {rows:,} rows ({results[table][1]:.2f}s)")
+    return results
@@ -0,0 +1,349 @@
+"""
+============================================================================
+FILE: entity_store.py
+PURPOSE: Compact in-memory store for per-customer / per-product results
+AUTHOR: yusufehtesham29
+============================================================================
+
+A DataFrame of per-customer results keeps every name as a Python string
+object (~60 bytes each plus an 8-byte pointer) and a lookup by id means a
+scan or a separate index. EntityStore keeps the same table as:
+
+    strings   one shared StringTable for every text column: each distinct
+              value is stored once as UTF-8 in a single byte buffer
+    records   one NumPy structured array, a row per entity: text columns
+              hold int32 codes into the string table, metrics keep
+              their numeric dtype (or a smaller one passed in dtypes=)
+    index     an open-addressing hash table (int32 slots) from id to row,
+              so store.get(customer_id) is O(1)
+
+    customers = EntityStore.from_frame(df, 'customer_id', dtypes={'frequency': np.int32})
+    customers.get('CG-12520').predicted_clv
+    customers.top(20, 'predicted_clv')          # DataFrame for printing
+
+Ten million customers with a name, a segment and four metrics take
+roughly 0.6 GB this way (python scripts/entity_store.py --customers 10000000).
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Hash table slots per entity are kept at least 1 / MAX_LOAD
+MAX_LOAD = 0.7
+
+
+# ============================================================================
+# STRING TABLE
+# ============================================================================
+
+class StringTable:
+    """Distinct strings stored once: code -> value via one byte buffer and offsets."""
+
+    __slots__ = ('buffer', 'offsets')
+
+    def __init__(self, values=()):
+        encoded = [str(v).encode('utf-8') for v in values]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        self.buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # 4-byte offsets while the buffer is under 4 GB
+        self.offsets = offsets.astype(np.uint32) if offsets[-1] < 2**32 else offsets
+
+    @classmethod
+    def encode(cls, *columns):
+        """Factorize the columns together; returns (table, [int32 codes per column]).
+
+        Missing values get code -1.
+        """
+        if not columns:
+            return cls(), []
+        sizes = [len(column) for column in columns]
+        combined = np.concatenate([np.asarray(column, dtype=object) for column in columns])
+        codes, uniques = pd.factorize(combined, use_na_sentinel=True)
+        codes = codes.astype(np.int32)
+        return cls(uniques), np.split(codes, np.cumsum(sizes)[:-1])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code):
+        if code < 0:
+            return None
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return self.buffer[start:end].tobytes().decode('utf-8')
+
+    def take(self, codes):
+        """Object array of the strings for many codes."""
+        return np.array([self[code] for code in codes], dtype=object)
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+
+# ============================================================================
+# HASH INDEX
+# ============================================================================
+
+def _hash(keys):
+    # Same hash for a key whether it arrives in a column or on its own
+    return pd.util.hash_array(np.asarray(keys, dtype=object), categorize=False)
+
+
+def _capacity(n):
+    return 1 << max(3, (int(np.ceil(n / MAX_LOAD)) - 1).bit_length())
+
+
+def _build_slots(hashes):
+    """Linear-probing slot table: slots[h & mask] -> row, -1 for empty.
+
+    Rows are placed in rounds, vectorized: every unplaced row tries its
+    current slot, the first row per free slot wins and the rest move on.
+    """
+    slots = np.full(_capacity(len(hashes)), -1, dtype=np.int32)
+    mask = np.uint64(len(slots) - 1)
+    pending = np.arange(len(hashes), dtype=np.int32)
+    position = (hashes & mask).astype(np.int64)
+    while pending.size:
+        free = np.flatnonzero(slots[position] == -1)
+        _, first = np.unique(position[free], return_index=True)
+        winners = free[first]
+        slots[position[winners]] = pending[winners]
+        placed = np.zeros(pending.size, dtype=bool)
+        placed[winners] = True
+        pending = pending[~placed]
+        position = (position[~placed] + 1) & int(mask)
+    return slots
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class EntityRecord:
+    """One row of a store; columns read as attributes (record.customer_name)."""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._store.value(self._row, name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._store.value(self._row, name)
+
+    def as_dict(self):
+        return {name: self._store.value(self._row, name) for name in self._store.columns}
+
+    def __repr__(self):
+        return f"EntityRecord({self.as_dict()!r})"
+
+
+class EntityStore:
+    """Per-entity results: shared string table + structured array + id index."""
+
+    __slots__ = ('id_column', 'strings', 'records', 'text_columns', '_slots')
+
+    def __init__(self, id_column, strings, records, text_columns, ids=None):
+        self.id_column = id_column
+        self.strings = strings
+        self.records = records
+        self.text_columns = frozenset(text_columns)
+        # ids: the id values when the caller still has them, saves decoding them again
+        ids = self.column(id_column) if ids is None else np.asarray(ids, dtype=object)
+        if pd.isna(ids).any() or not pd.Index(ids).is_unique:
+            raise ValueError(f"{id_column} must be unique and non-null to index the store")
+        self._slots = _build_slots(_hash(ids))
+
+    @classmethod
+    def from_frame(cls, df, id_column, dtypes=None):
+        """Store for a DataFrame with one row per id; text columns become codes.
+
+        dtypes maps metric columns to a narrower dtype (np.int32, np.float32).
+        """
+        dtypes = dtypes or {}
+        text_columns = [c for c in df.columns
+                        if not (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))]
+        strings, codes = StringTable.encode(*(df[c].to_numpy() for c in text_columns))
+        codes = dict(zip(text_columns, codes))
+
+        fields = [(c, np.int32 if c in codes else np.dtype(dtypes.get(c, df[c].dtype)))
+                  for c in df.columns]
+        records = np.empty(len(df), dtype=fields)
+        for c in df.columns:
+            records[c] = codes[c] if c in codes else df[c].to_numpy()
+        return cls(id_column, strings, records, text_columns, ids=df[id_column].to_numpy())
+
+    @property
+    def columns(self):
+        return self.records.dtype.names
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return self.rows([key])[0] >= 0
+
+    @property
+    def nbytes(self):
+        return self.strings.nbytes + self.records.nbytes + self._slots.nbytes
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def rows(self, keys):
+        """Row number for each key (-1 when absent), probing all keys at once."""
+        keys = np.asarray(keys, dtype=object)
+        result = np.full(len(keys), -1, dtype=np.int64)
+        if not len(keys):
+            return result
+        mask = len(self._slots) - 1
+        stored = self.records[self.id_column]
+        pending = np.arange(len(keys))
+        position = (_hash(keys) & np.uint64(mask)).astype(np.int64)
+        while pending.size:
+            row = self._slots[position]
+            occupied = row >= 0
+            if self.id_column in self.text_columns:
+                candidates = self.strings.take(stored[row[occupied]])
+            else:
+                candidates = stored[row[occupied]]
+            hit = np.zeros(pending.size, dtype=bool)
+            hit[occupied] = candidates == keys[pending[occupied]]
+            result[pending[hit]] = row[hit]
+            # An empty slot ends the probe: the key is not in the store
+            keep = occupied & ~hit
+            pending = pending[keep]
+            position = (position[keep] + 1) & mask
+        return result
+
+    def get(self, key, default=None):
+        """O(1) lookup by id; returns an EntityRecord or default."""
+        row = self.rows([key])[0]
+        return EntityRecord(self, int(row)) if row >= 0 else default
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    # ------------------------------------------------------------------
+    # Column access
+    # ------------------------------------------------------------------
+
+    def value(self, row, name):
+        value = self.records[name][row]
+        return self.strings[value] if name in self.text_columns else value.item()
+
+    def column(self, name):
+        """Metric columns as a NumPy view; text columns decoded to an object array."""
+        if name in self.text_columns:
+            return self.strings.take(self.records[name])
+        return self.records[name]
+
+    def to_frame(self, rows=None, columns=None):
+        """DataFrame of the selected rows (all by default), strings decoded."""
+        records = self.records if rows is None else self.records[np.asarray(rows)]
+        columns = columns or self.columns
+        return pd.DataFrame({
+            c: self.strings.take(records[c]) if c in self.text_columns else records[c]
+            for c in columns
+        })
+
+    def top_rows(self, n, column, ascending=False):
+        """Rows of the n largest (or smallest) values, in order; ties by row."""
+        values = self.records[column]
+        order = values if ascending else -values.astype(np.float64)
+        n = min(n, len(values))
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(order, n - 1)[:n] if n < len(values) else np.arange(len(values))
+        # Pull in every row tied with the cut-off, then sort stably by (value, row)
+        cutoff = order[candidates].max()
+        candidates = np.union1d(candidates, np.flatnonzero(order == cutoff))
+        return candidates[np.lexsort((candidates, order[candidates]))][:n]
+
+    def top(self, n, column, ascending=False, columns=None):
+        return self.to_frame(self.top_rows(n, column, ascending), columns)
+
+
+# ============================================================================
+# MEMORY BENCHMARK
+# ============================================================================
+
+def synthetic_customers(n, seed=0):
+    """Customer stats shaped like the report's: id, name, segment, four metrics."""
+    rng = np.random.default_rng(seed)
+    first = np.array(['Aaron', 'Claire', 'Dan', 'Erin', 'Hunter', 'Julie', 'Ken', 'Laura',
+                      'Maria', 'Nick', 'Pete', 'Rose', 'Sean', 'Tamara', 'Vivek', 'Zuschuss'], dtype=object)
+    last = np.array([f"{a}{b}" for a in ('Bar', 'Cor', 'Dun', 'Gil', 'Har', 'Mor', 'Sta', 'Wel')
+                     for b in ('ton', 'ley', 'son', 'man', 'ford', 'well', 'by', 'ner')], dtype=object)
+    names = first[rng.integers(0, len(first), n)] + ' ' + last[rng.integers(0, len(last), n)]
+    return pd.DataFrame({
+        'customer_id': pd.Index(np.arange(n)).map(lambda i: f"CU-{i:08d}").to_numpy(dtype=object),
+        'customer_name': names,
+        'segment': np.array(['Consumer', 'Corporate', 'Home Office'], dtype=object)[rng.integers(0, 3, n)],
+        'total_orders': rng.integers(1, 40, n),
+        'lifetime_value': rng.gamma(2.0, 1500.0, n).round(2),
+        'lifetime_profit': rng.normal(250.0, 400.0, n).round(2),
+        'probability_alive': rng.random(n),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of per-customer results: DataFrame vs EntityStore")
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print("="*80)
+    print(f"ENTITY STORE: {args.customers:,} customers")
+    print("="*80)
+
+    df = synthetic_customers(args.customers)
+    frame_bytes = df.memory_usage(deep=True).sum()
+
+    start = time.perf_counter()
+    store = EntityStore.from_frame(df, 'customer_id',
+                                   dtypes={'total_orders': np.int32, 'probability_alive': np.float32})
+    build_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    keys = df['customer_id'].to_numpy()[rng.integers(0, len(df), args.lookups)]
+    start = time.perf_counter()
+    rows = store.rows(keys)
+    batch_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys[:1000]:
+        store.get(key)
+    single_seconds = (time.perf_counter() - start) / min(1000, len(keys))
+    if not (store.column('customer_id')[rows] == keys).all():
+        raise SystemExit("❌ lookup returned the wrong rows")
+
+    print(f"\n   DataFrame (object strings): {frame_bytes / 1e6:,.1f} MB")
+    print(f"   EntityStore:                {store.nbytes / 1e6:,.1f} MB "
+          f"(strings {store.strings.nbytes / 1e6:,.1f}, records {store.records.nbytes / 1e6:,.1f}, "
+          f"index {store._slots.nbytes / 1e6:,.1f})")
+    print(f"   Distinct strings: {len(store.strings):,}")
+    print(f"\n⏱️  Build: {build_seconds:.2f}s")
+    print(f"   Batched lookups: {args.lookups / batch_seconds:,.0f}/s")
+    print(f"   Single get(): {single_seconds * 1e6:.1f} µs")
+    print(f"\n✅ {store.get(keys[0])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+============================================================================
+FILE: forecasting.py
+PURPOSE: Batched Holt-Winters forecasts for every region x category x segment
+AUTHOR: yusufehtesham29
+============================================================================
+
+All series are stacked into one (series x month) matrix and the additive
+Holt-Winters recursion runs over the time axis only, so each step updates
+every series (and every candidate smoothing parameter set) at once with
+NumPy. Large batches of series are split across a process pool.
+
+Prediction intervals use the one-step residual variance of the chosen
+model, widened per horizon with the standard additive Holt-Winters
+variance multipliers. Month bounds cannot be added up into a bound for
+a total: forecast_totals() fits the aggregated series itself and takes
+the variance of the summed forecast errors, which share shocks across
+months (a shock at step k moves every later step by c_j).
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SEASON_LENGTH = 12
+DEFAULT_DIMENSIONS = ('region', 'category', 'segment')
+
+# Candidate smoothing parameters searched for every series
+ALPHA_GRID = (0.1, 0.2, 0.4, 0.6)
+BETA_GRID = (0.01, 0.05, 0.15)
+GAMMA_GRID = (0.05, 0.2, 0.4)
+
+# Below this many series the pool start-up costs more than it saves
+MIN_SERIES_PER_WORKER = 64
+
+
+def load_monthly_series(conn, dimensions=DEFAULT_DIMENSIONS, value_col='sales'):
+    """Return (series keys, month labels, dense series x month matrix).
+
+    No dimensions gives the single grand-total series (keys has one row, no columns).
+    """
+    dimensions = list(dimensions)
+    group_sql = ', '.join(dimensions + ['year_month'])
+    query = f"""
+    SELECT
+        {''.join(f"{d}, " for d in dimensions)}
+        strftime('%Y-%m', order_date) AS year_month,
+        SUM({value_col}) AS value
+    FROM superstore
+    GROUP BY {group_sql}
+    ORDER BY {group_sql};
+    """
+    df = pd.read_sql_query(query, conn)
+
+    months = pd.period_range(df['year_month'].min(), df['year_month'].max(), freq='M')
+    if not dimensions:
+        totals = df.set_index('year_month')['value'].reindex(months.astype(str), fill_value=0.0)
+        return pd.DataFrame(index=[0]), months, totals.to_numpy(dtype=float)[None, :]
+    matrix = df.pivot_table(index=dimensions, columns='year_month', values='value',
+                            aggfunc='sum', fill_value=0.0)
+    matrix = matrix.reindex(columns=months.astype(str), fill_value=0.0)
+    keys = matrix.index.to_frame(index=False)
+    return keys, months, matrix.to_numpy(dtype=float)
+
+
+def _holt_winters(Y, alpha, beta, gamma, season=SEASON_LENGTH):
+    """Run additive Holt-Winters over every row of Y with per-row parameters.
+
+    Returns the final level, trend, seasonal state and one-step residuals.
+    """
+    n_series, n_periods = Y.shape
+    level = Y[:, :season].mean(axis=1)
+    trend = (Y[:, season:2 * season].mean(axis=1) - level) / season
+    seasonal = Y[:, :season] - level[:, None]
+    residuals = np.empty_like(Y)
+
+    for t in range(n_periods):
+        s_idx = t % season
+        s_prev = seasonal[:, s_idx]
+        y = Y[:, t]
+        residuals[:, t] = y - (level + trend + s_prev)
+        new_level = alpha * (y - s_prev) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        seasonal[:, s_idx] = gamma * (y - new_level) + (1 - gamma) * s_prev
+        level = new_level
+
+    return level, trend, seasonal, residuals
+
+
+def _fit_batch(args):
+    """Grid-search smoothing parameters for a batch of series and forecast."""
+    Y, horizon, z_score, season = args
+    n_series, n_periods = Y.shape
+    grid = np.array(list(itertools.product(ALPHA_GRID, BETA_GRID, GAMMA_GRID)))
+    n_grid = len(grid)
+
+    # Every (series, parameter set) pair becomes one row of a single batch
+    Y_tiled = np.repeat(Y, n_grid, axis=0)
+    alpha = np.tile(grid[:, 0], n_series)
+    beta = np.tile(grid[:, 1], n_series)
+    gamma = np.tile(grid[:, 2], n_series)
+    level, trend, seasonal, residuals = _holt_winters(Y_tiled, alpha, beta, gamma, season)
+
+    # Score on the periods after the initialisation season
+    sse = (residuals[:, season:] ** 2).sum(axis=1).reshape(n_series, n_grid)
+    best = n_grid * np.arange(n_series) + sse.argmin(axis=1)
+
+    alpha, beta, gamma = alpha[best], beta[best], gamma[best]
+    level, trend, seasonal = level[best], trend[best], seasonal[best]
+    sigma = np.sqrt(sse.min(axis=1) / max(n_periods - season, 1))
+
+    steps = np.arange(1, horizon + 1)
+    season_idx = (n_periods + steps - 1) % season
+    forecast = level[:, None] + steps[None, :] * trend[:, None] + seasonal[:, season_idx]
+
+    # Variance multiplier: 1 + sum_{j<h} c_j^2, c_j = alpha(1 + j*beta) + gamma(1-alpha)[j % m == 0]
+    j = np.arange(1, horizon)
+    c = (alpha[:, None] * (1 + j[None, :] * beta[:, None])
+         + gamma[:, None] * (1 - alpha[:, None]) * (j[None, :] % season == 0))
+    variance = 1 + np.concatenate([np.zeros((n_series, 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    half_width = z_score * sigma[:, None] * np.sqrt(variance)
+
+    # Sum of the horizon: error = sum_k e_k * (1 + C_{H-k}), C_m = c_1 + ... + c_m
+    cumulative = np.concatenate([np.zeros((n_series, 1)), np.cumsum(c, axis=1)], axis=1)
+    total_half_width = z_score * sigma * np.sqrt(((1 + cumulative[:, ::-1]) ** 2).sum(axis=1))
+    total = forecast.sum(axis=1)
+
+    return {
+        'forecast': forecast,
+        'lower': forecast - half_width,
+        'upper': forecast + half_width,
+        'total': total,
+        'total_lower': total - total_half_width,
+        'total_upper': total + total_half_width,
+        'alpha': alpha,
+        'beta': beta,
+        'gamma': gamma,
+        'rmse': sigma,
+    }
+
+
+def fit_forecasts(Y, horizon=12, z_score=1.96, season=SEASON_LENGTH, workers=None):
+    """Fit every row of Y, splitting large batches across a process pool."""
+    if Y.shape[1] < 2 * season:
+        raise ValueError(f"Need at least {2 * season} periods to fit a seasonal model, got {Y.shape[1]}")
+
+    workers = workers or os.cpu_count() or 1
+    n_batches = min(workers, max(1, len(Y) // MIN_SERIES_PER_WORKER))
+    batches = [(chunk, horizon, z_score, season) for chunk in np.array_split(Y, n_batches)]
+
+    if n_batches == 1:
+        results = [_fit_batch(batches[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=n_batches) as pool:
+            results = list(pool.map(_fit_batch, batches))
+
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def build_forecasts(conn, dimensions=DEFAULT_DIMENSIONS, value_col='sales', horizon=12,
+                    z_score=1.96, workers=None):
+    """Forecast every dimension slice and return one row per (slice, month)."""
+    keys, months, Y = load_monthly_series(conn, dimensions, value_col)
+    fitted = fit_forecasts(Y, horizon=horizon, z_score=z_score, workers=workers)
+
+    n_series = len(keys)
+    future = pd.period_range(months[-1] + 1, periods=horizon, freq='M').astype(str)
+    forecasts = keys.loc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+    forecasts['year_month'] = np.tile(future, n_series)
+    forecasts['horizon'] = np.tile(np.arange(1, horizon + 1), n_series)
+
+    # Sales cannot go negative; profit can
+    point, lower, upper = fitted['forecast'], fitted['lower'], fitted['upper']
+    if value_col != 'profit':
+        point, lower, upper = (np.maximum(a, 0) for a in (point, lower, upper))
+
+    forecasts['metric'] = value_col
+    forecasts['forecast'] = point.ravel().round(2)
+    forecasts['lower_bound'] = lower.ravel().round(2)
+    forecasts['upper_bound'] = upper.ravel().round(2)
+    for param in ('alpha', 'beta', 'gamma', 'rmse'):
+        forecasts[param] = np.repeat(fitted[param], horizon).round(4)
+    return forecasts
+
+
+def forecast_totals(conn, dimensions=('region',), value_col='sales', horizon=12, z_score=1.96, workers=None):
+    """Total of the next `horizon` months per slice, with its own prediction interval.
+
+    The slice's aggregated monthly series is fitted directly (not summed
+    from finer series), so the bounds are a real interval for the total.
+    """
+    keys, months, Y = load_monthly_series(conn, dimensions, value_col)
+    fitted = fit_forecasts(Y, horizon=horizon, z_score=z_score, workers=workers)
+
+    totals = keys.copy()
+    point, lower, upper = fitted['total'], fitted['total_lower'], fitted['total_upper']
+    if value_col != 'profit':
+        point, lower, upper = (np.maximum(a, 0) for a in (point, lower, upper))
+    totals['forecast'] = point.round(2)
+    totals['lower_bound'] = lower.round(2)
+    totals['upper_bound'] = upper.round(2)
+    return totals
+
+
+def write_forecasts(conn, forecasts):
+    """Replace the forecasts table with the latest run."""
+    forecasts.to_sql('forecasts', conn, if_exists='replace', index=False)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_forecasts_month ON forecasts(year_month)")
+    conn.commit()
@@ -0,0 +1,176 @@
+"""
+============================================================================
+FILE: geo_hierarchy.py
+PURPOSE: Pre-aggregated geography rollup for constant-time drill-down
+AUTHOR: yusufehtesham29
+============================================================================
+
+Hierarchy: country -> region -> state -> city -> postal_code
+
+At load time every node of the hierarchy gets one row in `geo_hierarchy`
+with its totals, keyed by its full path ('United States|West|California').
+Paths sort depth-first, so a node's whole subtree is one contiguous range
+of the primary key. Drill-down reads a node's children through the
+parent_path index and never touches the fact table, so its cost depends
+on the number of children, not on the number of line items.
+"""
+
+import pandas as pd
+
+LEVELS = ['country', 'region', 'state', 'city', 'postal_code']
+SEPARATOR = '|'
+# First character after SEPARATOR, used as the exclusive end of a subtree range
+SEPARATOR_NEXT = chr(ord(SEPARATOR) + 1)
+
+
+def make_path(*names):
+    return SEPARATOR.join(str(n) for n in names)
+
+
+def build_geo_hierarchy(conn):
+    """Rebuild geo_hierarchy from superstore; returns the number of nodes."""
+    levels_sql = ', '.join(LEVELS)
+    # One scan: leaf x order keeps exact distinct order/customer counts at every level
+    query = f"""
+    SELECT
+        {levels_sql},
+        order_id,
+        customer_id,
+        SUM(sales) AS sales,
+        SUM(profit) AS profit,
+        SUM(quantity) AS quantity,
+        COUNT(*) AS line_items
+    FROM superstore
+    GROUP BY {levels_sql}, order_id, customer_id;
+    """
+    leaf = pd.read_sql_query(query, conn)
+    leaf[LEVELS] = leaf[LEVELS].astype(str)
+
+    nodes = []
+    for depth, level in enumerate(LEVELS):
+        keys = LEVELS[:depth + 1]
+        agg = leaf.groupby(keys, sort=False).agg(
+            total_sales=('sales', 'sum'),
+            total_profit=('profit', 'sum'),
+            total_quantity=('quantity', 'sum'),
+            line_items=('line_items', 'sum'),
+            orders=('order_id', 'nunique'),
+            customers=('customer_id', 'nunique'),
+        ).reset_index()
+        agg['path'] = agg[keys].agg(SEPARATOR.join, axis=1)
+        agg['parent_path'] = agg[keys[:-1]].agg(SEPARATOR.join, axis=1) if depth else ''
+        agg['level'] = level
+        agg['depth'] = depth
+        agg['name'] = agg[level]
+        nodes.append(agg[['path', 'parent_path', 'level', 'depth', 'name', 'total_sales',
+                          'total_profit', 'total_quantity', 'line_items', 'orders', 'customers']])
+
+    hierarchy = pd.concat(nodes, ignore_index=True)
+    conn.execute("DROP TABLE IF EXISTS geo_hierarchy")
+    conn.execute("""
+    CREATE TABLE geo_hierarchy (
+        path TEXT PRIMARY KEY,
+        parent_path TEXT NOT NULL,
+        level TEXT NOT NULL,
+        depth INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        total_sales REAL,
+        total_profit REAL,
+        total_quantity INTEGER,
+        line_items INTEGER,
+        orders INTEGER,
+        customers INTEGER
+    )""")
+    hierarchy.to_sql('geo_hierarchy', conn, if_exists='append', index=False)
+    conn.execute("CREATE INDEX idx_geo_parent ON geo_hierarchy(parent_path, total_sales)")
+    conn.commit()
+    return len(hierarchy)
+
+
+_NODE_COLUMNS = """
+    name, level, path, total_sales, total_profit,
+    ROUND(total_profit / total_sales * 100, 2) AS profit_margin_percent,
+    total_quantity, line_items, orders, customers
+"""
+
+
+def drill_down(conn, *path, limit=None):
+    """Children of a node, largest sales first.
+
+    drill_down(conn) lists countries; drill_down(conn, 'United States', 'West')
+    lists the states in the West region.
+    """
+    limit_sql = f"LIMIT {int(limit)}" if limit else ''
+    query = f"""
+    SELECT {_NODE_COLUMNS}
+    FROM geo_hierarchy
+    WHERE parent_path = ?
+    ORDER BY total_sales DESC
+    {limit_sql};
+    """
+    return pd.read_sql_query(query, conn, params=(make_path(*path),))
+
+
+def node(conn, *path):
+    """Totals for a single node."""
+    query = f"SELECT {_NODE_COLUMNS} FROM geo_hierarchy WHERE path = ?"
+    return pd.read_sql_query(query, conn, params=(make_path(*path),))
+
+
+def level_totals(conn, level, *within, order_by='total_sales', limit=None):
+    """All nodes at `level` inside the subtree `within` (a primary-key range scan).
+
+    level_totals(conn, 'city', 'United States', 'West') -> every city in the West.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"level must be one of {LEVELS}, got {level!r}")
+    if order_by not in ('total_sales', 'total_profit', 'orders', 'customers', 'line_items'):
+        raise ValueError(f"Cannot order by {order_by!r}")
+
+    prefix = make_path(*within)
+    limit_sql = f"LIMIT {int(limit)}" if limit else ''
+    where = "depth = ?"
+    params = [LEVELS.index(level)]
+    if within:
+        where += " AND path > ? AND path < ?"
+        params += [prefix + SEPARATOR, prefix + SEPARATOR_NEXT]
+    query = f"""
+    SELECT {_NODE_COLUMNS}
+    FROM geo_hierarchy
+    WHERE {where}
+    ORDER BY {order_by} DESC
+    {limit_sql};
+    """
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def drill_down_query(*path, limit=None):
+    """(sql, params) listing the children of a node straight from superstore.
+
+    Same columns as drill_down(). The rollup only holds all-time totals, so
+    reports restricted to a date range or segment use this query instead
+    (with the filter pushed down into its FROM superstore).
+    """
+    if len(path) >= len(LEVELS):
+        raise ValueError(f"{make_path(*path)!r} is a leaf node")
+    child = LEVELS[len(path)]
+    where = ' AND '.join(f"{level} = :_geo_{i}" for i, level in enumerate(LEVELS[:len(path)]))
+    limit_sql = f"LIMIT {int(limit)}" if limit else ''
+    query = f"""
+    SELECT
+        CAST({child} AS TEXT) AS name,
+        '{child}' AS level,
+        SUM(sales) AS total_sales,
+        SUM(profit) AS total_profit,
+        ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent,
+        SUM(quantity) AS total_quantity,
+        COUNT(*) AS line_items,
+        COUNT(DISTINCT order_id) AS orders,
+        COUNT(DISTINCT customer_id) AS customers
+    FROM superstore
+    {'WHERE ' + where if where else ''}
+    GROUP BY {child}
+    ORDER BY total_sales DESC
+    {limit_sql};
+    """
+    return query, {f'_geo_{i}': str(name) for i, name in enumerate(path)}
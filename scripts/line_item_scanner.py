@@ -0,0 +1,240 @@
+"""
+============================================================================
+FILE: line_item_scanner.py
+PURPOSE: Flag individual loss-driving line items in one streaming pass
+AUTHOR: yusufehtesham29
+============================================================================
+
+The reports find loss-makers per product or sub-category; this scanner
+names the individual line items (order_id + product_id) behind them.
+superstore is read once, in fixed-size chunks, and every rule is a NumPy
+expression over the whole chunk:
+
+    FLAG_NEGATIVE_PROFIT  profit < 0
+    FLAG_LOW_MARGIN       profit / sales below MARGIN_THRESHOLD
+    FLAG_DEEP_DISCOUNT    discount above DISCOUNT_BAND
+    FLAG_PROFIT_OUTLIER   |robust z| of profit within its sub_category
+                          above Z_THRESHOLD
+
+The robust z-score is (profit - median) / (IQR / 1.349), the median and
+IQR coming from one fixed-bin histogram per sub_category (bins on
+sign(p) * log1p(|p|), so cents and six-figure amounts both resolve to
+about 1%). A chunk is scored against the histograms of every row seen
+so far including itself; rows of a sub_category with fewer than
+MIN_HISTORY rows yet wait in a small buffer (at most MIN_HISTORY rows
+per sub_category) and are scored when it fills or at the end. Memory is
+one chunk plus the histograms, whatever the table size.
+
+Flagged rows go to `line_item_flags` (flags is a bit mask), indexed on
+flags, profit, order_id and (sub_category, profit).
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 250_000
+MARGIN_THRESHOLD = -0.5
+DISCOUNT_BAND = 0.4
+Z_THRESHOLD = 3.5
+MIN_HISTORY = 200
+
+FLAG_NEGATIVE_PROFIT = 1
+FLAG_LOW_MARGIN = 2
+FLAG_DEEP_DISCOUNT = 4
+FLAG_PROFIT_OUTLIER = 8
+FLAG_NAMES = {
+    FLAG_NEGATIVE_PROFIT: 'negative_profit',
+    FLAG_LOW_MARGIN: 'low_margin',
+    FLAG_DEEP_DISCOUNT: 'deep_discount',
+    FLAG_PROFIT_OUTLIER: 'profit_outlier',
+}
+
+# Histogram over t = sign(p) * log1p(|p|): |p| up to ~$10M in 0.01-wide bins
+HIST_LIMIT = np.log1p(1e7)
+HIST_BINS = 3200
+IQR_TO_STD = 1.349
+
+_COLUMNS = ['order_id', 'order_date', 'product_id', 'sub_category', 'sales', 'discount', 'profit']
+_OUTPUT_COLUMNS = ['line_rowid', 'row_id'] + _COLUMNS + ['margin', 'profit_z', 'flags']
+
+
+def create_table(conn):
+    conn.execute("DROP TABLE IF EXISTS line_item_flags")
+    conn.execute("""
+    CREATE TABLE line_item_flags (
+        line_rowid INTEGER PRIMARY KEY,
+        row_id INTEGER,
+        order_id TEXT,
+        order_date TEXT,
+        product_id TEXT,
+        sub_category TEXT,
+        sales REAL,
+        discount REAL,
+        profit REAL,
+        margin REAL,
+        profit_z REAL,
+        flags INTEGER NOT NULL
+    )""")
+
+
+def create_indexes(conn):
+    # Built after the bulk insert: one sort per index instead of a B-tree update per row
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_line_item_flags_flags ON line_item_flags(flags)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_line_item_flags_profit ON line_item_flags(profit)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_line_item_flags_order ON line_item_flags(order_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_line_item_flags_sub_category "
+                 "ON line_item_flags(sub_category, profit)")
+
+
+def _to_bins(profit):
+    t = np.sign(profit) * np.log1p(np.abs(profit))
+    scaled = (t + HIST_LIMIT) / (2 * HIST_LIMIT) * HIST_BINS
+    return np.clip(scaled.astype(np.int64), 0, HIST_BINS - 1)
+
+
+def _from_bins(position):
+    t = position / HIST_BINS * (2 * HIST_LIMIT) - HIST_LIMIT
+    return np.sign(t) * np.expm1(np.abs(t))
+
+
+class ProfitHistograms:
+    """Per-sub_category profit histograms giving running median and IQR."""
+
+    def __init__(self):
+        self.codes = {}
+        self.counts = np.zeros((0, HIST_BINS), dtype=np.int64)
+
+    def encode(self, sub_categories):
+        """Integer code per row; unseen sub-categories get a new histogram row."""
+        inverse, uniques = pd.factorize(sub_categories.astype(str))
+        for name in uniques:
+            if name not in self.codes:
+                self.codes[name] = len(self.codes)
+        if len(self.codes) > len(self.counts):
+            grow = np.zeros((len(self.codes) - len(self.counts), HIST_BINS), dtype=np.int64)
+            self.counts = np.vstack([self.counts, grow])
+        return np.array([self.codes[name] for name in uniques], dtype=np.int64)[inverse]
+
+    def add(self, codes, profit):
+        np.add.at(self.counts, (codes, _to_bins(profit)), 1)
+
+    def totals(self):
+        return self.counts.sum(axis=1)
+
+    def quantiles(self, q):
+        """Value at quantile q for every sub_category (linear within a bin)."""
+        cumulative = np.cumsum(self.counts, axis=1)
+        target = q * cumulative[:, -1:]
+        bin_index = np.minimum((cumulative < target).sum(axis=1), HIST_BINS - 1)
+        rows = np.arange(len(self.counts))
+        below = np.where(bin_index > 0, cumulative[rows, bin_index - 1], 0)
+        in_bin = np.maximum(self.counts[rows, bin_index], 1)
+        fraction = np.clip((target[:, 0] - below) / in_bin, 0, 1)
+        return _from_bins(bin_index + fraction)
+
+    def robust_z(self, codes, profit):
+        median = self.quantiles(0.5)
+        scale = (self.quantiles(0.75) - self.quantiles(0.25)) / IQR_TO_STD
+        # A sub-category whose middle half is one value still gets a usable scale
+        scale = np.maximum(scale, 0.01 * np.maximum(np.abs(median), 1.0))
+        return (profit - median[codes]) / scale[codes]
+
+
+def score_chunk(chunk, histograms, codes, margin_threshold=MARGIN_THRESHOLD,
+                discount_band=DISCOUNT_BAND, z_threshold=Z_THRESHOLD):
+    """Add margin, profit_z and flags columns to a chunk (all rules vectorized)."""
+    sales = chunk['sales'].to_numpy(dtype=float)
+    profit = chunk['profit'].to_numpy(dtype=float)
+    discount = chunk['discount'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin = np.where(sales != 0, profit / sales, np.nan)
+    z = histograms.robust_z(codes, profit)
+
+    flags = np.zeros(len(chunk), dtype=np.int64)
+    flags |= np.where(profit < 0, FLAG_NEGATIVE_PROFIT, 0)
+    flags |= np.where(margin < margin_threshold, FLAG_LOW_MARGIN, 0)
+    flags |= np.where(discount > discount_band, FLAG_DEEP_DISCOUNT, 0)
+    flags |= np.where(np.abs(z) > z_threshold, FLAG_PROFIT_OUTLIER, 0)
+    return chunk.assign(margin=margin.round(4), profit_z=z.round(2), flags=flags)
+
+
+def _write(conn, scored):
+    flagged = scored[scored['flags'] != 0]
+    if len(flagged):
+        flagged = flagged.assign(order_date=flagged['order_date'].astype(str))
+        conn.executemany(
+            f"INSERT INTO line_item_flags ({', '.join(_OUTPUT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _OUTPUT_COLUMNS)})",
+            flagged[_OUTPUT_COLUMNS].astype(object).where(flagged[_OUTPUT_COLUMNS].notna(), None)
+            .itertuples(index=False, name=None))
+    return len(flagged)
+
+
+def scan_line_items(conn, chunk_rows=CHUNK_ROWS, margin_threshold=MARGIN_THRESHOLD,
+                    discount_band=DISCOUNT_BAND, z_threshold=Z_THRESHOLD, min_history=MIN_HISTORY):
+    """One pass over superstore; rebuilds line_item_flags and returns scan statistics."""
+    create_table(conn)
+    histograms = ProfitHistograms()
+    rules = dict(margin_threshold=margin_threshold, discount_band=discount_band, z_threshold=z_threshold)
+    pending = []
+    stats = {'rows_scanned': 0, 'rows_flagged': 0, 'chunks': 0}
+    start = time.perf_counter()
+
+    query = f"SELECT rowid AS line_rowid, row_id, {', '.join(_COLUMNS)} FROM superstore"
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+        codes = histograms.encode(chunk['sub_category'].to_numpy(dtype=object))
+        histograms.add(codes, chunk['profit'].to_numpy(dtype=float))
+        ready = histograms.totals()[codes] >= min_history
+
+        # Rows of sparse sub-categories wait until their histogram can be trusted
+        if pending:
+            held = pd.concat(pending, ignore_index=True)
+            held_codes = histograms.encode(held['sub_category'].to_numpy(dtype=object))
+            now_ready = histograms.totals()[held_codes] >= min_history
+            stats['rows_flagged'] += _write(conn, score_chunk(held[now_ready], histograms,
+                                                              held_codes[now_ready], **rules))
+            pending = [held[~now_ready]] if (~now_ready).any() else []
+        if (~ready).any():
+            pending.append(chunk[~ready])
+        stats['rows_flagged'] += _write(conn, score_chunk(chunk[ready], histograms, codes[ready], **rules))
+        stats['rows_scanned'] += len(chunk)
+        stats['chunks'] += 1
+
+    # Whatever is still waiting is scored against the final histograms
+    if pending:
+        held = pd.concat(pending, ignore_index=True)
+        held_codes = histograms.encode(held['sub_category'].to_numpy(dtype=object))
+        stats['rows_flagged'] += _write(conn, score_chunk(held, histograms, held_codes, **rules))
+
+    create_indexes(conn)
+    conn.commit()
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def flag_summary(conn):
+    """Line items, sales and profit per rule (a row can match several rules)."""
+    parts = [f"""
+    SELECT '{name}' AS rule, COUNT(*) AS line_items,
+           ROUND(SUM(sales), 2) AS sales, ROUND(SUM(profit), 2) AS profit
+    FROM line_item_flags WHERE flags & {bit}
+    """ for bit, name in FLAG_NAMES.items()]
+    return pd.read_sql_query(' UNION ALL '.join(parts), conn)
+
+
+def worst_line_items(conn, limit=20, flags=FLAG_NEGATIVE_PROFIT):
+    """Biggest losses among items carrying all of the given flags (profit index)."""
+    query = """
+    SELECT order_id, product_id, sub_category, sales, discount, profit, margin, profit_z, flags
+    FROM line_item_flags
+    WHERE flags & ? = ?
+    ORDER BY profit ASC
+    LIMIT ?;
+    """
+    return pd.read_sql_query(query, conn, params=(flags, flags, limit))
+
+
+def describe_flags(flags):
+    return ', '.join(name for bit, name in FLAG_NAMES.items() if flags & bit)
@@ -0,0 +1,286 @@
+"""
+============================================================================
+FILE: market_basket.py
+PURPOSE: Co-purchase (market basket) analysis over order_id
+AUTHOR: yusufehtesham29
+============================================================================
+
+Orders are streamed from SQLite in chunks of line items sorted by
+order_id. Each chunk becomes a sparse order x item matrix in coordinate
+form (order code, item code); the item x item co-occurrence counts
+(X^T X) come from the pairs inside each order. They are added into a
+dense n_items x n_items array when that is small (sub-categories);
+otherwise each chunk's sparse pair counts are kept and merged once at
+the end, so the work grows linearly with the number of chunks.
+
+Pair support / confidence / lift come from those counts. For itemsets
+larger than two, FP-growth runs over the same stream with items below
+the minimum support pruned up front; each basket goes straight into the
+FP-tree, so only the tree (shared prefixes, one count per path) is held.
+
+The stream is ordered by order_id and read through idx_order_id (created
+by the loaders) rather than sorted in a temporary B-tree.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+ITEM_LEVELS = ('product_id', 'product_name', 'sub_category', 'category')
+CHUNK_ROWS = 200_000
+# Largest n_items ** 2 counted in a dense array (int64: 32 MB)
+DENSE_PAIR_KEYS = 4_000_000
+
+
+def _check_level(item_level):
+    if item_level not in ITEM_LEVELS:
+        raise ValueError(f"item_level must be one of {ITEM_LEVELS}, got {item_level!r}")
+
+
+def count_orders(conn):
+    return conn.execute("SELECT COUNT(DISTINCT order_id) FROM superstore").fetchone()[0]
+
+
+def item_frequencies(conn, item_level='sub_category'):
+    """Number of orders containing each item, most frequent first."""
+    _check_level(item_level)
+    query = f"""
+    SELECT {item_level} AS item, COUNT(DISTINCT order_id) AS orders
+    FROM superstore
+    GROUP BY {item_level}
+    ORDER BY orders DESC, item;
+    """
+    return pd.read_sql_query(query, conn)
+
+
+def iter_order_chunks(conn, item_level='sub_category', item_codes=None, chunk_rows=CHUNK_ROWS):
+    """Yield (order_codes, item_codes) arrays covering whole orders only.
+
+    Items not in item_codes (e.g. pruned for low support) are dropped. The
+    last order of a chunk is held back until the next one so an order is
+    never split across chunks.
+    """
+    _check_level(item_level)
+    cursor = conn.execute(f"SELECT order_id, {item_level} FROM superstore ORDER BY order_id")
+    carry_orders, carry_items = [], []
+    next_order_code = 0
+    last_order_id = None
+
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        orders, items = carry_orders, carry_items
+        for order_id, item in rows:
+            code = item_codes.get(item) if item_codes is not None else item
+            if code is None:
+                continue
+            if order_id != last_order_id:
+                last_order_id = order_id
+                next_order_code += 1
+            orders.append(next_order_code)
+            items.append(code)
+
+        if not rows:
+            if orders:
+                yield np.array(orders, dtype=np.int64), np.array(items, dtype=np.int64)
+            return
+
+        # Hold back the (possibly incomplete) last order
+        split = len(orders)
+        while split > 0 and orders[split - 1] == next_order_code:
+            split -= 1
+        carry_orders, carry_items = orders[split:], items[split:]
+        if split:
+            yield np.array(orders[:split], dtype=np.int64), np.array(items[:split], dtype=np.int64)
+
+
+def _pairs_in_orders(order_codes, item_codes):
+    """All unordered item pairs (a < b) that appear together in an order."""
+    # One entry per (order, item): repeated line items count once
+    keys = np.unique(np.stack([order_codes, item_codes], axis=1), axis=0)
+    orders, items = keys[:, 0], keys[:, 1]
+
+    _, starts, sizes = np.unique(orders, return_index=True, return_counts=True)
+    position = np.arange(len(orders)) - np.repeat(starts, sizes)
+    n_after = np.repeat(sizes, sizes) - position - 1
+
+    total = int(n_after.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    left = np.repeat(np.arange(len(orders)), n_after)
+    block_start = np.repeat(np.cumsum(n_after) - n_after, n_after)
+    right = left + (np.arange(total) - block_start) + 1
+    return items[left], items[right]
+
+
+def pair_counts(conn, item_level='sub_category', min_support=0.0, chunk_rows=CHUNK_ROWS):
+    """Stream orders and accumulate item-pair co-occurrence counts.
+
+    Returns (item frequency table with codes, n_orders, pair count DataFrame).
+    """
+    n_orders = count_orders(conn)
+    freq = item_frequencies(conn, item_level)
+    freq = freq[freq['orders'] / n_orders >= min_support].reset_index(drop=True)
+    freq['code'] = np.arange(len(freq))
+    codes = dict(zip(freq['item'], freq['code']))
+    n_items = len(freq)
+
+    # Pairs keyed by a * n_items + b: a dense counter when the key space is small
+    # (sub-categories), otherwise per-chunk sparse counts merged once at the end
+    dense = n_items * n_items <= DENSE_PAIR_KEYS
+    totals = np.zeros(n_items * n_items if dense else 0, dtype=np.int64)
+    chunk_keys, chunk_counts = [], []
+    for order_codes, item_codes in iter_order_chunks(conn, item_level, codes, chunk_rows):
+        a, b = _pairs_in_orders(order_codes, item_codes)
+        keys = np.minimum(a, b) * n_items + np.maximum(a, b)
+        if dense:
+            totals += np.bincount(keys, minlength=len(totals))
+        else:
+            unique, counts = np.unique(keys, return_counts=True)
+            chunk_keys.append(unique)
+            chunk_counts.append(counts)
+
+    if dense:
+        acc_keys = np.flatnonzero(totals)
+        acc_counts = totals[acc_keys]
+    elif chunk_keys:
+        acc_keys, inverse = np.unique(np.concatenate(chunk_keys), return_inverse=True)
+        acc_counts = np.bincount(inverse.ravel(), weights=np.concatenate(chunk_counts)).astype(np.int64)
+    else:
+        acc_keys = acc_counts = np.empty(0, dtype=np.int64)
+
+    pairs = pd.DataFrame({
+        'item_a': acc_keys // n_items if n_items else acc_keys,
+        'item_b': acc_keys % n_items if n_items else acc_keys,
+        'pair_orders': acc_counts,
+    })
+    return freq, n_orders, pairs
+
+
+def association_rules(conn, item_level='sub_category', min_support=0.001, min_confidence=0.0,
+                      chunk_rows=CHUNK_ROWS):
+    """Pair rules (antecedent -> consequent) with support, confidence and lift."""
+    freq, n_orders, pairs = pair_counts(conn, item_level, min_support, chunk_rows)
+    pairs = pairs[pairs['pair_orders'] / n_orders >= min_support]
+
+    # Each unordered pair yields a rule in both directions
+    forward = pairs.rename(columns={'item_a': 'antecedent', 'item_b': 'consequent'})
+    backward = pairs.rename(columns={'item_b': 'antecedent', 'item_a': 'consequent'})
+    rules = pd.concat([forward, backward], ignore_index=True)
+
+    item_orders = freq['orders'].to_numpy()
+    antecedent_orders = item_orders[rules['antecedent'].to_numpy()]
+    consequent_orders = item_orders[rules['consequent'].to_numpy()]
+
+    rules['support'] = rules['pair_orders'] / n_orders
+    rules['confidence'] = rules['pair_orders'] / antecedent_orders
+    rules['lift'] = rules['confidence'] / (consequent_orders / n_orders)
+    rules = rules[rules['confidence'] >= min_confidence]
+
+    names = freq['item'].to_numpy()
+    rules['antecedent'] = names[rules['antecedent'].to_numpy()]
+    rules['consequent'] = names[rules['consequent'].to_numpy()]
+    return rules.sort_values(['lift', 'support'], ascending=False).reset_index(drop=True)
+
+
+# ============================================================================
+# FP-growth for larger itemsets
+# ============================================================================
+
+class _FPNode:
+    __slots__ = ('item', 'count', 'parent', 'children')
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+
+def _insert(root, header, items, count):
+    """Add one transaction (items ordered by global frequency) to an FP-tree."""
+    node = root
+    for item in items:
+        child = node.children.get(item)
+        if child is None:
+            child = _FPNode(item, node)
+            node.children[item] = child
+            header[item].append(child)
+        child.count += count
+        node = child
+
+
+def _build_tree(transactions):
+    """FP-tree from (items ordered by global frequency, count) transactions."""
+    root = _FPNode(None, None)
+    header = defaultdict(list)
+    for items, count in transactions:
+        _insert(root, header, items, count)
+    return header
+
+
+def _mine(header, min_count, suffix, results, max_size):
+    # Least frequent items first, i.e. highest code (codes follow frequency order)
+    for item in sorted(header, reverse=True):
+        support = sum(node.count for node in header[item])
+        if support < min_count:
+            continue
+        itemset = (item,) + suffix
+        results[itemset] = support
+        if len(itemset) >= max_size:
+            continue
+
+        # Conditional pattern base: prefix paths leading to this item
+        paths = []
+        counts = defaultdict(int)
+        for node in header[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                paths.append((path[::-1], node.count))
+                for p in path:
+                    counts[p] += node.count
+
+        frequent = {p for p, c in counts.items() if c >= min_count}
+        conditional = [([p for p in path if p in frequent], c) for path, c in paths]
+        conditional = [(path, c) for path, c in conditional if path]
+        if conditional:
+            _mine(_build_tree(conditional), min_count, itemset, results, max_size)
+
+
+def frequent_itemsets(conn, item_level='sub_category', min_support=0.01, max_size=4,
+                      chunk_rows=CHUNK_ROWS):
+    """Frequent itemsets of up to max_size items via FP-growth.
+
+    Items below min_support are pruned before the tree is built, and the
+    tree is filled basket by basket from the same chunked order stream as
+    pair_counts.
+    """
+    n_orders = count_orders(conn)
+    min_count = max(1, int(np.ceil(min_support * n_orders)))
+    freq = item_frequencies(conn, item_level)
+    freq = freq[freq['orders'] >= min_count].reset_index(drop=True)
+    codes = dict(zip(freq['item'], range(len(freq))))
+
+    # Codes follow frequency order, so sorted codes are the FP-tree insertion order
+    root, header = _FPNode(None, None), defaultdict(list)
+    for order_codes, item_codes in iter_order_chunks(conn, item_level, codes, chunk_rows):
+        boundaries = np.flatnonzero(np.diff(order_codes)) + 1
+        for items in np.split(item_codes, boundaries):
+            _insert(root, header, np.unique(items).tolist(), 1)
+
+    results = {}
+    _mine(header, min_count, (), results, max_size)
+
+    names = freq['item'].to_numpy()
+    itemsets = pd.DataFrame({
+        'itemset': [' + '.join(names[list(s)]) for s in results],
+        'size': [len(s) for s in results],
+        'orders': list(results.values()),
+    })
+    itemsets['support'] = itemsets['orders'] / n_orders
+    return itemsets.sort_values(['size', 'support'], ascending=[False, False]).reset_index(drop=True)
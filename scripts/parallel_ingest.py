@@ -0,0 +1,234 @@
+"""
+============================================================================
+FILE: parallel_ingest.py
+PURPOSE: Load many Superstore-format CSV drops in parallel
+AUTHOR: yusufehtesham29
+============================================================================
+
+Worker processes read, standardize and date-parse one file each; the
+parsed batches are handed to a single SQLite writer thread through a
+bounded queue (SQLite allows one writer). When the writer falls behind,
+the queue fills up and no new files are submitted, so memory stays
+bounded by (workers + queue size) batches.
+
+Usage (from the project root):
+    python scripts/parallel_ingest.py "data/drops/*.csv.gz" --workers 4
+    python scripts/parallel_ingest.py data/drops/ --append
+
+Files may be plain .csv or compressed .csv.gz / .csv.zst (zstd needs the
+`zstandard` package installed, as for pandas.read_csv).
+
+main() loads into a shadow copy of the database and swaps it in once the
+derived tables are rebuilt (see shadow_db.py), so reports never see a
+partial load.
+"""
+
+import argparse
+import glob
+import itertools
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from data_validation import RowValidator, write_quarantine
+from date_parsing import parse_dates, unparsed_values
+from derived_tables import refresh_derived_tables
+from preview_sample import build_sample, has_sample, update_sample
+from product_summary import build_product_summary, drop_tables as drop_product_tables, update_product_summary
+from shadow_db import carry_over, open_shadow, shadow_path, swap_in
+
+DB_PATH = 'database/superstore.db'
+SCHEMA_PATH = 'sql_queries/01_create_table.sql'
+CSV_SUFFIXES = ('.csv', '.csv.gz', '.csv.zst', '.csv.zstd')
+DATE_COLUMNS = ['order_date', 'ship_date']
+
+
+def discover_files(source):
+    """CSV files in a directory, or matching a glob pattern, sorted by name."""
+    if os.path.isdir(source):
+        files = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(CSV_SUFFIXES)]
+    else:
+        files = glob.glob(source)
+    if not files:
+        raise FileNotFoundError(f"No CSV files found for {source!r}")
+    return sorted(files)
+
+
+def standardize_columns(df):
+    """Same column naming as 01_database_setup.py: 'Sub-Category' -> 'sub_category'."""
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
+    return df
+
+
+def parse_file(path):
+    """Worker: read one file and prepare it for the writer."""
+    start = time.perf_counter()
+    compression = 'zstd' if path.lower().endswith(('.zst', '.zstd')) else 'infer'
+    df = pd.read_csv(path, encoding='latin-1', compression=compression)
+    df = standardize_columns(df)
+    # Only the failing raw strings travel back, for the bad_date rule
+    unparsed = {}
+    for col in DATE_COLUMNS:
+        parsed = parse_dates(df[col])
+        unparsed[col] = unparsed_values(df[col], parsed)
+        df[col] = parsed
+    return path, df, unparsed, time.perf_counter() - start
+
+
+def _writer(db_path, batches, validator, timings, failures, append):
+    """Single writer thread: validate, insert and commit one batch at a time.
+
+    Appends also fold every batch into the preview sample's reservoir.
+    """
+    conn = sqlite3.connect(db_path)
+    while True:
+        item = batches.get()
+        if item is None:
+            break
+        if failures:
+            continue  # keep draining so producers never block on a dead writer
+
+        path, df, unparsed, parse_seconds, queued_at = item
+        started = time.perf_counter()
+        try:
+            valid, quarantined = validator.validate(df, unparsed)
+            valid.to_sql('superstore', conn, if_exists='append', index=False)
+            update_product_summary(conn, valid)
+            if append:
+                update_sample(conn, valid)
+            if len(quarantined):
+                write_quarantine(conn, quarantined)
+            conn.commit()
+        except Exception as exc:
+            failures.append((path, exc))
+            continue
+
+        timings.append({
+            'file': os.path.basename(path),
+            'rows': len(df),
+            'quarantined': len(quarantined),
+            'parse_seconds': round(parse_seconds, 3),
+            'queue_wait_seconds': round(started - queued_at, 3),
+            'write_seconds': round(time.perf_counter() - started, 3),
+        })
+    conn.close()
+
+
+def _prepare_target(db_path, append, validator):
+    conn = sqlite3.connect(db_path)
+    if append:
+        row_ids = [r[0] for r in conn.execute("SELECT row_id FROM superstore")]
+        validator.mark_seen(row_ids)
+        # The writer folds new batches into product_summary, so it must cover existing rows first
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_summary'").fetchone():
+            build_product_summary(conn)
+        # Likewise the sample: its stored reservoir keys are what batches are folded into
+        if not has_sample(conn):
+            build_sample(conn)
+    else:
+        with open(SCHEMA_PATH, 'r') as f:
+            conn.executescript(f.read())
+        conn.execute("DROP TABLE IF EXISTS superstore_quarantine")
+        drop_product_tables(conn)
+    conn.commit()
+    conn.close()
+
+
+def load_files(files, db_path=DB_PATH, workers=None, queue_size=4, append=False):
+    """Load files into superstore; returns (per-file timings, validator)."""
+    validator = RowValidator()
+    _prepare_target(db_path, append, validator)
+
+    batches = queue.Queue(maxsize=queue_size)
+    timings, failures = [], []
+    writer = threading.Thread(target=_writer, args=(db_path, batches, validator, timings, failures, append))
+    writer.start()
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers + queue_size
+    remaining = iter(files)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(parse_file, path) for path in itertools.islice(remaining, max_in_flight)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, df, unparsed, parse_seconds = future.result()
+                    # Blocks while the writer is behind (bounded queue = backpressure)
+                    batches.put((path, df, unparsed, parse_seconds, time.perf_counter()))
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        pending.add(pool.submit(parse_file, next_path))
+    finally:
+        batches.put(None)
+        writer.join()
+
+    if failures:
+        path, exc = failures[0]
+        raise RuntimeError(f"Writer failed on {path}") from exc
+    return pd.DataFrame(timings), validator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load Superstore CSV drops in parallel")
+    parser.add_argument('source', help="Directory or glob of CSV files (.csv, .csv.gz, .csv.zst)")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: all cores)")
+    parser.add_argument('--queue-size', type=int, default=4, help="Parsed batches waiting for the writer")
+    parser.add_argument('--append', action='store_true', help="Add to the existing table instead of replacing it")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("PARALLEL CSV INGEST")
+    print("="*80)
+
+    try:
+        files = discover_files(args.source)
+    except FileNotFoundError as exc:
+        print(f"❌ Error: {exc}")
+        sys.exit(1)
+    print(f"\n[1] Found {len(files)} file(s)")
+
+    os.makedirs(os.path.dirname(args.db) or '.', exist_ok=True)
+    # The live database is untouched until [4]; only appends start from a copy of it
+    open_shadow(args.db, copy_live=args.append).close()
+    print(f"\n[2] Loading with {args.workers or os.cpu_count()} worker(s)...")
+    start = time.perf_counter()
+    df_timings, validator = load_files(files, shadow_path(args.db), args.workers, args.queue_size, args.append)
+    elapsed = time.perf_counter() - start
+
+    print("\n   Per-file timings:")
+    print(df_timings.to_string(index=False))
+
+    print("\n[3] Rebuilding derived tables...")
+    conn = sqlite3.connect(shadow_path(args.db))
+    # The writer already updated product_summary (and on appends the sample) batch by batch
+    maintained = ('product_summary', 'superstore_sample') if args.append else ('product_summary',)
+    refresh_derived_tables(conn, skip=maintained)
+    row_count = conn.execute("SELECT COUNT(*) FROM superstore").fetchone()[0]
+
+    print("\n[4] Swapping the new data into the live database...")
+    if not args.append:
+        carry_over(conn, args.db)
+    swap_in(conn, args.db)
+
+    print("\n" + "="*80)
+    print("INGEST COMPLETED")
+    print("="*80)
+    print(f"\n📊 Summary:")
+    print(f"   Rows loaded: {validator.rows_checked - validator.rows_quarantined:,}")
+    print(f"   Rows quarantined: {validator.rows_quarantined:,}")
+    print(f"   Total rows in table: {row_count:,}")
+    print(f"   Throughput: {validator.rows_checked / elapsed:,.0f} rows/s ({elapsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
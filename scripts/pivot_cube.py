@@ -0,0 +1,318 @@
+"""
+============================================================================
+FILE: pivot_cube.py
+PURPOSE: Dense segment x region x category cube of sales / profit / quantity
+AUTHOR: yusufehtesham29
+============================================================================
+
+build_cube() reads superstore once, in chunks, and adds every line item
+into dense NumPy tensors indexed by the coded dimension values
+(np.add.at over the code tuples) - one tensor per measure:
+
+    cube = build_cube(conn)                        # segment x region x category
+    cube.measures['profit'][i, j, k]               # one cell
+    cube.matrix('region', 'category', 'margin_percent', segment='Consumer')
+    cube.marginal('segment', 'category').to_frame()
+    cube.share(within=('region',))                 # category mix inside each region
+
+Slices, marginals (sums over the other axes), margins (profit / sales)
+and shares (cell / group total, by broadcasting with keepdims) all come
+from the tensors, so any 2-D view of the three dimensions costs no
+further query. plot_profitability_heatmaps() draws them.
+
+    python scripts/pivot_cube.py --check    (every marginal vs SQL GROUP BY)
+"""
+
+import argparse
+import itertools
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = 'database/superstore.db'
+DEFAULT_AXES = ('segment', 'region', 'category')
+# Dimensions a cube can be built over -> SQL expression on superstore
+CUBE_DIMENSIONS = {
+    'segment': 'segment',
+    'region': 'region',
+    'state': 'state',
+    'category': 'category',
+    'sub_category': 'sub_category',
+    'ship_mode': 'ship_mode',
+    'year': "strftime('%Y', order_date)",
+}
+MEASURES = ('sales', 'profit', 'quantity', 'line_items')
+DERIVED = ('margin_percent', 'share_percent')
+SCAN_ROWS = 250_000
+MAX_CELLS = 10_000_000  # dense tensors: keep the product of the axis sizes bounded
+
+
+class PivotCube:
+    """Measure tensors over named axes; every view is computed from the tensors."""
+
+    def __init__(self, axes, labels, measures):
+        self.axes = tuple(axes)
+        self.labels = {axis: list(values) for axis, values in zip(self.axes, labels)}
+        self.measures = dict(measures)
+
+    @property
+    def shape(self):
+        return tuple(len(self.labels[axis]) for axis in self.axes)
+
+    def _axis(self, name):
+        if name not in self.axes:
+            raise ValueError(f"{name!r} is not an axis of this cube {self.axes}")
+        return self.axes.index(name)
+
+    def marginal(self, *keep):
+        """Cube over `keep` only (in that order), summing the other axes."""
+        positions = [self._axis(axis) for axis in keep]
+        dropped = tuple(i for i in range(len(self.axes)) if i not in positions)
+        # After summing, the kept axes are in cube order; transpose to keep's order
+        order = np.argsort(np.argsort(positions))
+        measures = {name: values.sum(axis=dropped).transpose(order) if positions else values.sum(axis=dropped)
+                    for name, values in self.measures.items()}
+        return PivotCube(keep, [self.labels[axis] for axis in keep], measures)
+
+    def slice(self, **fixed):
+        """Sub-cube with some axes fixed: one value drops the axis, a list keeps it."""
+        index = [slice(None)] * len(self.axes)
+        axes, labels = [], []
+        for i, axis in enumerate(self.axes):
+            if axis not in fixed:
+                axes.append(axis)
+                labels.append(self.labels[axis])
+                continue
+            wanted = fixed[axis]
+            many = isinstance(wanted, (list, tuple))
+            missing = [v for v in (wanted if many else [wanted]) if v not in self.labels[axis]]
+            if missing:
+                raise ValueError(f"No {axis} {missing}; values are {self.labels[axis]}")
+            if many:
+                index[i] = [self.labels[axis].index(v) for v in wanted]
+                axes.append(axis)
+                labels.append(list(wanted))
+            else:
+                index[i] = self.labels[axis].index(wanted)
+        unknown = set(fixed) - set(self.axes)
+        if unknown:
+            raise ValueError(f"{sorted(unknown)} are not axes of this cube {self.axes}")
+        # Mixing list and integer indexes in one step would reorder axes, so index one axis at a time
+        measures = {}
+        for name, values in self.measures.items():
+            for i in reversed(range(len(index))):
+                values = values[(slice(None),) * i + (index[i],)]
+            measures[name] = values
+        return PivotCube(axes, labels, measures)
+
+    def margin(self):
+        """Profit as a percentage of sales per cell (NaN where there are no sales)."""
+        sales, profit = self.measures['sales'], self.measures['profit']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(sales != 0, profit / sales * 100, np.nan)
+
+    def share(self, measure='sales', within=()):
+        """Each cell's percentage of its group total; groups are cells sharing the `within` axes."""
+        values = self.measures[measure]
+        summed = tuple(i for i, axis in enumerate(self.axes) if axis not in within)
+        for axis in within:
+            self._axis(axis)
+        totals = values.sum(axis=summed, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(totals != 0, values / totals * 100, np.nan)
+
+    def values(self, value):
+        """A measure tensor, or one of DERIVED."""
+        if value in self.measures:
+            return self.measures[value]
+        if value == 'margin_percent':
+            return self.margin()
+        if value == 'share_percent':
+            return self.share()
+        raise ValueError(f"Unknown value {value!r}; choose from {MEASURES + DERIVED}")
+
+    def matrix(self, rows, cols, value='margin_percent', **fixed):
+        """2-D table of `value` (rows x cols), other axes fixed by `fixed` or summed."""
+        view = self.slice(**fixed) if fixed else self
+        view = view.marginal(rows, cols)
+        return pd.DataFrame(view.values(value), index=pd.Index(view.labels[rows], name=rows),
+                            columns=pd.Index(view.labels[cols], name=cols))
+
+    def to_frame(self):
+        """One row per cell: axis labels, measures and margin."""
+        if self.axes:
+            grid = pd.MultiIndex.from_product([self.labels[axis] for axis in self.axes], names=list(self.axes))
+            df = grid.to_frame(index=False)
+        else:
+            df = pd.DataFrame(index=[0])  # grand total
+        for name, values in self.measures.items():
+            df[name] = values.ravel()
+        df['margin_percent'] = self.margin().ravel()
+        return df
+
+
+def _grow(array, shape):
+    return np.pad(array, [(0, new - old) for old, new in zip(array.shape, shape)])
+
+
+def build_cube(conn, axes=DEFAULT_AXES, report_filter=None, chunk_rows=SCAN_ROWS):
+    """One chunked scan of superstore into a PivotCube (labels sorted per axis)."""
+    unknown = [axis for axis in axes if axis not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Cannot pivot on {unknown}; choose from {tuple(CUBE_DIMENSIONS)}")
+    columns = ', '.join(f"COALESCE({CUBE_DIMENSIONS[axis]}, 'Unknown') AS {axis}" for axis in axes)
+    query = f"SELECT {columns}, sales, profit, quantity FROM superstore"
+    params = None
+    if report_filter is not None:
+        query, params = report_filter.apply(query)
+
+    vocabulary = {axis: {} for axis in axes}
+    shape = (0,) * len(axes)
+    tensors = {'sales': np.zeros(shape), 'profit': np.zeros(shape),
+               'quantity': np.zeros(shape, dtype=np.int64), 'line_items': np.zeros(shape, dtype=np.int64)}
+    for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows):
+        codes = []
+        for axis in axes:
+            local, uniques = pd.factorize(chunk[axis].astype(str))
+            known = vocabulary[axis]
+            codes.append(np.array([known.setdefault(u, len(known)) for u in uniques], dtype=np.int64)[local])
+        new_shape = tuple(len(vocabulary[axis]) for axis in axes)
+        if new_shape != shape:
+            if np.prod(new_shape) > MAX_CELLS:
+                raise ValueError(f"A {' x '.join(map(str, new_shape))} cube is too large to hold densely")
+            tensors = {name: _grow(values, new_shape) for name, values in tensors.items()}
+            shape = new_shape
+        cells = tuple(codes)
+        np.add.at(tensors['sales'], cells, chunk['sales'].to_numpy(dtype=float))
+        np.add.at(tensors['profit'], cells, chunk['profit'].to_numpy(dtype=float))
+        np.add.at(tensors['quantity'], cells, chunk['quantity'].to_numpy(dtype=np.int64))
+        np.add.at(tensors['line_items'], cells, 1)
+
+    # Codes follow first appearance; reorder every axis alphabetically
+    labels = []
+    for i, axis in enumerate(axes):
+        names = list(vocabulary[axis])
+        order = np.argsort(names, kind='stable')
+        labels.append([names[j] for j in order])
+        tensors = {name: np.take(values, order, axis=i) for name, values in tensors.items()}
+    return PivotCube(axes, labels, tensors)
+
+
+# ============================================================================
+# HEATMAPS
+# ============================================================================
+
+def _heatmap(ax, matrix, title, limit, cmap):
+    image = ax.imshow(matrix.to_numpy(dtype=float), cmap=cmap, vmin=-limit, vmax=limit, aspect='auto')
+    ax.set_xticks(range(matrix.shape[1]))
+    ax.set_xticklabels(matrix.columns, rotation=30, ha='right')
+    ax.set_yticks(range(matrix.shape[0]))
+    ax.set_yticklabels(matrix.index)
+    ax.set_xlabel(matrix.columns.name)
+    ax.set_ylabel(matrix.index.name)
+    ax.set_title(title, fontweight='bold')
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.shape[1]):
+            value = matrix.iat[i, j]
+            if not np.isnan(value):
+                ax.text(j, i, f"{value:.1f}%", ha='center', va='center', fontsize=8)
+    return image
+
+
+def plot_profitability_heatmaps(cube, path, cmap='RdYlGn'):
+    """Margin heatmaps: region x category per segment, then the three 2-D marginals."""
+    import matplotlib.pyplot as plt
+
+    segments = cube.labels['segment']
+    marginals = [('region', 'category'), ('segment', 'category'), ('segment', 'region')]
+    n_cols = max(len(segments), len(marginals))
+    fig, axes = plt.subplots(2, n_cols, figsize=(6 * n_cols, 10), squeeze=False)
+
+    panels = [(axes[0, i], cube.matrix('region', 'category', segment=segment), f"{segment}: Margin %")
+              for i, segment in enumerate(segments)]
+    panels += [(axes[1, i], cube.matrix(rows, cols), f"All: {rows.title()} x {cols.replace('_', ' ').title()} Margin %")
+               for i, (rows, cols) in enumerate(marginals)]
+    # One symmetric colour scale for every panel, so colours compare across panels
+    limit = max(np.nanmax(np.abs(matrix.to_numpy(dtype=float))) for _, matrix, _ in panels)
+    for ax, matrix, title in panels:
+        image = _heatmap(ax, matrix, title, limit, cmap)
+    for ax in axes.ravel()[len(segments):n_cols]:
+        ax.axis('off')
+    fig.colorbar(image, ax=axes.ravel().tolist(), label='Profit Margin (%)', shrink=0.6)
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+# ============================================================================
+# CHECK AGAINST SQLITE
+# ============================================================================
+
+def sql_marginal(conn, axes):
+    """The same totals by SQL GROUP BY, shaped like PivotCube.to_frame()."""
+    keys = ', '.join(f"COALESCE({CUBE_DIMENSIONS[axis]}, 'Unknown') AS {axis}" for axis in axes)
+    group = f"GROUP BY {', '.join(axes)}" if axes else ''
+    query = f"""
+    SELECT {keys + ',' if axes else ''}
+           SUM(sales) AS sales, SUM(profit) AS profit, SUM(quantity) AS quantity, COUNT(*) AS line_items
+    FROM superstore
+    {group};
+    """
+    return pd.read_sql_query(query, conn)
+
+
+def run_check(conn, axes=DEFAULT_AXES, rtol=1e-9):
+    start = time.perf_counter()
+    cube = build_cube(conn, axes)
+    build_seconds = time.perf_counter() - start
+    rows = []
+    for n in range(len(axes) + 1):
+        for keep in itertools.combinations(axes, n):
+            start = time.perf_counter()
+            expected = sql_marginal(conn, keep)
+            sql_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            actual = cube.marginal(*keep).to_frame()
+            cube_ms = (time.perf_counter() - start) * 1000
+            # SQL has no row for an empty cell; the dense cube has zeros there
+            actual = actual[actual['line_items'] > 0]
+            merged = expected.merge(actual, on=list(keep), how='outer', suffixes=('_sql', '_cube'),
+                                    indicator=True) if keep else expected.join(actual, lsuffix='_sql', rsuffix='_cube')
+            ok = (not keep or (merged['_merge'] == 'both').all()) and all(
+                np.allclose(merged[f"{m}_sql"].astype(float), merged[f"{m}_cube"].astype(float), rtol=rtol)
+                for m in MEASURES)
+            rows.append({'marginal': ' x '.join(keep) or '(grand total)', 'cells': len(expected),
+                         'status': 'match' if ok else 'MISMATCH',
+                         'sql_ms': round(sql_ms, 2), 'cube_ms': round(cube_ms, 2)})
+    return pd.DataFrame(rows), build_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense pivot cube of sales / profit / quantity")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--axes', nargs='+', default=list(DEFAULT_AXES), choices=list(CUBE_DIMENSIONS))
+    parser.add_argument('--check', action='store_true', help="Compare every marginal with SQL GROUP BY")
+    args = parser.parse_args()
+
+    if not args.check:
+        parser.print_help()
+        return
+
+    print("="*80)
+    print(f"PIVOT CUBE ({' x '.join(args.axes)}) vs SQLITE")
+    print("="*80)
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    df_check, build_seconds = run_check(conn, args.axes)
+    conn.close()
+    print(f"Cube built in one scan: {build_seconds:.2f}s")
+    print(df_check.to_string(index=False))
+    matched = (df_check['status'] == 'match').sum()
+    print(f"\n✅ {matched}/{len(df_check)} marginals match SQLite")
+    if matched < len(df_check):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
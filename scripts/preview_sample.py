@@ -0,0 +1,197 @@
+"""
+============================================================================
+FILE: preview_sample.py
+PURPOSE: Stratified reservoir sample for fast previews of aggregate queries
+AUTHOR: yusufehtesham29
+============================================================================
+
+At load time the superstore table is streamed once and a fixed-size
+uniform sample is kept per (region, category, year) stratum: every row
+gets a random key and each stratum keeps the rows with the smallest keys
+(bottom-k reservoir). The sample is stored in `superstore_sample` with
+each row's key and the stratum population so totals can be scaled back
+up. Because the keys are kept, an append only folds its new rows into
+the stored reservoir (update_sample) instead of streaming the table.
+
+Preview answers report estimated SUM/COUNT totals per group with a
+stratified-sampling confidence interval. Pass exact=True to run the same
+aggregate against the full table instead.
+
+Notebook usage:
+    import sys; sys.path.append('../scripts')
+    from preview_sample import load_sample, aggregate
+    sample = load_sample(conn)
+    aggregate(conn, ['region'], sample=sample)              # preview
+    aggregate(conn, ['region'], exact=True)                 # full scan
+"""
+
+import numpy as np
+import pandas as pd
+
+STRATA = ('region', 'category', 'year')
+ROWS_PER_STRATUM = 1000
+CHUNK_ROWS = 200_000
+METRICS = ('sales', 'profit', 'quantity')
+
+# Two-sided z-values for common confidence levels
+Z_VALUES = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+
+def _stratum_key(df):
+    return df['region'].astype(str) + '|' + df['category'].astype(str) + '|' + df['year'].astype(str)
+
+
+def build_sample(conn, rows_per_stratum=ROWS_PER_STRATUM, chunk_rows=CHUNK_ROWS, seed=42):
+    """Stream superstore once and store a stratified sample in superstore_sample."""
+    rng = np.random.default_rng(seed)
+    query = "SELECT *, CAST(strftime('%Y', order_date) AS INTEGER) AS year FROM superstore"
+
+    reservoir = None
+    populations = {}
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+        chunk['stratum'] = _stratum_key(chunk)
+        chunk['sample_key'] = rng.random(len(chunk))
+        for stratum, count in chunk['stratum'].value_counts().items():
+            populations[stratum] = populations.get(stratum, 0) + count
+
+        # Keep the rows_per_stratum smallest keys seen so far in every stratum
+        combined = chunk if reservoir is None else pd.concat([reservoir, chunk], ignore_index=True)
+        reservoir = (combined.sort_values(['stratum', 'sample_key'])
+                     .groupby('stratum', sort=False).head(rows_per_stratum))
+
+    if reservoir is None:
+        raise ValueError("superstore is empty; nothing to sample")
+
+    sample = reservoir.reset_index(drop=True)
+    sample['stratum_rows'] = sample['stratum'].map(populations)
+    sample['stratum_sample_rows'] = sample['stratum'].map(sample['stratum'].value_counts())
+    sample['sample_weight'] = sample['stratum_rows'] / sample['stratum_sample_rows']
+
+    sample.to_sql('superstore_sample', conn, if_exists='replace', index=False)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sample_stratum ON superstore_sample(stratum)")
+    conn.commit()
+    return sample
+
+
+def has_sample(conn):
+    """True when superstore_sample exists and keeps its reservoir keys."""
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(superstore_sample)")]
+    return 'sample_key' in columns
+
+
+def update_sample(conn, batch, rows_per_stratum=ROWS_PER_STRATUM, seed=None):
+    """Fold a batch of newly loaded rows into the stored reservoir.
+
+    Only the stored keys and the batch are compared: batch rows that beat
+    a stratum's current bottom-k replace the evicted rows, and every
+    touched stratum gets its new population and weights. Returns the
+    number of batch rows taken into the sample.
+    """
+    if not len(batch):
+        return 0
+    rng = np.random.default_rng(seed)
+    batch = batch.assign(year=pd.to_datetime(batch['order_date']).dt.year.astype('int64'))
+    batch['stratum'] = _stratum_key(batch)
+    batch['sample_key'] = rng.random(len(batch))
+
+    stored = pd.read_sql_query(
+        "SELECT rowid AS sample_rowid, stratum, sample_key, stratum_rows FROM superstore_sample", conn)
+    populations = stored.groupby('stratum')['stratum_rows'].first()
+    populations = populations.add(batch['stratum'].value_counts(), fill_value=0).astype('int64')
+
+    # Largest key each stratum keeps once the batch is folded in
+    keys = pd.concat([stored[['stratum', 'sample_key']], batch[['stratum', 'sample_key']]])
+    cutoff = keys.groupby('stratum')['sample_key'].apply(lambda k: k.nsmallest(rows_per_stratum).max())
+    new_rows = batch[batch['sample_key'] <= batch['stratum'].map(cutoff)]
+    evicted = stored.loc[stored['sample_key'] > stored['stratum'].map(cutoff), 'sample_rowid']
+
+    conn.executemany("DELETE FROM superstore_sample WHERE rowid = ?", ((int(r),) for r in evicted))
+    new_rows.to_sql('superstore_sample', conn, if_exists='append', index=False)
+
+    # Populations and weights of the strata this batch touched
+    sizes = (keys['sample_key'] <= keys['stratum'].map(cutoff)).groupby(keys['stratum']).sum()
+    touched = batch['stratum'].unique()
+    conn.executemany("""
+    UPDATE superstore_sample
+    SET stratum_rows = ?, stratum_sample_rows = ?, sample_weight = ?
+    WHERE stratum = ?
+    """, ((int(populations[st]), int(sizes[st]), float(populations[st] / sizes[st]), st) for st in touched))
+    conn.commit()
+    return len(new_rows)
+
+
+def load_sample(conn):
+    """Read the stored sample into memory for repeated preview queries."""
+    return pd.read_sql_query("SELECT * FROM superstore_sample", conn)
+
+
+def preview_aggregate(sample, group_by=(), metrics=METRICS, confidence=0.95):
+    """Estimated totals per group with stratified confidence intervals.
+
+    For every metric y and group g the estimate is sum over strata h of
+    N_h * mean_h(y * [row in g]); its variance is
+    sum over h of N_h^2 * (1 - n_h / N_h) * s_h^2 / n_h.
+    """
+    group_by = list(group_by)
+    z = Z_VALUES[confidence]
+    df = sample.copy()
+    if not group_by:
+        df['_all'] = 'all'
+        group_by = ['_all']
+
+    metric_cols = list(metrics) + ['row_count']
+    df['row_count'] = 1.0
+    for metric in metric_cols:
+        df[f'{metric}__sumsq'] = df[metric] ** 2
+
+    strata = df.groupby('stratum').agg(N=('stratum_rows', 'first'), n=('stratum_rows', 'size'))
+    per_cell = df.groupby(group_by + ['stratum'])[
+        metric_cols + [f'{m}__sumsq' for m in metric_cols]].sum()
+    per_cell = per_cell.join(strata, on='stratum')
+
+    N, n = per_cell['N'], per_cell['n']
+    fpc = 1 - n / N
+    result = pd.DataFrame(index=per_cell.index.droplevel('stratum').unique())
+    for metric in metric_cols:
+        s, ss = per_cell[metric], per_cell[f'{metric}__sumsq']
+        mean = s / n
+        # Rows outside the group count as zeros within the stratum
+        var = ((ss - n * mean ** 2) / (n - 1).clip(lower=1)).clip(lower=0)
+        estimate = (N * mean).groupby(level=group_by).sum()
+        std_err = np.sqrt((N ** 2 * fpc * var / n).groupby(level=group_by).sum())
+        name = 'rows' if metric == 'row_count' else f'total_{metric}'
+        result[name] = estimate
+        result[f'{name}_ci_low'] = estimate - z * std_err
+        result[f'{name}_ci_high'] = estimate + z * std_err
+
+    result = result.reset_index()
+    if '_all' in result.columns:
+        result = result.drop(columns='_all')
+    result['is_estimate'] = True
+    return result
+
+
+def exact_aggregate(conn, group_by=(), metrics=METRICS):
+    """The same aggregate computed in SQLite over the full table."""
+    group_by = list(group_by)
+    select_dims = [("CAST(strftime('%Y', order_date) AS INTEGER) AS year" if g == 'year' else g)
+                   for g in group_by]
+    sums = [f'SUM({m}) AS total_{m}' for m in metrics] + ['COUNT(*) AS rows']
+    group_sql = f"GROUP BY {', '.join(group_by)}" if group_by else ''
+    query = f"""
+    SELECT {', '.join(select_dims + sums)}
+    FROM superstore
+    {group_sql}
+    """
+    result = pd.read_sql_query(query, conn)
+    result['is_estimate'] = False
+    return result
+
+
+def aggregate(conn, group_by=(), metrics=METRICS, exact=False, sample=None, confidence=0.95):
+    """Preview from the sample by default; exact=True scans the full table."""
+    if exact:
+        return exact_aggregate(conn, group_by, metrics)
+    if sample is None:
+        sample = load_sample(conn)
+    return preview_aggregate(sample, group_by, metrics, confidence)
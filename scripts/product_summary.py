@@ -0,0 +1,165 @@
+"""
+============================================================================
+FILE: product_summary.py
+PURPOSE: Maintained per-product profitability index with loss-maker flag
+AUTHOR: yusufehtesham29
+============================================================================
+
+`products` maps each (product_id, product_name, category, sub_category)
+to an integer product_key - product_id alone is not unique in the data.
+`product_summary` keeps running totals per product_key and is indexed on
+total_profit, so loss-maker and top-profit lists are index range reads
+instead of GROUP BYs over long text keys.
+
+The summary is rebuilt from superstore by build_product_summary() or
+updated batch by batch with update_product_summary() (UPSERT adding each
+batch's totals). times_ordered assumes an order is never split across
+two load batches.
+"""
+
+import pandas as pd
+
+PRODUCT_COLUMNS = ['product_id', 'product_name', 'category', 'sub_category']
+
+_SUMMARY_SUMS = ['line_items', 'times_ordered', 'total_sales', 'total_profit', 'total_quantity',
+                 'discount_sum', 'discounted_sales']
+
+
+def create_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        product_key INTEGER PRIMARY KEY,
+        product_id TEXT NOT NULL,
+        product_name TEXT,
+        category TEXT,
+        sub_category TEXT,
+        UNIQUE (product_id, product_name, category, sub_category)
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS product_summary (
+        product_key INTEGER PRIMARY KEY REFERENCES products(product_key),
+        line_items INTEGER NOT NULL,
+        times_ordered INTEGER NOT NULL,
+        total_sales REAL NOT NULL,
+        total_profit REAL NOT NULL,
+        total_quantity INTEGER NOT NULL,
+        discount_sum REAL NOT NULL,
+        discounted_sales REAL NOT NULL,
+        is_loss_maker INTEGER NOT NULL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_summary_profit ON product_summary(total_profit)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_summary_sales ON product_summary(total_sales)")
+
+
+def drop_tables(conn):
+    conn.execute("DROP TABLE IF EXISTS product_summary")
+    conn.execute("DROP TABLE IF EXISTS products")
+
+
+def update_product_summary(conn, batch):
+    """Fold a batch of newly loaded line items into the summary."""
+    create_tables(conn)
+    batch = batch.assign(discounted_sales=batch['discount'] * batch['sales'])
+    agg = batch.groupby(PRODUCT_COLUMNS, dropna=False).agg(
+        line_items=('sales', 'size'),
+        times_ordered=('order_id', 'nunique'),
+        total_sales=('sales', 'sum'),
+        total_profit=('profit', 'sum'),
+        total_quantity=('quantity', 'sum'),
+        discount_sum=('discount', 'sum'),
+        discounted_sales=('discounted_sales', 'sum'),
+    ).reset_index()
+
+    # New products get the next integer keys; existing ones keep theirs
+    conn.executemany(
+        "INSERT OR IGNORE INTO products (product_id, product_name, category, sub_category) VALUES (?, ?, ?, ?)",
+        agg[PRODUCT_COLUMNS].itertuples(index=False, name=None),
+    )
+    keys = pd.read_sql_query("SELECT product_key, " + ', '.join(PRODUCT_COLUMNS) + " FROM products", conn)
+    agg = agg.merge(keys, on=PRODUCT_COLUMNS, how='left')
+
+    updates = ', '.join(f"{c} = {c} + excluded.{c}" for c in _SUMMARY_SUMS)
+    conn.executemany(f"""
+    INSERT INTO product_summary (product_key, {', '.join(_SUMMARY_SUMS)}, is_loss_maker)
+    VALUES (?, {', '.join('?' for _ in _SUMMARY_SUMS)}, ?)
+    ON CONFLICT(product_key) DO UPDATE SET
+        {updates},
+        is_loss_maker = (total_profit + excluded.total_profit) < 0
+    """, agg[['product_key'] + _SUMMARY_SUMS]
+        .assign(is_loss_maker=(agg['total_profit'] < 0).astype(int))
+        .astype(object)
+        .itertuples(index=False, name=None))
+    conn.commit()
+    return len(agg)
+
+
+def build_product_summary(conn):
+    """Rebuild products and product_summary from superstore; returns product count."""
+    drop_tables(conn)
+    create_tables(conn)
+    product_cols = ', '.join(PRODUCT_COLUMNS)
+    conn.execute(f"""
+    INSERT INTO products ({product_cols})
+    SELECT DISTINCT {product_cols} FROM superstore
+    """)
+    conn.execute(f"""
+    INSERT INTO product_summary
+    SELECT
+        p.product_key,
+        COUNT(*),
+        COUNT(DISTINCT s.order_id),
+        SUM(s.sales),
+        SUM(s.profit),
+        SUM(s.quantity),
+        SUM(s.discount),
+        SUM(s.discount * s.sales),
+        SUM(s.profit) < 0
+    FROM superstore s
+    JOIN products p
+      ON p.product_id = s.product_id
+     AND p.product_name IS s.product_name
+     AND p.category IS s.category
+     AND p.sub_category IS s.sub_category
+    GROUP BY p.product_key
+    """)
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM product_summary").fetchone()[0]
+
+
+_LIST_COLUMNS = """
+    p.product_id,
+    p.product_name,
+    p.category,
+    p.sub_category,
+    s.times_ordered,
+    ROUND(s.total_sales, 2) AS total_sales,
+    ROUND(s.total_profit, 2) AS total_profit,
+    ROUND(s.total_profit / s.total_sales * 100, 2) AS profit_margin_percent,
+    ROUND(s.discount_sum / s.line_items * 100, 2) AS avg_discount_percent,
+    ROUND(s.discounted_sales / s.total_sales * 100, 2) AS sales_weighted_discount_percent
+"""
+
+
+def loss_makers(conn, limit=20):
+    """Products losing the most money (range read on the total_profit index)."""
+    query = f"""
+    SELECT {_LIST_COLUMNS}
+    FROM product_summary s
+    JOIN products p USING (product_key)
+    WHERE s.total_profit < 0
+    ORDER BY s.total_profit ASC
+    LIMIT ?;
+    """
+    return pd.read_sql_query(query, conn, params=(limit,))
+
+
+def top_profit_products(conn, limit=10):
+    """Most profitable products (reverse scan of the total_profit index)."""
+    query = f"""
+    SELECT {_LIST_COLUMNS}
+    FROM product_summary s
+    JOIN products p USING (product_key)
+    ORDER BY s.total_profit DESC
+    LIMIT ?;
+    """
+    return pd.read_sql_query(query, conn, params=(limit,))
@@ -0,0 +1,219 @@
+"""
+============================================================================
+FILE: query_engine.py
+PURPOSE: Pluggable SQL execution backend (SQLite or in-process DuckDB)
+AUTHOR: yusufehtesham29
+============================================================================
+
+The same SQLite-dialect queries (sql_queries/*.sql, notebook cells) can
+run on either engine:
+
+    sqlite  the row-oriented SQLite executor (default)
+    duckdb  a columnar in-memory snapshot of the SQLite tables, loaded
+            once per process. Needs the optional `duckdb` package.
+
+The engine is chosen with get_engine('duckdb') or the SUPERSTORE_ENGINE
+environment variable. Engines are cached per (engine, database), so every
+cell and module in a process shares one snapshot.
+
+SQLite functions without a DuckDB equivalent (DATE, JULIANDAY,
+strftime(format, value)) are mapped to macros with SQLite's semantics.
+
+Parity check against SQLite for every named query in sql_queries/
+(run with its default parameters):
+    python scripts/query_engine.py --parity
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from query_library import load_queries
+
+DB_PATH = 'database/superstore.db'
+ENGINE_ENV = 'SUPERSTORE_ENGINE'
+DEFAULT_ENGINE = 'sqlite'
+
+_engines = {}
+
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+class SQLiteEngine:
+    name = 'sqlite'
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def close(self):
+        self.conn.close()
+
+
+_DUCKDB_MACROS = [
+    # SQLite julian day number (fractional days since noon, 24 Nov 4714 BC)
+    "CREATE MACRO julianday(d) AS epoch(CAST(d AS TIMESTAMP)) / 86400.0 + 2440587.5",
+    "CREATE MACRO sqlite_date(d) AS strftime(CAST(d AS TIMESTAMP), '%Y-%m-%d')",
+    "CREATE MACRO sqlite_strftime(fmt, d) AS strftime(CAST(d AS TIMESTAMP), fmt)",
+]
+
+# strftime('<format>', value) -> sqlite_strftime(...); DuckDB takes (value, format)
+_STRFTIME_RE = re.compile(r"\bstrftime\s*\(\s*('(?:[^']|'')*')\s*,", re.IGNORECASE)
+_DATE_RE = re.compile(r"\bDATE\s*\(", re.IGNORECASE)
+# SQLite :name parameters are $name in DuckDB
+_NAMED_PARAM_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+def translate_sqlite(sql):
+    """Rewrite SQLite-only date functions and named parameters for DuckDB."""
+    sql = _STRFTIME_RE.sub(r"sqlite_strftime(\1,", sql)
+    sql = _NAMED_PARAM_RE.sub(r"$\1", sql)
+    return _DATE_RE.sub("sqlite_date(", sql)
+
+
+class DuckDBEngine:
+    name = 'duckdb'
+
+    def __init__(self, db_path=DB_PATH, tables=None):
+        try:
+            import duckdb
+        except ImportError as exc:
+            raise ImportError("The duckdb engine needs the `duckdb` package (pip install duckdb)") from exc
+
+        self.db_path = db_path
+        self.conn = duckdb.connect()
+        # SQLite divides integers with truncation
+        self.conn.execute("SET integer_division = true")
+        for macro in _DUCKDB_MACROS:
+            self.conn.execute(macro)
+
+        # Copy each table through pandas (no DuckDB extension download needed).
+        # Fact rows are stored in order_date order so each row group covers a
+        # narrow date range and report date filters skip the others (min/max pruning).
+        source = sqlite3.connect(db_path)
+        if tables is None:
+            tables = [row[0] for row in source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        for table in tables:
+            df = pd.read_sql_query(f'SELECT * FROM "{table}"', source)
+            if 'order_date' in df.columns:
+                # Stable sort keeps the SQLite row order within a day
+                df = df.sort_values('order_date', kind='stable', ignore_index=True)
+            self.conn.register('_snapshot', df)
+            self.conn.execute(f'CREATE TABLE "{table}" AS SELECT * FROM _snapshot')
+            self.conn.unregister('_snapshot')
+        source.close()
+
+    def query(self, sql, params=()):
+        params = dict(params) if isinstance(params, dict) else list(params)
+        return self.conn.execute(translate_sqlite(sql), params).df()
+
+    def close(self):
+        self.conn.close()
+
+
+ENGINES = {
+    'sqlite': SQLiteEngine,
+    'duckdb': DuckDBEngine,
+}
+
+
+def get_engine(name=None, db_path=DB_PATH):
+    """Shared engine for this process; name defaults to $SUPERSTORE_ENGINE or sqlite."""
+    name = (name or os.environ.get(ENGINE_ENV) or DEFAULT_ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine {name!r}; choose from {sorted(ENGINES)}")
+    key = (name, os.path.abspath(db_path))
+    if key not in _engines:
+        _engines[key] = ENGINES[name](db_path)
+    return _engines[key]
+
+
+def close_engines():
+    for engine in _engines.values():
+        engine.close()
+    _engines.clear()
+
+
+# ============================================================================
+# PARITY CHECK
+# ============================================================================
+
+def _normalize(df):
+    """Order-insensitive, dtype-insensitive form of a result for comparison."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            converted = pd.to_numeric(df[col], errors='coerce')
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted
+    return df.sort_values(list(df.columns), na_position='last').reset_index(drop=True)
+
+
+def check_parity(queries, engine='duckdb', db_path=DB_PATH, rtol=1e-6, atol=0.01 + 1e-9):
+    """Run (label, sql, params) queries on SQLite and `engine`; one row per query.
+
+    atol allows one cent: a ROUND(..., 2) of a sum that lands on half a cent
+    can go either way depending on the order the engine adds the rows (and
+    two rounded floats a cent apart differ by a hair more than 0.01).
+    """
+    reference = get_engine('sqlite', db_path)
+    candidate = get_engine(engine, db_path)
+    results = []
+    for label, sql, params in queries:
+        row = {'query': label}
+        start = time.perf_counter()
+        expected = reference.query(sql, params)
+        row['sqlite_seconds'] = round(time.perf_counter() - start, 4)
+        try:
+            start = time.perf_counter()
+            actual = candidate.query(sql, params)
+            row[f'{engine}_seconds'] = round(time.perf_counter() - start, 4)
+            pd.testing.assert_frame_equal(_normalize(expected), _normalize(actual),
+                                          check_dtype=False, check_exact=False, rtol=rtol, atol=atol)
+            row['status'] = 'match'
+        except AssertionError as exc:
+            row['status'] = 'MISMATCH'
+            row['detail'] = str(exc).splitlines()[0]
+        except Exception as exc:
+            row['status'] = 'ERROR'
+            row['detail'] = f"{type(exc).__name__}: {exc}".splitlines()[0]
+        results.append(row)
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the project's SQL on an alternative engine")
+    parser.add_argument('--parity', action='store_true', help="Compare every sql_queries/ query with SQLite")
+    parser.add_argument('--engine', default='duckdb')
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    if not args.parity:
+        parser.print_help()
+        return
+
+    print("="*80)
+    print(f"QUERY ENGINE PARITY: sqlite vs {args.engine}")
+    print("="*80)
+    queries = [(name, *query.bind()) for name, query in load_queries().items()]
+    df_parity = check_parity(queries, args.engine, args.db)
+    print(df_parity.to_string(index=False))
+
+    matched = (df_parity['status'] == 'match').sum()
+    print(f"\n✅ {matched}/{len(df_parity)} queries match SQLite")
+    if matched < len(df_parity):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
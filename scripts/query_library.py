@@ -0,0 +1,275 @@
+"""
+============================================================================
+FILE: query_library.py
+PURPOSE: Named, parameterized queries loaded from sql_queries/*.sql
+AUTHOR: yusufehtesham29
+============================================================================
+
+Every query in the analysis .sql files carries a name and its parameter
+defaults in the comment block above it:
+
+    -- name: top_customers_by_sales
+    -- params: limit=10
+    SELECT ... LIMIT :limit;
+
+QueryLibrary exposes each one as a function returning a DataFrame:
+
+    library = get_library()
+    library.top_customers_by_sales(limit=5)
+    library.at_risk_customers(min_orders=5, start_date='2016-01-01')
+    library.sales_by_region(filters={'segment': 'Consumer'})
+
+Every query also accepts start_date (inclusive), end_date (exclusive) and
+filters (column -> value or list of values), pushed down into every
+`FROM superstore` (see report_filters.py). Unfiltered calls run the
+query text unchanged.
+
+Queries run on a small pool of read-only connections. The SQL text of a
+query (per combination of filter columns) never changes and values are
+always bound, so sqlite3's per-connection statement cache hands back the
+already-prepared statement: repeated calls skip parsing and planning.
+"""
+
+import ast
+import glob
+import os
+import queue
+import re
+import sqlite3
+from contextlib import contextmanager
+from functools import partial
+
+import pandas as pd
+
+from report_filters import FILTER_COLUMNS, filter_params, filter_shape, push_down
+
+DB_PATH = 'database/superstore.db'
+SQL_DIR = 'sql_queries'
+QUERY_FILES = '0[2-9]_*.sql'
+POOL_SIZE = 4
+
+_PARAM_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+_libraries = {}
+
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def split_sql_statements(text):
+    """Split a SQL script on ';' outside quotes and comments.
+
+    Returns (statement, leading comment lines) pairs; statements that are
+    only comments are dropped.
+    """
+    statements = []
+    current, comments = [], []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if text.startswith('--', i):
+            end = text.find('\n', i)
+            end = n if end == -1 else end
+            if not ''.join(current).strip():
+                comments.append(text[i + 2:end].strip())
+            else:
+                current.append(text[i:end])
+            i = end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            current.append(text[i:end])
+            i = end
+        elif ch in ("'", '"'):
+            # Quoted string or identifier; a doubled quote is an escaped quote
+            end = i + 1
+            while end < n:
+                if text[end] == ch:
+                    if end + 1 < n and text[end + 1] == ch:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(text[i:end + 1])
+            i = end + 1
+        elif ch == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append((statement, comments))
+            current, comments = [], []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append((statement, comments))
+    return statements
+
+
+def _parse_defaults(text):
+    """'limit=10, max_profit=0' -> {'limit': 10, 'max_profit': 0}"""
+    defaults = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, _, value = item.partition('=')
+        defaults[key.strip()] = ast.literal_eval(value.strip())
+    return defaults
+
+
+class NamedQuery:
+    """One named query and the SQL variants built for it."""
+
+    def __init__(self, name, sql, defaults=None, title='', source=''):
+        self.name = name
+        self.sql = sql
+        self.defaults = defaults or {}
+        self.title = title
+        self.source = source
+        self.param_names = set(_PARAM_RE.findall(sql))
+        missing = set(self.defaults) - self.param_names
+        if missing:
+            raise ValueError(f"{source}: defaults for unused parameters {sorted(missing)} in {name!r}")
+        self._variants = {}
+
+    def __repr__(self):
+        return f"NamedQuery({self.name!r}, params={sorted(self.param_names)})"
+
+    def bind(self, start_date=None, end_date=None, filters=None, **params):
+        """Return (sql, params) for this call."""
+        unknown = set(params) - self.param_names
+        if unknown:
+            raise TypeError(f"{self.name}() got unexpected parameters {sorted(unknown)}")
+        values = {**self.defaults, **params}
+        missing = self.param_names - set(values)
+        if missing:
+            raise TypeError(f"{self.name}() missing parameters {sorted(missing)}")
+
+        filters = filters or {}
+        bad = set(filters) - set(FILTER_COLUMNS)
+        if bad:
+            raise ValueError(f"Cannot filter on {sorted(bad)}; choose from {FILTER_COLUMNS}")
+
+        # One SQL text per filter shape, so values change but the statement is reused
+        shape = filter_shape(start_date, end_date, filters)
+        if shape not in self._variants:
+            self._variants[shape] = push_down(self.sql, shape)
+        values.update(filter_params(start_date, end_date, filters))
+        return self._variants[shape], values
+
+
+def load_queries(sql_dir=SQL_DIR, pattern=QUERY_FILES):
+    """Parse every named query in the matching .sql files; returns {name: NamedQuery}."""
+    queries = {}
+    for path in sorted(glob.glob(os.path.join(sql_dir, pattern))):
+        source = os.path.basename(path)
+        with open(path, 'r') as f:
+            statements = split_sql_statements(f.read())
+        for statement, comments in statements:
+            directives = dict(line.split(':', 1) for line in comments
+                              if line.startswith(('name:', 'params:')))
+            if 'name' not in directives:
+                continue
+            name = directives['name'].strip()
+            if name in queries:
+                raise ValueError(f"{source}: query {name!r} is already defined in {queries[name].source}")
+            titles = [line for line in comments if line.startswith('Query ')]
+            queries[name] = NamedQuery(
+                name,
+                statement,
+                _parse_defaults(directives.get('params', '')),
+                title=titles[-1].split(':', 1)[-1].strip() if titles else '',
+                source=source,
+            )
+    return queries
+
+
+# ============================================================================
+# CONNECTION POOL
+# ============================================================================
+
+class ConnectionPool:
+    """Fixed set of read-only SQLite connections, each with its own statement cache."""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE, cached_statements=128):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Database not found at {db_path}")
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        self._all = []
+        uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        for _ in range(size):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=cached_statements)
+            self._all.append(conn)
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for conn in self._all:
+            conn.close()
+
+
+# ============================================================================
+# LIBRARY
+# ============================================================================
+
+class QueryLibrary:
+    """Named queries as functions: library.<name>(conn=None, **params) -> DataFrame."""
+
+    def __init__(self, db_path=DB_PATH, sql_dir=SQL_DIR, pool_size=POOL_SIZE):
+        self.queries = load_queries(sql_dir)
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool = None
+
+    @property
+    def pool(self):
+        # Opened on first use, so parsing the library never needs the database
+        if self._pool is None:
+            # Room for every query in a couple of filter shapes
+            cached = max(128, 4 * len(self.queries))
+            self._pool = ConnectionPool(self.db_path, self.pool_size, cached)
+        return self._pool
+
+    def names(self):
+        return sorted(self.queries)
+
+    def run(self, name, conn=None, start_date=None, end_date=None, filters=None, **params):
+        """Run a named query on conn, or on a pooled connection when conn is None."""
+        if name not in self.queries:
+            raise KeyError(f"Unknown query {name!r}")
+        sql, values = self.queries[name].bind(start_date, end_date, filters, **params)
+        if conn is not None:
+            return pd.read_sql_query(sql, conn, params=values)
+        with self.pool.connection() as pooled:
+            return pd.read_sql_query(sql, pooled, params=values)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.__dict__.get('queries', {}):
+            raise AttributeError(name)
+        return partial(self.run, name)
+
+    def __dir__(self):
+        return list(super().__dir__()) + self.names()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+
+def get_library(db_path=DB_PATH, sql_dir=SQL_DIR):
+    """Shared library (and connection pool) for this process."""
+    key = (os.path.abspath(db_path), os.path.abspath(sql_dir))
+    if key not in _libraries:
+        _libraries[key] = QueryLibrary(db_path, sql_dir)
+    return _libraries[key]
@@ -0,0 +1,504 @@
+"""
+============================================================================
+FILE: query_service.py
+PURPOSE: Read-only HTTP/JSON service for the report aggregates
+AUTHOR: yusufehtesham29
+============================================================================
+
+Serves the named queries of sql_queries/*.sql as JSON (standard library
+asyncio only, no web framework needed):
+
+    python scripts/query_service.py --port 8050
+
+    curl localhost:8050/metrics/business
+    curl "localhost:8050/metrics/regions?start_date=2017-01-01&segment=Consumer"
+    curl "localhost:8050/customers/at-risk?min_orders=5&limit=10"
+    curl "localhost:8050/query/top_customers_by_profit?limit=3&region=West,East"
+    curl localhost:8050/queries          (every endpoint and named query)
+    curl localhost:8050/stats            (cache hits, coalesced requests)
+
+Query-string arguments are the query's :params plus the report filters
+(start_date, end_date and any filter column, comma-separated for several
+values - see report_filters.py). Each :param is cast to the type of its
+declared default and dates must be YYYY-MM-DD; anything else is a 400
+before the query is queued. Unexpected errors are logged on the server
+and answered with a plain 500, never the exception text.
+
+How a request is answered:
+    1. Result cache: identical requests within CACHE_TTL seconds are served
+       from memory. The cache is dropped when the database (or its WAL
+       file) changes, e.g. when a load is swapped in.
+    2. Coalescing: concurrent identical requests wait on the one query
+       already running instead of starting their own.
+    3. Otherwise the query runs in a worker thread on one of the library's
+       read-only pooled connections (statement cache warm), so the event
+       loop never blocks on SQLite.
+
+Load test against an in-process server:
+    python scripts/query_service.py --bench 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import traceback
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qsl, urlsplit
+from urllib.request import urlopen
+
+import numpy as np
+
+from query_library import DB_PATH, POOL_SIZE, SQL_DIR, QueryLibrary
+from report_filters import FILTER_COLUMNS
+
+HOST = '127.0.0.1'
+PORT = 8050
+CACHE_TTL = 60
+CACHE_SIZE = 512
+MAX_HEADER_LINES = 100
+
+# Report endpoints -> named queries
+ENDPOINTS = {
+    '/metrics/business': 'business_overview',
+    '/metrics/yearly': 'sales_by_year',
+    '/metrics/regions': 'sales_by_region',
+    '/metrics/categories': 'sales_by_category',
+    '/metrics/sub-categories': 'sales_by_sub_category',
+    '/metrics/discount-bands': 'discount_impact',
+    '/metrics/ship-modes': 'sales_by_ship_mode',
+    '/customers/top': 'top_customers_by_sales',
+    '/customers/segments': 'customer_segments',
+    '/customers/rfm': 'rfm_scores',
+    '/customers/at-risk': 'at_risk_customers',
+    '/products/top': 'top_products_by_profit',
+    '/products/loss-makers': 'loss_making_products',
+}
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """A client error, answered with its status code and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _coerce(value):
+    """Query-string text -> int / float / str."""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_arguments(query_string):
+    """Split a query string into (start_date, end_date, filters, params).
+
+    params stay text here; fetch() casts them once the query is known.
+    """
+    start_date = end_date = None
+    filters, params = {}, {}
+    for key, value in parse_qsl(query_string, keep_blank_values=True):
+        if key == 'start_date':
+            start_date = value
+        elif key == 'end_date':
+            end_date = value
+        elif key in FILTER_COLUMNS:
+            values = [v for v in value.split(',') if v]
+            filters[key] = values[0] if len(values) == 1 else values
+        else:
+            params[key] = value
+    return start_date, end_date, filters, params
+
+
+def coerce_params(query, params):
+    """Cast text parameters to the type of the query's default for them.
+
+    Parameters without a default are guessed (int, float, str). Raises
+    RequestError(400) for values that do not fit, e.g. limit=abc.
+    """
+    coerced = {}
+    for key, value in params.items():
+        default = query.defaults.get(key)
+        if not isinstance(value, str):
+            coerced[key] = value
+        elif isinstance(default, (int, float)) and not isinstance(default, bool):
+            kind = 'an integer' if isinstance(default, int) else 'a number'
+            try:
+                number = type(default)(value)
+            except ValueError:
+                raise RequestError(400, f"{key} must be {kind}, got {value!r}") from None
+            if not math.isfinite(number):
+                raise RequestError(400, f"{key} must be {kind}, got {value!r}")
+            coerced[key] = number
+        elif default is None:
+            coerced[key] = _coerce(value)
+        else:
+            coerced[key] = value
+    return coerced
+
+
+def check_dates(start_date, end_date):
+    """Raise RequestError(400) unless each date is None or exactly YYYY-MM-DD."""
+    for key, value in (('start_date', start_date), ('end_date', end_date)):
+        if value is None:
+            continue
+        try:
+            # fromisoformat alone also takes '20170101', which compares wrongly in SQL
+            valid = date.fromisoformat(str(value)).isoformat() == str(value)
+        except ValueError:
+            valid = False
+        if not valid:
+            raise RequestError(400, f"{key} must be a YYYY-MM-DD date, got {value!r}")
+
+
+def _cache_key(name, start_date, end_date, filters, params):
+    frozen = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()))
+    return name, start_date, end_date, frozen, tuple(sorted(params.items()))
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class QueryService:
+    """Cached, coalesced execution of named queries on a thread pool."""
+
+    def __init__(self, db_path=DB_PATH, sql_dir=SQL_DIR, workers=POOL_SIZE,
+                 cache_ttl=CACHE_TTL, cache_size=CACHE_SIZE):
+        self.db_path = db_path
+        # One pooled read-only connection per worker thread
+        self.library = QueryLibrary(db_path, sql_dir, pool_size=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query')
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.stats = Counter()
+        self._cache = OrderedDict()  # key -> (expires_at, body), least recently used first
+        self._inflight = {}          # key -> task running that query
+        self._db_version = self._current_db_version()
+
+    def _current_db_version(self):
+        # In WAL mode a swapped-in load lands in the -wal file before the main file
+        version = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    def _cached(self, key):
+        version = self._current_db_version()
+        if version != self._db_version:
+            # Database was reloaded: every cached result is stale
+            self._cache.clear()
+            self._db_version = version
+            return None
+        entry = self._cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key, body):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, body)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _run_query(self, name, start_date, end_date, filters, params):
+        """Worker thread: run the query and serialize it once for every waiter."""
+        df = self.library.run(name, start_date=start_date, end_date=end_date, filters=filters, **params)
+        records = df.to_json(orient='records', date_format='iso')
+        return f'{{"query": {json.dumps(name)}, "rows": {len(df)}, "data": {records}}}'.encode()
+
+    async def _compute(self, key, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            body = await loop.run_in_executor(self.executor, self._run_query, *args)
+            self._store(key, body)
+            return body
+        finally:
+            del self._inflight[key]
+
+    async def fetch(self, name, start_date=None, end_date=None, filters=None, params=None):
+        """JSON body for one query; returns (body, 'hit' | 'coalesced' | 'miss')."""
+        filters, params = filters or {}, params or {}
+        if name not in self.library.queries:
+            raise RequestError(404, f"Unknown query {name!r}")
+        check_dates(start_date, end_date)
+        params = coerce_params(self.library.queries[name], params)
+        try:
+            # Cheap (the SQL variant is cached); catches bad parameters before queuing
+            self.library.queries[name].bind(start_date, end_date, filters, **params)
+        except (TypeError, ValueError) as exc:
+            raise RequestError(400, str(exc)) from exc
+        key = _cache_key(name, start_date, end_date, filters, params)
+
+        body = self._cached(key)
+        if body is not None:
+            self.stats['cache_hits'] += 1
+            return body, 'hit'
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+            # shield: a client hanging up must not cancel the query for the others
+            return await asyncio.shield(task), 'coalesced'
+
+        self.stats['queries_run'] += 1
+        task = asyncio.ensure_future(self._compute(key, name, start_date, end_date, filters, params))
+        self._inflight[key] = task
+        return await asyncio.shield(task), 'miss'
+
+    def describe(self):
+        return {
+            'endpoints': ENDPOINTS,
+            'queries': {name: {'params': query.defaults, 'title': query.title}
+                        for name, query in sorted(self.library.queries.items())},
+            'filters': ['start_date', 'end_date', *FILTER_COLUMNS],
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.library.close()
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+async def route(service, method, target):
+    """(status, body bytes, cache status) for one request."""
+    if method not in ('GET', 'HEAD'):
+        raise RequestError(405, f"{method} not allowed; the service is read-only")
+    url = urlsplit(target)
+    path = url.path.rstrip('/') or '/'
+
+    if path in ('/', '/queries'):
+        return 200, json.dumps(service.describe()).encode(), None
+    if path == '/health':
+        return 200, b'{"status": "ok"}', None
+    if path == '/stats':
+        stats = {**service.stats, 'cached_results': len(service._cache)}
+        return 200, json.dumps(stats).encode(), None
+
+    if path in ENDPOINTS:
+        name = ENDPOINTS[path]
+    elif path.startswith('/query/'):
+        name = path[len('/query/'):]
+    else:
+        raise RequestError(404, f"No endpoint {path!r}; see /queries")
+
+    start_date, end_date, filters, params = parse_arguments(url.query)
+    body, cache_status = await service.fetch(name, start_date, end_date, filters, params)
+    return 200, body, cache_status
+
+
+def _response(status, body, keep_alive, cache_status=None, head=False):
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if cache_status:
+        headers.append(f"X-Cache: {cache_status}")
+    head_bytes = ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+    return head_bytes if head else head_bytes + body
+
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one client connection (HTTP/1.1 keep-alive)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_response(400, b'{"error": "malformed request line"}', False))
+                break
+
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            # GET requests carry no body worth reading; drop one if sent
+            try:
+                content_length = int(headers.get('content-length', 0) or 0)
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                # Where the next request starts is unknown, so the connection ends here
+                writer.write(_response(400, b'{"error": "invalid Content-Length"}', False))
+                break
+            if content_length:
+                await reader.readexactly(content_length)
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+            cache_status = None
+            try:
+                status, body, cache_status = await route(service, method, target)
+            except RequestError as exc:
+                status, body = exc.status, json.dumps({'error': str(exc)}).encode()
+            except Exception:
+                # Details stay in the server log; they can include SQL or file paths
+                service.stats['errors'] += 1
+                print(f"❌ {method} {target} failed:", file=sys.stderr)
+                traceback.print_exc()
+                status, body = 500, b'{"error": "internal server error"}'
+
+            writer.write(_response(status, body, keep_alive, cache_status, head=method == 'HEAD'))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host=HOST, port=PORT):
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port)
+
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+def get_json(path, host=HOST, port=PORT, timeout=30):
+    """Blocking client for scripts and notebooks: get_json('/metrics/regions')."""
+    with urlopen(f"http://{host}:{port}{path}", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+async def _bench_worker(host, port, paths, n_requests, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            path = paths[i % len(paths)]
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def benchmark(paths, n_requests=2000, concurrency=50, host=HOST, port=PORT):
+    """Keep-alive load test: `concurrency` clients share n_requests; returns a summary dict."""
+    latencies, statuses = [], Counter()
+    per_client = max(1, n_requests // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _bench_worker(host, port, paths[i % len(paths):] + paths[:i % len(paths)], per_client,
+                      latencies, statuses)
+        for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'statuses': dict(statuses),
+    }
+
+
+async def _run_benchmark(args):
+    service = QueryService(args.db, workers=args.workers, cache_ttl=args.cache_ttl)
+    server = await start_server(service, args.host, args.port)
+    paths = list(ENDPOINTS) + [
+        '/metrics/regions?start_date=2017-01-01',
+        '/customers/top?limit=5&segment=Consumer',
+        '/products/top?limit=20&region=West,East',
+    ]
+    try:
+        result = await benchmark(paths, args.bench, args.concurrency, args.host, args.port)
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+    return result, dict(service.stats)
+
+
+async def _serve(args):
+    service = QueryService(args.db, workers=args.workers, cache_ttl=args.cache_ttl)
+    server = await start_server(service, args.host, args.port)
+    print(f"✅ Serving {len(service.library.queries)} queries on http://{args.host}:{args.port}")
+    print(f"   Endpoints: http://{args.host}:{args.port}/queries (Ctrl+C to stop)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the Superstore database")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--workers', type=int, default=POOL_SIZE, help="Query threads / pooled connections")
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL, help="Seconds a result stays cached")
+    parser.add_argument('--bench', type=int, metavar='N', help="Run N requests against an in-process server and exit")
+    parser.add_argument('--concurrency', type=int, default=50, help="Concurrent clients for --bench")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Error: Database not found at {args.db}")
+        print("Please run 01_database_setup.py first")
+        raise SystemExit(1)
+
+    print("="*80)
+    print("SUPERSTORE QUERY SERVICE")
+    print("="*80)
+
+    if args.bench:
+        result, stats = asyncio.run(_run_benchmark(args))
+        print(f"\n📊 Load test ({args.concurrency} keep-alive clients):")
+        for key, value in result.items():
+            print(f"   {key}: {value}")
+        print(f"\n   Queries run: {stats.get('queries_run', 0)}, "
+              f"cache hits: {stats.get('cache_hits', 0)}, coalesced: {stats.get('coalesced', 0)}")
+        return
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == '__main__':
+    main()
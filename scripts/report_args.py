@@ -0,0 +1,43 @@
+"""
+============================================================================
+FILE: report_args.py
+PURPOSE: One command-line parser per report script (filters, output, shards)
+AUTHOR: yusufehtesham29
+============================================================================
+
+Every report script parses its arguments once, at the top:
+
+    args = parse_report_args("Deep dive into discount strategy")
+    conn = begin_snapshot(report_connection(shard_dir=args.shards))
+    report_filter = ReportFilter.from_args(args).resolve(conn)
+    output = ReportOutput.from_args('discount_analysis', args, report_filter)
+
+The parser holds the report filter flags (report_filters.py), the output
+flags (report_output.py) and --shards (sharding.py), so --help lists all
+of them and exits before the report runs, and a misspelled flag such as
+--regoin is an error instead of being silently ignored. Dates must be
+YYYY-MM-DD with --start-date before --end-date, and --last-days at least 1.
+"""
+
+import argparse
+
+from report_filters import add_filter_arguments, check_filter_arguments
+from report_output import add_output_arguments
+from sharding import add_shard_arguments
+
+
+def report_parser(description=None):
+    """ArgumentParser with every option shared by the report scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    add_filter_arguments(parser)
+    add_output_arguments(parser)
+    add_shard_arguments(parser)
+    return parser
+
+
+def parse_report_args(description=None, argv=None):
+    """Parsed report arguments; exits with a usage error on unknown or invalid ones."""
+    parser = report_parser(description)
+    args = parser.parse_args(argv)
+    check_filter_arguments(parser, args)
+    return args
@@ -0,0 +1,231 @@
+"""
+============================================================================
+FILE: report_filters.py
+PURPOSE: One date-range / dimension filter applied to every report query
+AUTHOR: yusufehtesham29
+============================================================================
+
+Scripts 02-05 accept the same filter flags:
+
+    python scripts/02_sql_analysis.py --last-days 30 --region West
+    python scripts/04_time_series_analysis.py --start-date 2017-01-01 --end-date 2017-07-01
+    python scripts/05_customer_cohort_rfm.py --segment Consumer --category Furniture Technology
+
+--start-date is inclusive and --end-date exclusive; --last-days counts
+back from the latest order date in the data. The flags are parsed by the
+report's one parser (report_args.py) and read with ReportFilter.from_args.
+
+The filter is pushed down into SQL: every `FROM superstore` in a query
+becomes `FROM (SELECT * FROM superstore WHERE ...) AS superstore`, which
+SQLite flattens into the outer query. The predicates are plain range and
+equality tests on order_date / region / category, so the loader's
+idx_order_date, idx_region and idx_category indexes (or DuckDB's min/max
+row-group pruning on the sorted snapshot) limit the scan to the matching
+rows. Each combination of filtered columns has a fixed SQL text, so
+prepared statements are reused across values.
+"""
+
+import argparse
+import re
+from datetime import date, timedelta
+
+import pandas as pd
+
+# Columns that may be filtered on
+FILTER_COLUMNS = ('region', 'state', 'city', 'segment', 'category', 'sub_category',
+                  'ship_mode', 'customer_id', 'product_id')
+# Exposed as command-line flags on the report scripts
+CLI_DIMENSIONS = ('region', 'category', 'segment')
+
+_FROM_SUPERSTORE_RE = re.compile(r"\bFROM\s+superstore\b", re.IGNORECASE)
+
+
+def filter_shape(start_date=None, end_date=None, filters=None):
+    """Hashable description of which predicates a filter needs (not their values)."""
+    return (start_date is not None, end_date is not None,
+            tuple((col, len(v) if isinstance(v, (list, tuple, set)) else None)
+                  for col, v in sorted((filters or {}).items())))
+
+
+def filter_params(start_date=None, end_date=None, filters=None):
+    """Named parameter values matching the predicates of push_down()."""
+    values = {}
+    if start_date is not None:
+        values['_start_date'] = start_date
+    if end_date is not None:
+        values['_end_date'] = end_date
+    for col, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            for i, v in enumerate(value):
+                values[f'_{col}_{i}'] = v
+        else:
+            values[f'_{col}'] = value
+    return values
+
+
+def push_down(sql, shape):
+    """Replace every FROM superstore in sql with a filtered subquery for this shape."""
+    has_start, has_end, columns = shape
+    predicates = []
+    if has_start:
+        predicates.append("order_date >= :_start_date")
+    if has_end:
+        predicates.append("order_date < :_end_date")
+    for col, n_values in columns:
+        if col not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter on {col!r}; choose from {FILTER_COLUMNS}")
+        if n_values is None:
+            predicates.append(f"{col} = :_{col}")
+        else:
+            placeholders = ', '.join(f":_{col}_{i}" for i in range(n_values)) or 'NULL'
+            predicates.append(f"{col} IN ({placeholders})")
+    if not predicates:
+        return sql
+    subquery = f"FROM (SELECT * FROM superstore WHERE {' AND '.join(predicates)}) AS superstore"
+    return _FROM_SUPERSTORE_RE.sub(subquery, sql)
+
+
+class ReportFilter:
+    """Date range plus dimension filters shared by every query of a report."""
+
+    def __init__(self, start_date=None, end_date=None, last_days=None, **dimensions):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.last_days = last_days
+        bad = set(dimensions) - set(FILTER_COLUMNS)
+        if bad:
+            raise ValueError(f"Cannot filter on {sorted(bad)}; choose from {FILTER_COLUMNS}")
+        # Single values stay scalars; several values become an IN list
+        self.dimensions = {}
+        for col, value in dimensions.items():
+            if value is None or (isinstance(value, (list, tuple)) and not value):
+                continue
+            if isinstance(value, (list, tuple)) and len(value) == 1:
+                value = value[0]
+            self.dimensions[col] = list(value) if isinstance(value, (list, tuple)) else value
+        self._sql = {}
+
+    @classmethod
+    def from_args(cls, args):
+        """ReportFilter from parsed report arguments (see report_args.py)."""
+        return cls(args.start_date, args.end_date, args.last_days,
+                   **{col: getattr(args, col) for col in CLI_DIMENSIONS})
+
+    @property
+    def active(self):
+        return bool(self.start_date or self.end_date or self.last_days or self.dimensions)
+
+    def resolve(self, conn):
+        """Turn --last-days into a concrete start date (relative to the latest order)."""
+        if self.last_days:
+            latest = conn.execute("SELECT MAX(order_date) FROM superstore").fetchone()[0]
+            latest = date.fromisoformat(str(latest)[:10])
+            self.start_date = (latest - timedelta(days=self.last_days - 1)).isoformat()
+            self.last_days = None
+        return self
+
+    def require_rows(self, n_rows):
+        """Stop the report (exit 1) when the filter leaves nothing to analyze."""
+        if not n_rows:
+            print(f"\n❌ No rows match the filter ({self.describe()})")
+            raise SystemExit(1)
+
+    def describe(self):
+        parts = []
+        if self.start_date or self.end_date:
+            parts.append(f"order_date {self.start_date or '...'} to {self.end_date or '...'} (end exclusive)")
+        if self.last_days:
+            parts.append(f"last {self.last_days} days")
+        for col, value in self.dimensions.items():
+            shown = ', '.join(value) if isinstance(value, list) else value
+            parts.append(f"{col} = {shown}")
+        return '; '.join(parts) if parts else 'none (full history)'
+
+    def kwargs(self):
+        """Keyword arguments for QueryLibrary calls."""
+        return {'start_date': self.start_date, 'end_date': self.end_date,
+                'filters': dict(self.dimensions)}
+
+    def apply(self, sql):
+        """(sql, named params) with the filter pushed into every FROM superstore."""
+        shape = filter_shape(self.start_date, self.end_date, self.dimensions)
+        key = (sql, shape)
+        if key not in self._sql:
+            self._sql[key] = push_down(sql, shape)
+        return self._sql[key], filter_params(self.start_date, self.end_date, self.dimensions)
+
+    def read_sql(self, sql, conn, params=None):
+        """pd.read_sql_query with the filter applied; params must be a dict if given."""
+        sql, values = self.apply(sql)
+        values.update(params or {})
+        return pd.read_sql_query(sql, conn, params=values)
+
+    def where_clause(self, columns=None):
+        """(SQL predicate, positional params) for functions with a where= hook.
+
+        columns limits the dimension predicates to the columns the target
+        table has; check covers() first when a table lacks some of them.
+        """
+        predicates, params = [], []
+        if self.start_date:
+            predicates.append("order_date >= ?")
+            params.append(self.start_date)
+        if self.end_date:
+            predicates.append("order_date < ?")
+            params.append(self.end_date)
+        for col, value in self.dimensions.items():
+            if columns is not None and col not in columns:
+                continue
+            if isinstance(value, list):
+                predicates.append(f"{col} IN ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            else:
+                predicates.append(f"{col} = ?")
+                params.append(value)
+        return (' AND '.join(predicates) or None), params
+
+    def covers(self, columns):
+        """True when every dimension filter is on one of the given columns."""
+        return set(self.dimensions) <= set(columns)
+
+
+def iso_date(value):
+    """argparse type: an exact YYYY-MM-DD date, kept as text (order_date is compared as text)."""
+    try:
+        # fromisoformat alone also takes '20170101', which compares wrongly in SQL
+        valid = date.fromisoformat(value).isoformat() == value
+    except ValueError:
+        valid = False
+    if not valid:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}")
+    return value
+
+
+def positive_int(value):
+    """argparse type: an integer >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a whole number of at least 1, got {value!r}")
+    return number
+
+
+def add_filter_arguments(parser):
+    group = parser.add_argument_group('report filters')
+    group.add_argument('--start-date', type=iso_date, help="First order date to include (YYYY-MM-DD)")
+    group.add_argument('--end-date', type=iso_date,
+                       help="Order dates before this one are included (YYYY-MM-DD, exclusive)")
+    group.add_argument('--last-days', type=positive_int, help="Only the last N days up to the latest order")
+    for col in CLI_DIMENSIONS:
+        group.add_argument(f'--{col.replace("_", "-")}', nargs='+', dest=col, metavar=col.upper(),
+                           help=f"Only these {col} values")
+    return parser
+
+
+def check_filter_arguments(parser, args):
+    """Usage error (exit 2) for a date range that cannot match anything."""
+    if args.start_date and args.end_date and args.start_date >= args.end_date:
+        parser.error(f"--end-date {args.end_date} must be after --start-date {args.start_date} "
+                     f"(the end date is exclusive)")
@@ -0,0 +1,257 @@
+"""
+============================================================================
+FILE: report_output.py
+PURPOSE: Machine-readable report sections with a manifest and run diffs
+AUTHOR: yusufehtesham29
+============================================================================
+
+Scripts 02-05 hand every result table to a ReportOutput instead of only
+printing it:
+
+    python scripts/02_sql_analysis.py --output-dir reports --formats json csv
+    python scripts/05_customer_cohort_rfm.py --output-dir reports --no-print-tables
+
+Each run writes reports/<report>/<run id>/ with one file per section and
+format plus manifest.json. Every section is fingerprinted (SHA-256 of its
+CSV form) and compared with the previous run of the same report:
+
+    added / changed   files written in this run's directory
+    unchanged         nothing written; the manifest points at the run
+                      that holds the files (publish only what changed)
+    removed           listed in the manifest
+
+Only runs with the same filters are compared: reports/<report>/LATEST
+names the newest unfiltered run and LATEST-<hash of the filters> the
+newest run of each filtered variant, so a --region West run never
+becomes the baseline of a full-history run. Charts ask needs_chart()
+and are only re-rendered when their sections changed or the image is not
+the one the previous run drew (missing, or rewritten since). Without
+--output-dir nothing is written and every chart is drawn; --no-charts
+skips them all.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+FORMATS = ('json', 'csv', 'parquet')
+DEFAULT_FORMATS = ('json', 'csv')
+OUTPUT_DIR_ENV = 'SUPERSTORE_REPORT_DIR'
+MANIFEST = 'manifest.json'
+LATEST = 'LATEST'
+UNFILTERED = 'none (full history)'
+
+
+def fingerprint(df):
+    """Content hash of a table: same rows, columns and values -> same hash."""
+    return hashlib.sha256(df.to_csv(index=False).encode('utf-8')).hexdigest()
+
+
+def _filter_key(filters):
+    """Filter description with "no filter object" and "no filters" treated alike."""
+    return UNFILTERED if filters is None else filters
+
+
+def _write(df, path, fmt):
+    if fmt == 'json':
+        df.to_json(path, orient='records', date_format='iso', indent=1)
+    elif fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {FORMATS}")
+
+
+class ReportOutput:
+    """Sections of one report run: printed, written, and diffed with the last run."""
+
+    def __init__(self, report, output_dir=None, formats=DEFAULT_FORMATS, print_tables=True,
+                 max_print_rows=None, filters=None, draw_charts=True):
+        self.report = report
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.print_tables = print_tables
+        self.max_print_rows = max_print_rows
+        self.filters = filters
+        self.draw_charts = draw_charts
+        self.sections = {}
+        self.charts = []
+
+        bad = set(self.formats) - set(FORMATS)
+        if bad:
+            raise ValueError(f"Unknown formats {sorted(bad)}; choose from {FORMATS}")
+        if 'parquet' in self.formats:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as exc:
+                raise ImportError("Parquet output needs the `pyarrow` package (pip install pyarrow)") from exc
+
+        self.run_id = None
+        self.previous = {}
+        if self.enabled:
+            self.report_dir = os.path.join(output_dir, report)
+            self.previous = self._load_previous()
+            self.run_id = self._new_run_id()
+            os.makedirs(os.path.join(self.report_dir, self.run_id))
+
+    @classmethod
+    def from_args(cls, report, args, report_filter=None):
+        """ReportOutput from parsed report arguments (see report_args.py)."""
+        return cls(
+            report,
+            output_dir=args.output_dir or os.environ.get(OUTPUT_DIR_ENV) or None,
+            formats=args.formats,
+            print_tables=not args.no_print_tables,
+            max_print_rows=args.max_print_rows,
+            filters=report_filter.describe() if report_filter is not None else None,
+            draw_charts=not args.no_charts,
+        )
+
+    @property
+    def enabled(self):
+        return self.output_dir is not None
+
+    @property
+    def latest_path(self):
+        """LATEST file of this report and filter combination."""
+        if _filter_key(self.filters) == UNFILTERED:
+            return os.path.join(self.report_dir, LATEST)
+        key = hashlib.sha256(self.filters.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.report_dir, f"{LATEST}-{key}")
+
+    def _load_previous(self):
+        latest = self.latest_path
+        if not os.path.exists(latest):
+            return {}
+        with open(latest) as f:
+            run_id = f.read().strip()
+        path = os.path.join(self.report_dir, run_id, MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            previous = json.load(f)
+        # Never diff against a run of other filters
+        if _filter_key(previous.get('filters')) != _filter_key(self.filters):
+            return {}
+        return previous
+
+    def _new_run_id(self):
+        base = datetime.now().strftime('%Y%m%dT%H%M%S')
+        run_id, n = base, 1
+        while os.path.exists(os.path.join(self.report_dir, run_id)):
+            run_id = f"{base}-{n}"
+            n += 1
+        return run_id
+
+    # ------------------------------------------------------------------
+    # Sections
+    # ------------------------------------------------------------------
+
+    def table(self, name, df, shown=None):
+        """Record section `name`; print `shown` (default df) unless printing is off.
+
+        The whole df is written, even when only part of it is printed.
+        """
+        if name in self.sections:
+            raise ValueError(f"Section {name!r} is already part of this report")
+        shown = df if shown is None else shown
+        if self.print_tables:
+            if self.max_print_rows is not None and len(shown) > self.max_print_rows:
+                print(shown.head(self.max_print_rows).to_string(index=False))
+                print(f"   ... {len(shown) - self.max_print_rows:,} more rows")
+            else:
+                print(shown.to_string(index=False))
+        else:
+            print(f"   ↳ {name}: {len(df):,} rows")
+
+        entry = {'rows': len(df), 'columns': [str(c) for c in df.columns], 'sha256': fingerprint(df)}
+        self.sections[name] = entry
+        if not self.enabled:
+            return df
+
+        before = self.previous.get('sections', {}).get(name)
+        reusable = (before is not None and before['sha256'] == entry['sha256']
+                    and set(self.formats) <= set(before['files']))
+        if reusable:
+            entry.update(status='unchanged', run=before['run'],
+                         files={fmt: before['files'][fmt] for fmt in self.formats})
+        else:
+            files = {}
+            for fmt in self.formats:
+                files[fmt] = f"{name}.{fmt}"
+                _write(df, os.path.join(self.report_dir, self.run_id, files[fmt]), fmt)
+            entry.update(status='changed' if before else 'added', run=self.run_id, files=files)
+        return df
+
+    def changed(self, *names):
+        """True when any of these sections differs from the previous run."""
+        if not self.enabled:
+            return True
+        return any(self.sections.get(name, {}).get('status') != 'unchanged' for name in names)
+
+    def needs_chart(self, path, *names):
+        """Render the chart at path only if its data changed or the file was replaced since."""
+        if not self.draw_charts:
+            return False
+        self.charts.append(path)
+        drawn = self.previous.get('charts', {}).get(path)
+        # The image must still be the one the previous run drew (not e.g. a run without output)
+        if (self.changed(*names) or drawn is None or not os.path.exists(path)
+                or os.path.getmtime(path) != drawn['mtime']):
+            return True
+        print(f"\n⏭️  {os.path.basename(path)} is up to date (sections unchanged)")
+        return False
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def finish(self):
+        """Write the manifest, point this filter's LATEST at the run and print the diff summary."""
+        if not self.enabled:
+            return None
+        removed = sorted(set(self.previous.get('sections', {})) - set(self.sections))
+        charts = {path: {'mtime': os.path.getmtime(path)} for path in self.charts if os.path.exists(path)}
+        manifest = {
+            'report': self.report,
+            'run': self.run_id,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'previous_run': self.previous.get('run'),
+            'filters': self.filters,
+            'formats': list(self.formats),
+            'sections': self.sections,
+            'removed': removed,
+            'charts': charts,
+        }
+        run_dir = os.path.join(self.report_dir, self.run_id)
+        with open(os.path.join(run_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        # Readers of LATEST never see a half-written name
+        latest = self.latest_path
+        with open(latest + '.tmp', 'w') as f:
+            f.write(self.run_id + '\n')
+        os.replace(latest + '.tmp', latest)
+
+        statuses = [entry['status'] for entry in self.sections.values()]
+        print(f"\n📦 Report output: {run_dir}")
+        print(f"   • {statuses.count('added')} added, {statuses.count('changed')} changed, "
+              f"{statuses.count('unchanged')} unchanged, {len(removed)} removed sections")
+        republish = [name for name, entry in self.sections.items() if entry['status'] != 'unchanged']
+        if republish:
+            print(f"   • To publish: {', '.join(republish)}")
+        return manifest
+
+
+def add_output_arguments(parser):
+    group = parser.add_argument_group('report output')
+    group.add_argument('--output-dir', help=f"Write every section under DIR/<report>/<run>/ (or ${OUTPUT_DIR_ENV})")
+    group.add_argument('--formats', nargs='+', choices=FORMATS, default=list(DEFAULT_FORMATS),
+                       help="File formats to write")
+    group.add_argument('--no-print-tables', action='store_true',
+                       help="Print one line per section instead of the whole table")
+    group.add_argument('--max-print-rows', type=int, help="Print at most N rows of each table")
+    group.add_argument('--no-charts', action='store_true',
+                       help="Text only: skip every chart (matplotlib is never imported)")
+    return parser
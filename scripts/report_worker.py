@@ -0,0 +1,310 @@
+"""
+============================================================================
+FILE: report_worker.py
+PURPOSE: Pre-warmed report worker and import-time budget check
+AUTHOR: yusufehtesham29
+============================================================================
+
+Every report script pays interpreter startup plus ~0.3 s of pandas /
+NumPy imports (more with matplotlib) before it runs a query. A cron job
+running 02-05 pays that four times. The worker pays it once:
+
+    python scripts/report_worker.py --serve &
+    python scripts/report_worker.py --run 02_sql_analysis.py 05_customer_cohort_rfm.py -- --region West
+
+--serve imports pandas, NumPy, the project modules and (if installed)
+matplotlib with the Agg backend, then listens on a local Unix socket.
+Each job is run in a child forked from that warm process, so it starts
+with everything imported but with fresh module state, and its own
+working directory, arguments and SUPERSTORE_* environment. Output is
+streamed back to the client, which exits with the script's exit code.
+The client itself only imports the standard library; with no worker
+listening it runs the scripts in a normal subprocess instead.
+
+--check-imports measures each report's top-level imports with
+`python -X importtime` and compares them with IMPORT_BUDGET_MS;
+tests/test_report_worker.py runs the same check with the test suite.
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOCKET_ENV = 'SUPERSTORE_WORKER_SOCKET'
+DEFAULT_SOCKET = os.path.join('/tmp', f"superstore-reports-{os.getuid()}.sock")
+ENV_PREFIX = 'SUPERSTORE_'
+EXIT_MARKER = b'\x00superstore-exit:'
+
+REPORT_SCRIPTS = ('02_sql_analysis.py', '03_discount_analysis.py',
+                  '04_time_series_analysis.py', '05_customer_cohort_rfm.py')
+_SCRIPT_RE = re.compile(r"^\d\d_\w+\.py$")
+
+# Imported once by --serve; every forked job starts with them loaded
+PRELOAD = ('numpy', 'pandas', 'sqlite3', 'clv_models', 'entity_store', 'geo_hierarchy',
+           'product_summary', 'query_library', 'report_args', 'report_filters', 'report_output',
+           'rolling_metrics', 'shadow_db', 'sharding', 'shipping_sketches')
+
+# Top-level import time per report (ms, cumulative, -X importtime). matplotlib is
+# imported lazily by the chart blocks, so it is not part of these.
+IMPORT_BUDGET_MS = {
+    '02_sql_analysis.py': 600,
+    '03_discount_analysis.py': 600,
+    '04_time_series_analysis.py': 600,
+    '05_customer_cohort_rfm.py': 600,
+}
+
+
+def socket_path():
+    return os.environ.get(SOCKET_ENV, DEFAULT_SOCKET)
+
+
+def script_path(name):
+    name = os.path.basename(name)
+    if not _SCRIPT_RE.match(name) or not os.path.exists(os.path.join(SCRIPTS_DIR, name)):
+        raise ValueError(f"Unknown report script {name!r}")
+    return os.path.join(SCRIPTS_DIR, name)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def preload(modules=PRELOAD):
+    """Import everything a report needs; returns seconds spent."""
+    start = time.perf_counter()
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    for module in modules:
+        __import__(module)
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot  # noqa: F401
+    except ImportError:
+        pass  # text-only reports still work
+    return time.perf_counter() - start
+
+
+def _run_job(conn, job):
+    """Forked child: run one report script with its output on the client socket."""
+    import runpy
+    import traceback
+
+    code = 0
+    try:
+        fd = conn.fileno()
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.chdir(job['cwd'])
+        for key in [k for k in os.environ if k.startswith(ENV_PREFIX)]:
+            del os.environ[key]
+        os.environ.update(job.get('env', {}))
+        path = script_path(job['script'])
+        sys.argv = [path] + list(job.get('args', []))
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except SystemExit as exc:
+            if isinstance(exc.code, int):
+                code = exc.code
+            elif exc.code is not None:
+                print(exc.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        conn.sendall(EXIT_MARKER + str(code).encode() + b'\n')
+    finally:
+        os._exit(0)
+
+
+def _read_job(conn, limit=1 << 20):
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk or len(data) > limit:
+            raise ValueError("incomplete job request")
+        data += chunk
+    return json.loads(data)
+
+
+def serve(path=None):
+    """Listen for jobs on a Unix socket; one forked child per job."""
+    path = path or socket_path()
+    seconds = preload()
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen()
+    # Finished children are reaped automatically; SIGTERM removes the socket on the way out
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"✅ Report worker ready on {path} (imports took {seconds:.2f}s, pid {os.getpid()})", flush=True)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            try:
+                conn.settimeout(10)
+                job = _read_job(conn)
+                conn.settimeout(None)
+                script_path(job['script'])
+            except (ValueError, KeyError, OSError) as exc:
+                conn.sendall(f"❌ Bad job: {exc}\n".encode() + EXIT_MARKER + b'2\n')
+                conn.close()
+                continue
+            if os.fork() == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                _run_job(conn, job)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+def submit(script, args=(), path=None, out=None):
+    """Run a script on the worker, streaming its output; returns the exit code.
+
+    Raises ConnectionError when no worker is listening.
+    """
+    out = out or sys.stdout.buffer
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path or socket_path())
+    except (FileNotFoundError, ConnectionRefusedError) as exc:
+        client.close()
+        raise ConnectionError(str(exc)) from None
+
+    job = {'script': script, 'args': list(args), 'cwd': os.getcwd(),
+           'env': {k: v for k, v in os.environ.items() if k.startswith(ENV_PREFIX)}}
+    with client:
+        client.sendall(json.dumps(job).encode() + b'\n')
+        # Hold back enough bytes that the exit marker is never split across writes
+        pending = b''
+        hold = len(EXIT_MARKER) + 16
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            pending += chunk
+            if len(pending) > hold:
+                out.write(pending[:-hold])
+                out.flush()
+                pending = pending[-hold:]
+    output, marker, code = pending.rpartition(EXIT_MARKER)
+    if not marker:
+        out.write(pending)
+        out.flush()
+        return 1  # the job died without reporting
+    out.write(output)
+    out.flush()
+    return int(code.strip() or 1)
+
+
+def run_local(script, args=()):
+    """Fallback without a worker: a normal interpreter per script."""
+    return subprocess.call([sys.executable, script_path(script)] + list(args))
+
+
+def run_reports(scripts, args=(), path=None):
+    """Run each script (worker if available, else a subprocess); returns the worst exit code."""
+    worst = 0
+    for script in scripts:
+        try:
+            code = submit(script, args, path)
+        except ConnectionError:
+            code = run_local(script, args)
+        worst = max(worst, code)
+    return worst
+
+
+# ============================================================================
+# IMPORT BUDGET
+# ============================================================================
+
+def top_level_imports(path):
+    """Source of the module-level import statements of a script."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return '\n'.join(ast.unparse(node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure_import_ms(code):
+    """Cumulative top-level import time of `code` (ms) from `python -X importtime`."""
+    env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, env=env, check=True)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under their parent and already counted
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def check_imports(budgets=IMPORT_BUDGET_MS, repeat=3):
+    """Best-of-`repeat` import time per report against its budget."""
+    rows = []
+    for script, budget in budgets.items():
+        code = top_level_imports(script_path(script))
+        ms = min(measure_import_ms(code) for _ in range(repeat))
+        rows.append((script, ms, budget))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warmed report worker")
+    parser.add_argument('--serve', action='store_true', help="Start the worker (foreground)")
+    parser.add_argument('--run', nargs='+', metavar='SCRIPT', help="Run report scripts via the worker")
+    parser.add_argument('--check-imports', action='store_true', help="Check the import-time budgets")
+    parser.add_argument('--socket', help=f"Socket path (default ${SOCKET_ENV} or {DEFAULT_SOCKET})")
+    argv = sys.argv[1:]
+    # Everything after -- goes to the report scripts
+    script_args = argv[argv.index('--') + 1:] if '--' in argv else []
+    args = parser.parse_args(argv[:argv.index('--')] if '--' in argv else argv)
+
+    if args.serve:
+        serve(args.socket)
+    elif args.run:
+        raise SystemExit(run_reports(args.run, script_args, args.socket))
+    elif args.check_imports:
+        print("="*80)
+        print("IMPORT-TIME BUDGET (python -X importtime, best of 3)")
+        print("="*80)
+        failed = 0
+        for script, ms, budget in check_imports():
+            status = '✅' if ms <= budget else '❌'
+            failed += ms > budget
+            print(f"   {status} {script:<30} {ms:7.1f} ms  (budget {budget} ms)")
+        if failed:
+            raise SystemExit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
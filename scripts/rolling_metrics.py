@@ -0,0 +1,179 @@
+"""
+============================================================================
+FILE: rolling_metrics.py
+PURPOSE: Running totals, rolling windows and MoM/YoY growth from prefix sums
+AUTHOR: yusufehtesham29
+============================================================================
+
+The daily series is aggregated once in SQL, laid out as a dense
+(slice x calendar day) matrix and turned into a prefix-sum matrix with a
+single cumulative pass. Every running total, N-day rolling sum/average
+and monthly total is then a difference of two prefix sums, so the whole
+report is O(n) no matter how many windows are requested.
+
+Usage from a script (run from the project root):
+    from rolling_metrics import load_daily_series, rolling_metrics
+    daily = load_daily_series(conn, dimensions=['region'])
+    df_rolling = rolling_metrics(daily, dimensions=['region'])
+
+Usage from the notebook:
+    import sys; sys.path.append('../scripts')
+    from rolling_metrics import load_daily_series, monthly_growth
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (7, 30, 90)
+
+
+def load_daily_series(conn, dimensions=(), metrics=('sales', 'profit'), where=None, params=()):
+    """Aggregate superstore to one row per (dimension slice, calendar day)."""
+    dimensions = list(dimensions)
+    select_dims = ''.join(f'{d}, ' for d in dimensions)
+    sums = ', '.join(f'SUM({m}) AS {m}' for m in metrics)
+    where_sql = f'WHERE {where}' if where else ''
+
+    query = f"""
+    SELECT
+        {select_dims}DATE(order_date) AS order_date,
+        {sums}
+    FROM superstore
+    {where_sql}
+    GROUP BY {select_dims}DATE(order_date)
+    ORDER BY {select_dims}order_date;
+    """
+    daily = pd.read_sql_query(query, conn, params=params)
+    daily['order_date'] = pd.to_datetime(daily['order_date'])
+    return daily
+
+
+def _dense_matrix(daily, dimensions, value_col, start_date=None, end_date=None, whole_months=False):
+    """Lay the daily series out as a zero-filled (slice x day) matrix.
+
+    The calendar starts on the first day of the earliest month (or on
+    start_date) so month boundaries line up, and stops on the day before
+    end_date (exclusive, as in the report filters) or, without one, on
+    the last day with data. whole_months extends that last case to the
+    end of the month, so only the filter ever cuts a month short.
+    """
+    dimensions = list(dimensions)
+    first = (pd.Timestamp(start_date) if start_date
+             else daily['order_date'].min().to_period('M').to_timestamp())
+    if end_date:
+        last = pd.Timestamp(end_date) - pd.Timedelta(days=1)
+    elif whole_months:
+        last = daily['order_date'].max().to_period('M').to_timestamp(how='end').normalize()
+    else:
+        last = daily['order_date'].max().normalize()
+    calendar = pd.date_range(first, last, freq='D')
+    daily = daily[(daily['order_date'] >= first) & (daily['order_date'] <= last)]
+
+    if dimensions:
+        slice_codes, slice_keys = pd.MultiIndex.from_frame(daily[dimensions]).factorize()
+        keys = slice_keys.to_frame(index=False)
+        keys.columns = dimensions
+    else:
+        slice_codes = np.zeros(len(daily), dtype=np.int64)
+        keys = pd.DataFrame(index=[0])
+
+    day_codes = (daily['order_date'].values - calendar[0].to_datetime64()) // np.timedelta64(1, 'D')
+
+    values = np.zeros((len(keys), len(calendar)))
+    np.add.at(values, (slice_codes, day_codes.astype(np.int64)), daily[value_col].to_numpy(dtype=float))
+    return keys, calendar, values
+
+
+def _prefix_sums(values):
+    """Prefix-sum matrix with a leading zero column: P[:, j] = sum(values[:, :j])."""
+    prefix = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    return prefix
+
+
+def _growth_percent(current, previous):
+    """Percentage change, NaN where the previous period has no value."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (current - previous) / np.abs(previous) * 100
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+
+def rolling_metrics(daily, dimensions=(), value_col='sales', windows=DEFAULT_WINDOWS,
+                    start_date=None, end_date=None):
+    """Running total plus N-day rolling sums and averages for every slice.
+
+    Days without orders count as zero, so an N-day window always spans N
+    calendar days (fewer at the start of the history). start_date /
+    end_date are the report filter's bounds, if any.
+    """
+    dimensions = list(dimensions)
+    keys, calendar, values = _dense_matrix(daily, dimensions, value_col, start_date, end_date)
+    prefix = _prefix_sums(values)
+    n_slices, n_days = values.shape
+
+    end = np.arange(1, n_days + 1)
+    columns = {
+        value_col: values.ravel(),
+        'running_total': prefix[:, 1:].ravel(),
+    }
+    for window in windows:
+        start = np.maximum(end - window, 0)
+        window_sum = prefix[:, end] - prefix[:, start]
+        columns[f'rolling_{window}d_sum'] = window_sum.ravel()
+        columns[f'rolling_{window}d_avg'] = (window_sum / (end - start)).ravel()
+
+    result = keys.loc[np.repeat(np.arange(n_slices), n_days)].reset_index(drop=True)
+    if not dimensions:
+        result = pd.DataFrame(index=range(n_slices * n_days))
+    result['order_date'] = np.tile(calendar.values, n_slices)
+    for name, column in columns.items():
+        result[name] = column
+    return result
+
+
+def monthly_growth(daily, dimensions=(), value_col='sales', start_date=None, end_date=None):
+    """Monthly totals with month-over-month and year-over-year growth.
+
+    Month totals are read off the same prefix sums at month boundaries, so
+    each growth figure is a couple of array lookups rather than a LAG().
+    Without an end_date the last month runs to its last calendar day (the
+    data ending on the 30th still leaves a full month). A month that
+    start_date or end_date cuts short has complete_month False, and growth
+    involving it is left empty rather than comparing a part-month with a
+    full one.
+    """
+    dimensions = list(dimensions)
+    keys, calendar, values = _dense_matrix(daily, dimensions, value_col, start_date, end_date,
+                                           whole_months=True)
+    prefix = _prefix_sums(values)
+    n_slices = values.shape[0]
+
+    months = calendar.to_period('M')
+    boundaries = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    boundaries = np.r_[boundaries, len(calendar)]
+    month_totals = prefix[:, boundaries[1:]] - prefix[:, boundaries[:-1]]
+    n_months = month_totals.shape[1]
+
+    first_days = calendar[boundaries[:-1]]
+    last_days = calendar[boundaries[1:] - 1]
+    complete = np.asarray(first_days.is_month_start & last_days.is_month_end)
+    totals = np.where(complete, month_totals, np.nan)
+
+    previous_month = np.full_like(month_totals, np.nan)
+    previous_month[:, 1:] = month_totals[:, :-1]
+    previous_year = np.full_like(month_totals, np.nan)
+    previous_year[:, 12:] = totals[:, :-12]
+    previous_complete = np.full_like(month_totals, np.nan)
+    previous_complete[:, 1:] = totals[:, :-1]
+
+    result = keys.loc[np.repeat(np.arange(n_slices), n_months)].reset_index(drop=True)
+    if not dimensions:
+        result = pd.DataFrame(index=range(n_slices * n_months))
+    result['year_month'] = np.tile(months[boundaries[:-1]].astype(str), n_slices)
+    result['complete_month'] = np.tile(complete, n_slices)
+    result[f'monthly_{value_col}'] = month_totals.ravel()
+    result[f'previous_month_{value_col}'] = previous_month.ravel()
+    result['mom_growth_percent'] = _growth_percent(totals, previous_complete).ravel()
+    result['yoy_growth_percent'] = _growth_percent(totals, previous_year).ravel()
+    return result
@@ -0,0 +1,128 @@
+"""
+============================================================================
+FILE: shadow_db.py
+PURPOSE: Load into a shadow database and swap it in atomically (WAL)
+AUTHOR: yusufehtesham29
+============================================================================
+
+Loaders never touch the live database while they work:
+
+    1. open_shadow() creates database/superstore.db.loading; the fact
+       table, indexes and derived tables are built there (a reloaded
+       table is never half-visible, and the shadow needs no journal).
+       Appends start from a copy of the live database; full loads start
+       empty and carry_over() only the tables they do not rebuild.
+    2. swap_in() copies the finished shadow into the live database with
+       SQLite's backup API as ONE write transaction, then deletes it.
+
+The live database runs in WAL mode, so that single transaction neither
+waits for readers nor blocks them. A report that opened a snapshot with
+begin_snapshot() keeps reading the pre-load data until it finishes; the
+next run sees the new data. Swapping the file itself (os.replace) is
+avoided because a -wal file left by the old database would be replayed
+onto the new one.
+"""
+
+import os
+import sqlite3
+
+SHADOW_SUFFIX = '.loading'
+BUSY_TIMEOUT = 60
+
+
+def shadow_path(db_path):
+    return db_path + SHADOW_SUFFIX
+
+
+def enable_wal(conn):
+    """Persistent WAL journal: readers and the one writer run concurrently."""
+    # Unqualified, journal_mode applies to every attached database and fails on read-only ones
+    mode = conn.execute("PRAGMA main.journal_mode = WAL").fetchone()[0]
+    # With WAL, NORMAL only syncs at checkpoints and is still corruption-safe
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return mode
+
+
+def open_shadow(db_path, copy_live=False):
+    """Fresh shadow database next to db_path; copy_live starts it from the live data (appends)."""
+    path = shadow_path(db_path)
+    for stale in (path, path + '-journal'):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    shadow = sqlite3.connect(path)
+    if os.path.exists(db_path):
+        live = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+        if copy_live:
+            live.backup(shadow)
+        else:
+            # A WAL destination cannot change page size, so the shadow must match
+            page_size = live.execute("PRAGMA page_size").fetchone()[0]
+            shadow.execute(f"PRAGMA page_size = {int(page_size)}")
+        live.close()
+    # Nothing reads the shadow until it is complete; a crash just leaves a file to delete
+    shadow.execute("PRAGMA journal_mode = OFF")
+    shadow.execute("PRAGMA synchronous = OFF")
+    return shadow
+
+
+def carry_over(shadow, db_path):
+    """Copy live tables the load did not build (e.g. customer_clv) into the shadow.
+
+    A full load starts from an empty shadow, so tables written by other
+    scripts would otherwise vanish at swap_in(). Only those tables are
+    copied, never the fact table being replaced.
+    """
+    if not os.path.exists(db_path):
+        return []
+    shadow.execute("ATTACH DATABASE ? AS live", (f"file:{os.path.abspath(db_path)}?mode=ro",))
+    try:
+        built = {r[0] for r in shadow.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+        tables = [(name, sql) for name, sql in shadow.execute(
+            "SELECT name, sql FROM live.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+            if name not in built]
+        for name, sql in tables:
+            shadow.execute(sql)
+            shadow.execute(f'INSERT INTO main."{name}" SELECT * FROM live."{name}"')
+            for (index_sql,) in shadow.execute(
+                    "SELECT sql FROM live.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (name,)).fetchall():
+                shadow.execute(index_sql)
+        shadow.commit()
+    finally:
+        shadow.execute("DETACH DATABASE live")
+    return [name for name, _ in tables]
+
+
+def swap_in(shadow, db_path, timeout=BUSY_TIMEOUT):
+    """Replace the live database's contents with the shadow in one transaction."""
+    shadow.commit()
+    live = sqlite3.connect(db_path, timeout=timeout)
+    try:
+        enable_wal(live)
+        shadow.backup(live)
+        # Fold the copy back into the main file where no reader still needs the old pages
+        live.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    finally:
+        live.close()
+    shadow.close()
+    os.remove(shadow_path(db_path))
+
+
+def begin_snapshot(conn):
+    """Pin conn to the current version of the database until commit/rollback.
+
+    Every later query on conn sees the same data, even if a load is
+    swapped in meanwhile (WAL). Returns conn.
+    """
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+        # A rollback-journal read lock would block every writer until the report ends
+        try:
+            enable_wal(conn)
+        except sqlite3.OperationalError:
+            pass  # another connection is busy; switch on a later run
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+        # The snapshot starts at the first read, so take it now
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    return conn
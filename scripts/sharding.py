@@ -0,0 +1,491 @@
+"""
+============================================================================
+FILE: sharding.py
+PURPOSE: Sharded multi-database mode with scatter-gather aggregation
+AUTHOR: yusufehtesham29
+============================================================================
+
+Splits superstore across several SQLite files so loads and scans are not
+limited to one file:
+
+    python scripts/sharding.py --build --scheme year
+    python scripts/sharding.py --build --scheme customer --shards 4
+    python scripts/sharding.py --check          (sharded vs single-file results)
+
+    python scripts/02_sql_analysis.py --shards database/shards
+    SUPERSTORE_SHARDS=database/shards python scripts/05_customer_cohort_rfm.py
+
+Schemes (every order goes to exactly one shard, so an order never spans two):
+    year      one shard per order year
+    customer  crc32(customer_id) modulo the number of shards
+
+database/shards/ holds the shard files, shards.json (the manifest) and
+coordinator.db, which stores the derived tables and anything reports
+write (e.g. customer_clv). coordinator.db runs in WAL mode like the
+single-file database, so a report's read snapshot (begin_snapshot) does
+not block its own writes.
+
+Named queries that are plain aggregates run scatter-gather: every shard
+computes partial aggregates on a worker thread (sqlite3 releases the GIL
+while a query runs, and threads need no main-module guard in the report
+scripts, unlike spawned processes), and the coordinator merges them in an
+in-memory SQLite table:
+    SUM, COUNT, MAX        merged by adding / taking the max
+    AVG                    carried as SUM and COUNT
+    COUNT(DISTINCT order)  added up (an order lives in one shard)
+    COUNT(DISTINCT customer)  partials keep customer_id as a grouping key,
+                           an exact mergeable set (customer shards also
+                           keep it disjoint)
+    top-K by customer      on customer shards each shard returns only its
+                           own top K
+Any other query (window functions, the reports' inline SQL) runs on one
+connection that attaches every shard under a UNION ALL view named
+superstore. Results match single-file mode; sums are added in a
+different order, so a total can differ in the last bit (one cent at
+most after ROUND).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from derived_tables import refresh_derived_tables
+from query_library import DB_PATH, SQL_DIR, get_library, load_queries
+from report_filters import filter_shape, push_down
+from shadow_db import enable_wal
+
+SHARD_DIR = 'database/shards'
+SHARDS_ENV = 'SUPERSTORE_SHARDS'
+MANIFEST = 'shards.json'
+COORDINATOR = 'coordinator.db'
+SCHEMA_PATH = 'sql_queries/01_create_table.sql'
+SCHEMES = ('year', 'customer')
+# SQLite attaches at most 10 databases to one connection
+MAX_SHARDS = 10
+
+_libraries = {}
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def _customer_shard(customer_id, n_shards):
+    # crc32 is stable across processes and Python versions (hash() is not)
+    return zlib.crc32(str(customer_id).encode()) % n_shards
+
+
+def build_shards(db_path=DB_PATH, shard_dir=SHARD_DIR, scheme='year', n_shards=4):
+    """Split superstore into shard files under shard_dir; returns the manifest.
+
+    The new set is built next to shard_dir and renamed into place at the end.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"scheme must be one of {SCHEMES}, got {scheme!r}")
+    staging = shard_dir.rstrip('/\\') + '.loading'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    source = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    source.create_function('customer_shard', 2, _customer_shard, deterministic=True)
+    # Shard per order (first order date / customer), so an order never spans shards
+    if scheme == 'year':
+        key_sql = "CAST(strftime('%Y', MIN(order_date)) AS INTEGER)"
+    else:
+        key_sql = f"customer_shard(MIN(customer_id), {int(n_shards)})"
+    source.execute("DROP TABLE IF EXISTS temp.order_shard")
+    source.execute(f"""
+    CREATE TEMP TABLE order_shard AS
+    SELECT order_id, {key_sql} AS shard_key FROM superstore GROUP BY order_id
+    """)
+    keys = [row[0] for row in source.execute("SELECT DISTINCT shard_key FROM order_shard ORDER BY shard_key")]
+    if len(keys) > MAX_SHARDS:
+        raise ValueError(f"{len(keys)} shards; at most {MAX_SHARDS} can be attached to one connection")
+
+    with open(SCHEMA_PATH, 'r') as f:
+        schema_sql = f.read()
+
+    shards = []
+    for key in keys:
+        name = f"superstore_{scheme}_{key}.db"
+        path = os.path.join(staging, name)
+        target = sqlite3.connect(path)
+        target.executescript(schema_sql)
+        target.close()
+
+        source.execute("ATTACH DATABASE ? AS shard", (path,))
+        source.execute("""
+        INSERT INTO shard.superstore
+        SELECT s.* FROM superstore s JOIN order_shard o ON o.order_id = s.order_id
+        WHERE o.shard_key = ?
+        ORDER BY s.order_date
+        """, (key,))
+        source.commit()
+        rows = source.execute("SELECT COUNT(*) FROM shard.superstore").fetchone()[0]
+        source.execute("DETACH DATABASE shard")
+        shards.append({'key': key, 'file': name, 'rows': rows})
+    source.close()
+
+    manifest = {'scheme': scheme, 'n_shards': len(shards), 'shards': shards,
+                'source': os.path.abspath(db_path), 'built_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Derived tables are built once, over all shards, into the coordinator database
+    conn = connect_shards(staging, read_only=False)
+    refresh_derived_tables(conn, verbose=False)
+    conn.close()
+
+    previous = shard_dir.rstrip('/\\') + '.previous'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(shard_dir):
+        os.rename(shard_dir, previous)
+    os.rename(staging, shard_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def load_manifest(shard_dir=SHARD_DIR):
+    path = os.path.join(shard_dir, MANIFEST)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No shard set at {shard_dir} (run: python scripts/sharding.py --build)")
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def shard_paths(shard_dir=SHARD_DIR):
+    return [os.path.join(shard_dir, shard['file']) for shard in load_manifest(shard_dir)['shards']]
+
+
+def connect_shards(shard_dir=SHARD_DIR, read_only=True):
+    """Connection to coordinator.db with every shard attached under a UNION ALL view `superstore`."""
+    paths = shard_paths(shard_dir)
+    coordinator = os.path.abspath(os.path.join(shard_dir, COORDINATOR))
+    # uri=True so the ATTACHed 'file:...?mode=ro' names are read as URIs
+    conn = sqlite3.connect(f"file:{coordinator}", uri=True, check_same_thread=False)
+    # Before the read-only shards are attached; set once, WAL persists in the file
+    if conn.execute("PRAGMA main.journal_mode").fetchone()[0] != 'wal':
+        try:
+            enable_wal(conn)
+        except sqlite3.OperationalError:
+            pass  # another connection is busy; begin_snapshot() retries
+    mode = '?mode=ro' if read_only else ''
+    arms = []
+    for i, path in enumerate(paths):
+        conn.execute(f"ATTACH DATABASE 'file:{os.path.abspath(path)}{mode}' AS shard_{i}")
+        arms.append(f"SELECT * FROM shard_{i}.superstore")
+    conn.execute(f"CREATE TEMP VIEW superstore AS {' UNION ALL '.join(arms)}")
+    return conn
+
+
+# ============================================================================
+# SCATTER-GATHER QUERIES
+# ============================================================================
+
+def _partial(group_by, where=''):
+    """Shard-side SQL: mergeable partial aggregates per group."""
+    return f"""
+    SELECT
+        {', '.join(group_by)},
+        COUNT(DISTINCT order_id) AS orders,
+        SUM(sales) AS sales,
+        SUM(profit) AS profit,
+        SUM(quantity) AS quantity,
+        SUM(discount) AS discount,
+        MAX(discount) AS max_discount,
+        COUNT(*) AS line_items
+    FROM superstore
+    {where}
+    GROUP BY {', '.join(g.split(' AS ')[-1] for g in group_by)}
+    """
+
+
+_YEAR = "CAST(strftime('%Y', order_date) AS INTEGER) AS year"
+_DISCOUNT_RANGE = """CASE
+            WHEN discount = 0 THEN 'No Discount'
+            WHEN discount > 0 AND discount <= 0.1 THEN '1-10% Discount'
+            WHEN discount > 0.1 AND discount <= 0.2 THEN '11-20% Discount'
+            WHEN discount > 0.2 AND discount <= 0.3 THEN '21-30% Discount'
+            ELSE 'Over 30% Discount'
+        END AS discount_range"""
+_PRODUCT = ['product_id', 'product_name', 'category', 'sub_category']
+_TOTALS = """ROUND(SUM(sales), 2) AS total_sales,
+    ROUND(SUM(profit), 2) AS total_profit"""
+_MARGIN = "ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent"
+
+# name -> (partial SQL per shard, final SQL over `partials`, column kept whole by customer shards)
+SCATTER_GATHER = {
+    'business_overview': (_partial(['customer_id']), f"""
+    SELECT
+        SUM(orders) AS total_orders,
+        COUNT(DISTINCT customer_id) AS total_customers,
+        SUM(sales) AS total_sales,
+        SUM(profit) AS total_profit,
+        {_MARGIN},
+        SUM(quantity) AS total_quantity_sold,
+        ROUND(SUM(sales) / SUM(line_items), 2) AS avg_order_value,
+        ROUND(SUM(profit) / SUM(line_items), 2) AS avg_profit_per_order
+    FROM partials""", None),
+    'sales_by_year': (_partial([_YEAR]), f"""
+    SELECT year, SUM(orders) AS orders, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY year ORDER BY year""", None),
+    'sales_by_region': (_partial(['region']), f"""
+    SELECT region, SUM(orders) AS orders, {_TOTALS}, {_MARGIN},
+        ROUND(SUM(sales) / SUM(line_items), 2) AS avg_sales_per_order
+    FROM partials GROUP BY region ORDER BY total_sales DESC""", None),
+    'sales_by_category': (_partial(['category']), f"""
+    SELECT category, SUM(orders) AS orders, {_TOTALS}, {_MARGIN}, SUM(quantity) AS units_sold
+    FROM partials GROUP BY category ORDER BY total_profit DESC""", None),
+    'sales_by_sub_category': (_partial(['category', 'sub_category']), f"""
+    SELECT category, sub_category, SUM(orders) AS orders, {_TOTALS}, {_MARGIN}, SUM(quantity) AS units_sold
+    FROM partials GROUP BY category, sub_category ORDER BY total_profit DESC""", None),
+    'loss_making_sub_categories': (_partial(['category', 'sub_category']), f"""
+    SELECT category, sub_category, SUM(orders) AS orders, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY category, sub_category
+    HAVING SUM(profit) < :max_profit ORDER BY total_profit ASC""", None),
+    'top_customers_by_sales': (_partial(['customer_id', 'customer_name']), f"""
+    SELECT customer_id, customer_name, SUM(orders) AS total_orders, {_TOTALS},
+        ROUND(SUM(sales) / SUM(line_items), 2) AS avg_order_value,
+        SUM(quantity) AS total_items_purchased
+    FROM partials GROUP BY customer_id, customer_name
+    ORDER BY total_sales DESC LIMIT :limit""", 'sales'),
+    'top_customers_by_profit': (_partial(['customer_id', 'customer_name']), f"""
+    SELECT customer_id, customer_name, SUM(orders) AS total_orders, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY customer_id, customer_name
+    ORDER BY total_profit DESC LIMIT :limit""", 'profit'),
+    'customer_segments': (_partial(['segment', 'customer_id']), f"""
+    SELECT segment, COUNT(DISTINCT customer_id) AS total_customers, SUM(orders) AS total_orders, {_TOTALS},
+        ROUND(SUM(sales) / SUM(line_items), 2) AS avg_order_value, {_MARGIN}
+    FROM partials GROUP BY segment ORDER BY total_sales DESC""", None),
+    'top_products_by_sales': (_partial(_PRODUCT), f"""
+    SELECT product_id, product_name, category, sub_category, SUM(orders) AS times_ordered,
+        SUM(quantity) AS total_quantity_sold, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY product_id, product_name, category, sub_category
+    ORDER BY total_sales DESC LIMIT :limit""", None),
+    'top_products_by_profit': (_partial(_PRODUCT), f"""
+    SELECT product_id, product_name, category, sub_category, SUM(orders) AS times_ordered, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY product_id, product_name, category, sub_category
+    ORDER BY total_profit DESC LIMIT :limit""", None),
+    'loss_making_products': (_partial(_PRODUCT), f"""
+    SELECT product_id, product_name, category, sub_category, SUM(orders) AS times_ordered, {_TOTALS},
+        ROUND(SUM(discount) / SUM(line_items) * 100, 2) AS avg_discount_percent
+    FROM partials GROUP BY product_id, product_name, category, sub_category
+    HAVING SUM(profit) < :max_profit ORDER BY total_profit ASC LIMIT :limit""", None),
+    'sales_by_ship_mode': (_partial(['ship_mode']), f"""
+    SELECT ship_mode, SUM(orders) AS total_orders, {_TOTALS},
+        ROUND(SUM(sales) / SUM(line_items), 2) AS avg_order_value, {_MARGIN}
+    FROM partials GROUP BY ship_mode ORDER BY total_sales DESC""", None),
+    'discount_impact': (_partial([_DISCOUNT_RANGE]), f"""
+    SELECT discount_range, SUM(orders) AS total_orders,
+        ROUND(SUM(discount) / SUM(line_items) * 100, 2) AS avg_discount_percent, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY discount_range ORDER BY avg_discount_percent""", None),
+    'top_states_by_sales': (_partial(['state', 'customer_id']), f"""
+    SELECT state, SUM(orders) AS total_orders, COUNT(DISTINCT customer_id) AS total_customers, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY state ORDER BY total_sales DESC LIMIT :limit""", None),
+    'high_discount_sub_categories': (_partial(['category', 'sub_category'], where='WHERE discount > 0'), f"""
+    SELECT category, sub_category, SUM(orders) AS orders,
+        ROUND(SUM(discount) / SUM(line_items) * 100, 2) AS avg_discount_percent,
+        ROUND(MAX(max_discount) * 100, 2) AS max_discount_percent, {_TOTALS}, {_MARGIN}
+    FROM partials GROUP BY category, sub_category
+    HAVING SUM(discount) / SUM(line_items) > :min_avg_discount
+    ORDER BY avg_discount_percent DESC, sub_category LIMIT :limit""", None),
+}
+
+
+def _run_partial(path, sql, params):
+    """Worker thread: partial aggregates from one shard, on its own connection."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+class ShardedLibrary:
+    """Same interface as QueryLibrary, answered from a shard set."""
+
+    def __init__(self, shard_dir=SHARD_DIR, sql_dir=SQL_DIR, workers=None):
+        self.shard_dir = shard_dir
+        self.manifest = load_manifest(shard_dir)
+        self.paths = shard_paths(shard_dir)
+        self.queries = load_queries(sql_dir)
+        # Reports write derived results (e.g. customer_clv) here
+        self.db_path = os.path.join(shard_dir, COORDINATOR)
+        self.workers = workers or min(len(self.paths), os.cpu_count() or 1)
+        self._executor = None
+        self._conn = None
+        self._partials = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def names(self):
+        return sorted(self.queries)
+
+    def _partial_sql(self, name, shape):
+        key = (name, shape, self.manifest['scheme'])
+        if key not in self._partials:
+            partial_sql, _, top_by = SCATTER_GATHER[name]
+            sql = push_down(partial_sql, shape)
+            if top_by and self.manifest['scheme'] == 'customer':
+                # Each customer lives in one shard: only its local top K can make the global top K
+                sql += f" ORDER BY SUM({top_by}) DESC LIMIT :limit"
+            self._partials[key] = sql
+        return self._partials[key]
+
+    def scatter_gather(self, name, start_date=None, end_date=None, filters=None, **params):
+        _, values = self.queries[name].bind(start_date, end_date, filters, **params)
+        sql = self._partial_sql(name, filter_shape(start_date, end_date, filters))
+        partials = pd.concat(list(self.executor.map(_run_partial, self.paths,
+                                                    [sql] * len(self.paths),
+                                                    [values] * len(self.paths))),
+                             ignore_index=True)
+        merge = sqlite3.connect(':memory:')
+        try:
+            partials.to_sql('partials', merge, index=False)
+            return pd.read_sql_query(SCATTER_GATHER[name][1], merge, params=values)
+        finally:
+            merge.close()
+
+    def run(self, name, conn=None, start_date=None, end_date=None, filters=None, **params):
+        """Scatter-gather when the query decomposes, otherwise the UNION ALL view (on conn if given)."""
+        if name not in self.queries:
+            raise KeyError(f"Unknown query {name!r}")
+        if name in SCATTER_GATHER:
+            return self.scatter_gather(name, start_date, end_date, filters, **params)
+        sql, values = self.queries[name].bind(start_date, end_date, filters, **params)
+        if conn is None:
+            if self._conn is None:
+                self._conn = connect_shards(self.shard_dir)
+            conn = self._conn
+        return pd.read_sql_query(sql, conn, params=values)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.__dict__.get('queries', {}):
+            raise AttributeError(name)
+        return partial(self.run, name)
+
+    def __dir__(self):
+        return list(super().__dir__()) + self.names()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def get_sharded_library(shard_dir=SHARD_DIR, sql_dir=SQL_DIR):
+    key = (os.path.abspath(shard_dir), os.path.abspath(sql_dir))
+    if key not in _libraries:
+        _libraries[key] = ShardedLibrary(shard_dir, sql_dir)
+    return _libraries[key]
+
+
+# ============================================================================
+# REPORT ENTRY POINTS
+# ============================================================================
+
+def add_shard_arguments(parser):
+    group = parser.add_argument_group('sharded mode')
+    group.add_argument('--shards', metavar='DIR', help=f"Read the shard set in DIR (or ${SHARDS_ENV})")
+    return parser
+
+
+def report_connection(db_path=DB_PATH, shard_dir=None):
+    """Connection for a report's own SQL: the database file, or the union of the shards.
+
+    shard_dir is the report's --shards; without it $SUPERSTORE_SHARDS, else single file.
+    """
+    shard_dir = shard_dir or os.environ.get(SHARDS_ENV)
+    return connect_shards(shard_dir) if shard_dir else sqlite3.connect(db_path)
+
+
+def report_library(db_path=DB_PATH, shard_dir=None):
+    """Named-query library matching report_connection()."""
+    shard_dir = shard_dir or os.environ.get(SHARDS_ENV)
+    return get_sharded_library(shard_dir) if shard_dir else get_library(db_path)
+
+
+# ============================================================================
+# CHECK
+# ============================================================================
+
+def check_shards(shard_dir=SHARD_DIR, db_path=DB_PATH, start_date=None, filters=None, atol=0.01):
+    """Every named query, single file vs sharded; one row per query."""
+    single = get_library(db_path)
+    sharded = get_sharded_library(shard_dir)
+    results = []
+    for name in single.names():
+        row = {'query': name, 'mode': 'scatter-gather' if name in SCATTER_GATHER else 'union view'}
+        start = time.perf_counter()
+        expected = single.run(name, start_date=start_date, filters=filters)
+        row['single_seconds'] = round(time.perf_counter() - start, 4)
+        start = time.perf_counter()
+        actual = sharded.run(name, start_date=start_date, filters=filters)
+        row['sharded_seconds'] = round(time.perf_counter() - start, 4)
+        try:
+            pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True),
+                                          check_dtype=False, check_exact=False, atol=atol)
+            row['status'] = 'match'
+        except AssertionError as exc:
+            row['status'] = 'MISMATCH'
+            row['detail'] = str(exc).splitlines()[0]
+        results.append(row)
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-database mode")
+    parser.add_argument('--build', action='store_true', help="(Re)build the shard set from the database")
+    parser.add_argument('--check', action='store_true', help="Compare every named query with single-file mode")
+    parser.add_argument('--scheme', choices=SCHEMES, default='year')
+    parser.add_argument('--shards', type=int, default=4, help="Number of shards for --scheme customer")
+    parser.add_argument('--dir', default=SHARD_DIR)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    if not (args.build or args.check):
+        parser.print_help()
+        return
+
+    print("="*80)
+    print("SHARDED DATABASE")
+    print("="*80)
+
+    if args.build:
+        print(f"\n[1] Building {args.scheme} shards from {args.db}...")
+        start = time.perf_counter()
+        manifest = build_shards(args.db, args.dir, args.scheme, args.shards)
+        print(pd.DataFrame(manifest['shards']).to_string(index=False))
+        print(f"✅ {manifest['n_shards']} shards in {args.dir} ({time.perf_counter() - start:.2f}s)")
+
+    if args.check:
+        print(f"\n[2] Comparing sharded and single-file results...")
+        for label, kwargs in [('all data', {}),
+                              ('filtered', {'start_date': '2016-01-01', 'filters': {'region': ['West', 'East']}})]:
+            df_check = check_shards(args.dir, args.db, **kwargs)
+            print(f"\n   {label}:")
+            print(df_check.to_string(index=False))
+            matched = (df_check['status'] == 'match').sum()
+            print(f"   ✅ {matched}/{len(df_check)} queries match")
+            if matched < len(df_check):
+                raise SystemExit(1)
+        get_sharded_library(args.dir).close()
+
+
+if __name__ == '__main__':
+    main()
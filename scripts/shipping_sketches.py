@@ -0,0 +1,146 @@
+"""
+============================================================================
+FILE: shipping_sketches.py
+PURPOSE: Ship-time percentiles and SLA breaches from mergeable daily sketches
+AUTHOR: yusufehtesham29
+============================================================================
+
+Ship time is a whole number of days (ship_date - order_date), so the
+sketch is a fixed-size histogram of day counts (0..MAX_SHIP_DAYS, plus
+one overflow bucket). Histograms merge by adding them, quantiles read off
+their cumulative counts, and both are exact - no t-digest/KLL error
+budget is needed for integer-valued data of this range.
+
+One sketch is stored per (order day, ship_mode, region) in
+`shipping_sketches`, counting orders. Any date range, month or
+combination of ship modes and regions is answered by summing the
+sketches in range instead of rescanning line items.
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_SHIP_DAYS = 30
+N_BUCKETS = MAX_SHIP_DAYS + 2  # 0..MAX_SHIP_DAYS plus overflow
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# Promised delivery window in days per ship mode; slower orders breach the SLA
+SLA_DAYS = {
+    'Same Day': 0,
+    'First Class': 2,
+    'Second Class': 4,
+    'Standard Class': 6,
+}
+
+
+def build_shipping_sketches(conn):
+    """Rebuild shipping_sketches from superstore; returns the number of sketches."""
+    # One row per order: every line item of an order ships together
+    query = """
+    SELECT
+        DATE(order_date) AS order_date,
+        ship_mode,
+        region,
+        CAST(JULIANDAY(ship_date) - JULIANDAY(order_date) AS INTEGER) AS ship_days,
+        COUNT(*) AS orders
+    FROM (
+        SELECT DISTINCT order_id, order_date, ship_date, ship_mode, region
+        FROM superstore
+    )
+    GROUP BY DATE(order_date), ship_mode, region, ship_days;
+    """
+    df = pd.read_sql_query(query, conn)
+    bucket = df['ship_days'].clip(lower=0, upper=MAX_SHIP_DAYS + 1).to_numpy()
+
+    keys = df[['order_date', 'ship_mode', 'region']]
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    counts = np.zeros((len(uniques), N_BUCKETS), dtype=np.int32)
+    np.add.at(counts, (codes, bucket), df['orders'].to_numpy())
+
+    sketches = uniques.to_frame(index=False)
+    sketches.columns = ['order_date', 'ship_mode', 'region']
+    sketches['orders'] = counts.sum(axis=1)
+    sketches['histogram'] = [row.tobytes() for row in counts]
+
+    conn.execute("DROP TABLE IF EXISTS shipping_sketches")
+    conn.execute("""
+    CREATE TABLE shipping_sketches (
+        order_date TEXT NOT NULL,
+        ship_mode TEXT NOT NULL,
+        region TEXT NOT NULL,
+        orders INTEGER NOT NULL,
+        histogram BLOB NOT NULL,
+        PRIMARY KEY (order_date, ship_mode, region)
+    )""")
+    sketches.to_sql('shipping_sketches', conn, if_exists='append', index=False)
+    conn.commit()
+    return len(sketches)
+
+
+def _quantile(cumulative, total, q):
+    """Smallest bucket whose cumulative count reaches q of the total."""
+    return int(np.searchsorted(cumulative, q * total, side='left'))
+
+
+def ship_time_report(conn, group_by=('ship_mode',), start_date=None, end_date=None,
+                     quantiles=DEFAULT_QUANTILES, sla_days=SLA_DAYS, where=None, params=()):
+    """Percentile ship days and SLA breaches per group, merged from daily sketches.
+
+    group_by may include 'ship_mode', 'region' and 'month'. Dates are
+    inclusive 'YYYY-MM-DD' bounds on order_date. `where` is an extra SQL
+    predicate on order_date / ship_mode / region with `?` params.
+    """
+    group_by = list(group_by)
+    predicates, values = [], []
+    if start_date:
+        predicates.append("order_date >= ?")
+        values.append(start_date)
+    if end_date:
+        predicates.append("order_date <= ?")
+        values.append(end_date)
+    if where:
+        predicates.append(f"({where})")
+        values.extend(params)
+    where_sql = f"WHERE {' AND '.join(predicates)}" if predicates else ''
+
+    query = f"""
+    SELECT strftime('%Y-%m', order_date) AS month, ship_mode, region, histogram
+    FROM shipping_sketches
+    {where_sql};
+    """
+    sketches = pd.read_sql_query(query, conn, params=values)
+    if sketches.empty:
+        return pd.DataFrame(columns=group_by + ['orders'])
+
+    histograms = np.frombuffer(b''.join(sketches['histogram']), dtype=np.int32)
+    histograms = histograms.reshape(len(sketches), N_BUCKETS)
+
+    # Merge = add the histograms of every sketch in the group
+    if group_by:
+        codes, groups = pd.MultiIndex.from_frame(sketches[group_by]).factorize()
+        result = groups.to_frame(index=False)
+        result.columns = group_by
+    else:
+        codes = np.zeros(len(sketches), dtype=np.int64)
+        result = pd.DataFrame(index=[0])
+    merged = np.zeros((len(result), N_BUCKETS), dtype=np.int64)
+    np.add.at(merged, codes, histograms)
+
+    cumulative = np.cumsum(merged, axis=1)
+    totals = cumulative[:, -1]
+    days = np.arange(N_BUCKETS)
+    result['orders'] = totals
+    result['avg_ship_days'] = (merged @ days / np.maximum(totals, 1)).round(2)
+    for q in quantiles:
+        label = f"p{int(q * 100)}_ship_days"
+        result[label] = [_quantile(cumulative[i], totals[i], q) for i in range(len(result))]
+
+    # SLA thresholds are per ship mode, so breaches are reported when grouping by it
+    if 'ship_mode' in group_by:
+        thresholds = result['ship_mode'].map(sla_days)
+        breaches = [int(merged[i, int(t) + 1:].sum()) if pd.notna(t) else None
+                    for i, t in enumerate(thresholds)]
+        result['sla_days'] = thresholds
+        result['sla_breaches'] = breaches
+        result['sla_breach_percent'] = (result['sla_breaches'] / result['orders'] * 100).round(2)
+    return result.sort_values(group_by).reset_index(drop=True) if group_by else result
@@ -0,0 +1,368 @@
+"""
+============================================================================
+FILE: spill_aggregate.py
+PURPOSE: Memory-bounded hash aggregation (GROUP BY) that spills to disk
+AUTHOR: yusufehtesham29
+============================================================================
+
+Customer- and product-level GROUP BYs produce one row per customer or
+product. Pulled into pandas in one piece at production cardinality they
+become the biggest object in the process. SpillingAggregator computes
+the same result in bounded memory:
+
+    1. Rows arrive in chunks and are hashed on the GROUP BY keys into
+       a fixed number of partitions; each chunk is reduced to partial
+       aggregates (sum, count, min, max, distinct pairs) per partition.
+    2. When the partial states exceed the memory budget, the largest
+       partitions are pickled to a temporary directory and dropped.
+    3. At the end each partition is merged from its spill files and
+       finalized on its own, so only one partition is ever in memory.
+       A partition that is itself larger than the budget is
+       re-partitioned with a different hash (Grace hash join style).
+
+    aggs = {'total_orders': ('nunique', 'order_id'),
+            'lifetime_value': ('sum', 'sales'),
+            'avg_order_value': ('mean', 'sales')}
+    for part in aggregate_query(conn, "SELECT * FROM superstore",
+                                ['customer_id', 'customer_name', 'segment'], aggs,
+                                memory_mb=64):
+        ...
+
+Semantics follow SQLite: NULL keys form a group, SUM/AVG/MIN/MAX ignore
+NULLs (SUM of only NULLs is NULL), COUNT(col) and COUNT(DISTINCT col)
+skip NULLs. Group sets, counts, distinct counts, MIN and MAX are
+identical to SQLite's; sums are added in a different order, so they
+agree to float rounding (relative 1e-9) - ROUND(..., 2) of a sum that
+lands exactly on a half cent can still differ by one cent.
+python scripts/spill_aggregate.py --check compares against SQLite.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = 'database/superstore.db'
+DEFAULT_MEMORY_MB = 256
+DEFAULT_PARTITIONS = 16
+CHUNK_ROWS = 200_000
+# Re-partitioning levels before a partition is merged in memory regardless
+MAX_DEPTH = 3
+
+AGG_FUNCTIONS = ('sum', 'mean', 'count', 'size', 'min', 'max', 'nunique')
+
+
+def _hash_key(depth):
+    # pandas wants a 16-character key; each level splits on a different hash
+    return f"superstore{depth:06d}"
+
+
+def state_bytes(state):
+    return sum(int(df.memory_usage(deep=True, index=True).sum()) for df in state.values())
+
+
+class SpillingAggregator:
+    """GROUP BY `by` computing `aggs` ({out: (function, column)}) in bounded memory."""
+
+    def __init__(self, by, aggs, memory_mb=DEFAULT_MEMORY_MB, partitions=DEFAULT_PARTITIONS,
+                 spill_dir=None, depth=0):
+        self.by = list(by)
+        self.aggs = dict(aggs)
+        bad = {func for func, _ in self.aggs.values()} - set(AGG_FUNCTIONS)
+        if bad:
+            raise ValueError(f"Unknown aggregate functions {sorted(bad)}; choose from {AGG_FUNCTIONS}")
+        self.budget = int(memory_mb * 1024 * 1024)
+        self.partitions = partitions
+        self.depth = depth
+
+        # Partial state columns: '<out>:sum', '<out>:count', ...; distinct values per nunique output
+        self._reducers = {}
+        for out, (func, col) in self.aggs.items():
+            if func == 'mean':
+                self._reducers[f"{out}:sum"] = ('sum', col)
+                self._reducers[f"{out}:count"] = ('count', col)
+            elif func != 'nunique':
+                self._reducers[f"{out}:{func}"] = (func, col)
+        self._distinct = {out: col for out, (func, col) in self.aggs.items() if func == 'nunique'}
+
+        # A private directory (under spill_dir if given), removed once the results are read
+        self.spill_dir = tempfile.mkdtemp(prefix='superstore_spill_', dir=spill_dir)
+        self._states = [None] * partitions
+        self._bytes = [0] * partitions
+        self._spills = [[] for _ in range(partitions)]
+        self.rows_in = 0
+        self.spilled_bytes = 0
+        self.peak_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Partial aggregation
+    # ------------------------------------------------------------------
+
+    def _reduce(self, frame, partial):
+        """State of one chunk: raw rows (partial=False) or partial main rows (partial=True)."""
+        grouped = frame.groupby(self.by, dropna=False, sort=False)
+        columns = []
+        for name, (func, col) in self._reducers.items():
+            source = name if partial else col
+            if func in ('sum',) or (partial and func in ('count', 'size')):
+                columns.append(grouped[source].sum(min_count=1 if func == 'sum' else 0).rename(name))
+            elif func == 'count':
+                columns.append(grouped[source].count().rename(name))
+            elif func == 'size':
+                columns.append(grouped.size().rename(name))
+            elif func == 'min':
+                columns.append(grouped[source].min().rename(name))
+            else:
+                columns.append(grouped[source].max().rename(name))
+        if columns:
+            main = pd.concat(columns, axis=1).reset_index()
+        else:
+            main = frame[self.by].drop_duplicates()
+        return main
+
+    def _reduce_distinct(self, frame, col):
+        pairs = frame[self.by + [col]]
+        return pairs[pairs[col].notna()].drop_duplicates(ignore_index=True)
+
+    def _merge(self, states):
+        """Combine partial states of the same partition."""
+        states = [s for s in states if s is not None]
+        if len(states) == 1:
+            return states[0]
+        merged = {'main': self._reduce(pd.concat([s['main'] for s in states], ignore_index=True), partial=True)}
+        for out in self._distinct:
+            merged[out] = pd.concat([s[out] for s in states], ignore_index=True).drop_duplicates(ignore_index=True)
+        return merged
+
+    def _partition_of(self, frame):
+        hashes = pd.util.hash_pandas_object(frame[self.by], index=False, hash_key=_hash_key(self.depth))
+        return (hashes.to_numpy() % np.uint64(self.partitions)).astype(np.int64)
+
+    def _add_state(self, state, partial):
+        """Split a chunk (raw or partial) by partition and fold it into the states."""
+        main = state['main']
+        part_main = self._partition_of(main)
+        part_distinct = {out: self._partition_of(state[out]) for out in self._distinct}
+        for p in np.unique(np.concatenate([part_main] + list(part_distinct.values()))):
+            piece = {'main': main[part_main == p]}
+            for out in self._distinct:
+                piece[out] = state[out][part_distinct[out] == p]
+            if not partial:
+                piece['main'] = self._reduce(piece['main'], partial=False)
+            self._states[p] = self._merge([self._states[p], piece])
+            self._bytes[p] = state_bytes(self._states[p])
+        self._enforce_budget()
+        self.peak_bytes = max(self.peak_bytes, sum(self._bytes))
+
+    def add(self, chunk):
+        """Feed raw rows (a DataFrame with the by and aggregated columns)."""
+        self.rows_in += len(chunk)
+        state = {'main': chunk}
+        for out, col in self._distinct.items():
+            state[out] = self._reduce_distinct(chunk, col)
+        self._add_state(state, partial=False)
+
+    def add_partial(self, state):
+        """Feed a partial state produced by another aggregator with the same by/aggs."""
+        self._add_state(state, partial=True)
+
+    # ------------------------------------------------------------------
+    # Spilling
+    # ------------------------------------------------------------------
+
+    def _spill(self, p):
+        path = os.path.join(self.spill_dir, f"p{p}-{len(self._spills[p])}.pkl")
+        pd.to_pickle(self._states[p], path)
+        self._spills[p].append(path)
+        self.spilled_bytes += os.path.getsize(path)
+        self._states[p] = None
+        self._bytes[p] = 0
+
+    def _enforce_budget(self):
+        # Spill the biggest partitions until half the budget is free again
+        if sum(self._bytes) <= self.budget:
+            return
+        for p in np.argsort(self._bytes)[::-1]:
+            if sum(self._bytes) <= self.budget // 2 or self._bytes[p] == 0:
+                break
+            self._spill(int(p))
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def _finalize(self, state):
+        main = state['main']
+        result = main[self.by].copy()
+        for out, (func, col) in self.aggs.items():
+            if func == 'mean':
+                result[out] = main[f"{out}:sum"] / main[f"{out}:count"].replace(0, np.nan)
+            elif func == 'nunique':
+                counts = state[out].groupby(self.by, dropna=False, sort=False).size().rename(out)
+                result = result.merge(counts.reset_index(), on=self.by, how='left')
+                result[out] = result[out].fillna(0).astype(np.int64)
+            else:
+                result[out] = main[f"{out}:{func}"]
+        return result
+
+    def _partition_results(self, p):
+        spilled = sum(os.path.getsize(path) for path in self._spills[p])
+        if spilled > self.budget and self.depth < MAX_DEPTH:
+            # Too big to merge in memory: split this partition again on a different hash
+            child = SpillingAggregator(self.by, self.aggs, self.budget / (1024 * 1024),
+                                       self.partitions, self.spill_dir, self.depth + 1)
+            for path in self._spills[p]:
+                child.add_partial(pd.read_pickle(path))
+                os.remove(path)
+            if self._states[p] is not None:
+                child.add_partial(self._states[p])
+            self._states[p] = None
+            yield from child.results()
+            self.spilled_bytes += child.spilled_bytes
+            self.peak_bytes = max(self.peak_bytes, child.peak_bytes)
+            return
+
+        state = self._states[p]
+        for path in self._spills[p]:
+            state = self._merge([state, pd.read_pickle(path)])
+            os.remove(path)
+        self._states[p] = None
+        if state is not None and len(state['main']):
+            self.peak_bytes = max(self.peak_bytes, state_bytes(state))
+            yield self._finalize(state)
+
+    def results(self):
+        """Yield the finished groups one partition (DataFrame) at a time."""
+        try:
+            for p in range(self.partitions):
+                yield from self._partition_results(p)
+        finally:
+            self.close()
+
+    def close(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def aggregate_query(conn, sql, by, aggs, params=None, chunk_rows=CHUNK_ROWS,
+                    memory_mb=DEFAULT_MEMORY_MB, partitions=DEFAULT_PARTITIONS, aggregator=None):
+    """Stream the rows of `sql` through a SpillingAggregator; yields result partitions."""
+    aggregator = aggregator or SpillingAggregator(by, aggs, memory_mb, partitions)
+    for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=chunk_rows):
+        aggregator.add(chunk)
+    yield from aggregator.results()
+
+
+def top_n(parts, n, column, ascending=False, group=None):
+    """Best n rows by column (per group, if given) across result partitions, in bounded memory."""
+    best = None
+    for part in parts:
+        best = part if best is None else pd.concat([best, part], ignore_index=True)
+        best = best.sort_values(column, ascending=ascending, kind='stable')
+        best = best.groupby(group, dropna=False, sort=False).head(n) if group else best.head(n)
+    if best is None:
+        return pd.DataFrame()
+    if group:
+        best = best.sort_values([group, column], ascending=[True, ascending], kind='stable')
+    return best.reset_index(drop=True)
+
+
+# ============================================================================
+# CHECK AGAINST SQLITE
+# ============================================================================
+
+# (name, GROUP BY keys, aggregates, equivalent SQLite query)
+CHECKS = [
+    ('customers', ['customer_id', 'customer_name', 'segment'],
+     {'total_orders': ('nunique', 'order_id'), 'lifetime_value': ('sum', 'sales'),
+      'lifetime_profit': ('sum', 'profit'), 'avg_order_value': ('mean', 'sales'),
+      'first_order': ('min', 'order_date'), 'last_order': ('max', 'order_date')},
+     """SELECT customer_id, customer_name, segment,
+               COUNT(DISTINCT order_id) AS total_orders, SUM(sales) AS lifetime_value,
+               SUM(profit) AS lifetime_profit, AVG(sales) AS avg_order_value,
+               MIN(order_date) AS first_order, MAX(order_date) AS last_order
+        FROM superstore GROUP BY customer_id, customer_name, segment"""),
+    ('products', ['product_name', 'category', 'sub_category'],
+     {'times_ordered': ('nunique', 'order_id'), 'line_items': ('size', 'sales'),
+      'total_sales': ('sum', 'sales'), 'total_profit': ('sum', 'profit'),
+      'total_quantity': ('sum', 'quantity'), 'avg_discount': ('mean', 'discount')},
+     """SELECT product_name, category, sub_category,
+               COUNT(DISTINCT order_id) AS times_ordered, COUNT(*) AS line_items,
+               SUM(sales) AS total_sales, SUM(profit) AS total_profit,
+               SUM(quantity) AS total_quantity, AVG(discount) AS avg_discount
+        FROM superstore GROUP BY product_name, category, sub_category"""),
+    ('region_customers', ['region', 'customer_id', 'customer_name'],
+     {'total_sales': ('sum', 'sales'), 'orders': ('nunique', 'order_id')},
+     """SELECT region, customer_id, customer_name,
+               SUM(sales) AS total_sales, COUNT(DISTINCT order_id) AS orders
+        FROM superstore GROUP BY region, customer_id, customer_name"""),
+]
+
+
+def compare_frames(expected, actual, keys, rtol=1e-9):
+    """Same groups and values; floats equal up to summation-order rounding."""
+    expected = expected.sort_values(keys, kind='stable').reset_index(drop=True)
+    actual = actual[list(expected.columns)].sort_values(keys, kind='stable').reset_index(drop=True)
+    if len(expected) != len(actual) or not expected[keys].equals(actual[keys]):
+        return False
+    for col in expected.columns.difference(keys):
+        left, right = expected[col], actual[col]
+        if pd.api.types.is_float_dtype(left) or pd.api.types.is_float_dtype(right):
+            if not np.allclose(left.astype(float), right.astype(float), rtol=rtol, atol=1e-9, equal_nan=True):
+                return False
+        elif not (left.astype(str) == right.astype(str)).all():
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spill-to-disk GROUP BY checked against SQLite")
+    parser.add_argument('--check', action='store_true', help="Run the customer/product/region aggregates")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--memory-mb', type=float, default=1.0,
+                        help="Memory budget for the check (small, to force spilling)")
+    parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS)
+    parser.add_argument('--chunk-rows', type=int, default=2_000)
+    args = parser.parse_args()
+
+    if not args.check:
+        parser.print_help()
+        return
+
+    print("="*80)
+    print(f"SPILLING GROUP BY vs SQLITE (budget {args.memory_mb:g} MB, {args.partitions} partitions)")
+    print("="*80)
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    rows = []
+    for name, by, aggs, sql in CHECKS:
+        columns = sorted(set(by) | {col for _, col in aggs.values()})
+        expected = pd.read_sql_query(sql, conn)
+        start = time.perf_counter()
+        aggregator = SpillingAggregator(by, aggs, args.memory_mb, args.partitions)
+        actual = pd.concat(aggregate_query(conn, f"SELECT {', '.join(columns)} FROM superstore", by, aggs,
+                                           chunk_rows=args.chunk_rows, aggregator=aggregator),
+                           ignore_index=True)
+        rows.append({
+            'aggregate': name,
+            'groups': len(actual),
+            'status': 'match' if compare_frames(expected, actual, by) else 'MISMATCH',
+            'peak_state_mb': round(aggregator.peak_bytes / 1e6, 2),
+            'spilled_mb': round(aggregator.spilled_bytes / 1e6, 2),
+            'seconds': round(time.perf_counter() - start, 2),
+        })
+    conn.close()
+
+    df_check = pd.DataFrame(rows)
+    print(df_check.to_string(index=False))
+    matched = (df_check['status'] == 'match').sum()
+    print(f"\n✅ {matched}/{len(df_check)} aggregates match SQLite")
+    if matched < len(df_check):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
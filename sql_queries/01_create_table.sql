@@ -12,8 +12,8 @@ CREATE TABLE superstore (
     -- Order Information
     row_id INTEGER PRIMARY KEY,
     order_id TEXT NOT NULL,
-    order_date TEXT NOT NULL,           -- Will be converted to DATE format
-    ship_date TEXT NOT NULL,            -- Will be converted to DATE format
+    order_date TEXT NOT NULL,           -- ISO 'YYYY-MM-DD' (no time part)
+    ship_date TEXT NOT NULL,            -- ISO 'YYYY-MM-DD' (no time part)
     ship_mode TEXT,
     
     -- Customer Information
@@ -47,6 +47,7 @@ CREATE INDEX idx_customer_id ON superstore(customer_id);
 CREATE INDEX idx_category ON superstore(category);
 CREATE INDEX idx_region ON superstore(region);
 CREATE INDEX idx_product_id ON superstore(product_id);
+CREATE INDEX idx_order_id ON superstore(order_id);
 
 -- ============================================================================
 -- EXPLANATION:
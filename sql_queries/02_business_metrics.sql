@@ -2,10 +2,13 @@
 -- FILE: 02_business_metrics.sql
 -- PURPOSE: Calculate core business KPIs and metrics
 -- AUTHOR: yusufehtesham29
+-- NOTE: Named queries (-- name:) are loaded by scripts/query_library.py;
+--       :params are bound at run time, defaults are listed under -- params:
 -- ============================================================================
 
 -- Query 1: Overall Business Performance
 -- Calculate total sales, total profit, and profit margin
+-- name: business_overview
 SELECT 
     COUNT(DISTINCT order_id) AS total_orders,
     COUNT(DISTINCT customer_id) AS total_customers,
@@ -28,6 +31,7 @@ FROM superstore;
 
 -- Query 2: Sales and Profit by Year
 -- Analyze performance trends over time
+-- name: sales_by_year
 SELECT 
     CAST(strftime('%Y', order_date) AS INTEGER) AS year,
     COUNT(DISTINCT order_id) AS orders,
@@ -48,6 +52,7 @@ ORDER BY year;
 
 -- Query 3: Sales and Profit by Region
 -- Identify top-performing geographic areas
+-- name: sales_by_region
 SELECT 
     region,
     COUNT(DISTINCT order_id) AS orders,
@@ -68,6 +73,7 @@ ORDER BY total_sales DESC;
 
 -- Query 4: Sales and Profit by Category
 -- Understand product category performance
+-- name: sales_by_category
 SELECT 
     category,
     COUNT(DISTINCT order_id) AS orders,
@@ -88,6 +94,7 @@ ORDER BY total_profit DESC;
 
 -- Query 5: Sales and Profit by Sub-Category
 -- Detailed product performance analysis
+-- name: sales_by_sub_category
 SELECT 
     category,
     sub_category,
@@ -109,6 +116,8 @@ ORDER BY total_profit DESC;
 
 -- Query 6: Loss-Making Sub-Categories
 -- Identify products losing money
+-- name: loss_making_sub_categories
+-- params: max_profit=0
 SELECT 
     category,
     sub_category,
@@ -118,7 +127,7 @@ SELECT
     ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
 FROM superstore
 GROUP BY category, sub_category
-HAVING SUM(profit) < 0
+HAVING SUM(profit) < :max_profit
 ORDER BY total_profit ASC;
 
 -- EXPLANATION:
@@ -2,10 +2,14 @@
 -- FILE: 03_customer_analysis.sql
 -- PURPOSE: Analyze customer behavior and identify top customers
 -- AUTHOR: yusufehtesham29
+-- NOTE: Named queries (-- name:) are loaded by scripts/query_library.py;
+--       :params are bound at run time, defaults are listed under -- params:
 -- ============================================================================
 
 -- Query 1: Top 10 Customers by Sales
 -- Identify the most valuable customers (VIPs)
+-- name: top_customers_by_sales
+-- params: limit=10
 SELECT 
     customer_id,
     customer_name,
@@ -17,7 +21,7 @@ SELECT
 FROM superstore
 GROUP BY customer_id, customer_name
 ORDER BY total_sales DESC
-LIMIT 10;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Groups all transactions by each customer
@@ -31,6 +35,8 @@ LIMIT 10;
 
 -- Query 2: Top 10 Customers by Profit
 -- Identify most profitable customers (may differ from highest sales)
+-- name: top_customers_by_profit
+-- params: limit=10
 SELECT 
     customer_id,
     customer_name,
@@ -41,7 +47,7 @@ SELECT
 FROM superstore
 GROUP BY customer_id, customer_name
 ORDER BY total_profit DESC
-LIMIT 10;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Focus on profit instead of just revenue
@@ -53,6 +59,7 @@ LIMIT 10;
 
 -- Query 3: Customer Segmentation Analysis
 -- Analyze performance by customer segment (Consumer, Corporate, Home Office)
+-- name: customer_segments
 SELECT 
     segment,
     COUNT(DISTINCT customer_id) AS total_customers,
@@ -76,6 +83,7 @@ ORDER BY total_sales DESC;
 
 -- Query 4: Customer Purchase Frequency Distribution
 -- Understand how often customers buy
+-- name: purchase_frequency_distribution
 SELECT 
     orders_placed,
     COUNT(*) AS number_of_customers,
@@ -97,3 +105,99 @@ ORDER BY orders_placed DESC;
 -- OVER(): Window function to calculate percentage of total customers
 -- Helps identify one-time vs. repeat customers
 -- ============================================================================
+
+
+-- Query 5: At-Risk Valuable Customers
+-- Repeat customers who have not ordered recently
+-- name: at_risk_customers
+-- params: min_orders=3, inactive_days=180, limit=20
+WITH customer_last_order AS (
+    SELECT 
+        customer_id,
+        customer_name,
+        segment,
+        MAX(order_date) AS last_order_date,
+        COUNT(DISTINCT order_id) AS total_orders,
+        ROUND(SUM(sales), 2) AS lifetime_value,
+        ROUND(SUM(profit), 2) AS lifetime_profit
+    FROM superstore
+    GROUP BY customer_id, customer_name, segment
+),
+latest AS (
+    SELECT MAX(order_date) AS latest_order_date FROM superstore
+)
+SELECT 
+    customer_id,
+    customer_name,
+    segment,
+    last_order_date,
+    ROUND(JULIANDAY(latest_order_date) - JULIANDAY(last_order_date)) AS days_since_last_order,
+    total_orders,
+    lifetime_value,
+    lifetime_profit,
+    CASE 
+        WHEN JULIANDAY(latest_order_date) - JULIANDAY(last_order_date) > 365 THEN 'High Risk'
+        WHEN JULIANDAY(latest_order_date) - JULIANDAY(last_order_date) > 180 THEN 'Medium Risk'
+        ELSE 'Active'
+    END AS risk_status
+FROM customer_last_order, latest
+WHERE total_orders >= :min_orders
+  AND JULIANDAY(latest_order_date) - JULIANDAY(last_order_date) > :inactive_days
+ORDER BY days_since_last_order DESC, lifetime_value DESC
+LIMIT :limit;
+
+-- EXPLANATION:
+-- customer_last_order: Last purchase, order count and value per customer
+-- latest: Most recent order date in the data (the "as of" date)
+-- :min_orders / :inactive_days: Only repeat customers who have gone quiet
+-- High Risk = no order for over a year, Medium Risk = over 180 days
+-- Targets for a re-engagement campaign before they churn
+-- ============================================================================
+
+
+-- Query 6: RFM Scores
+-- Recency, frequency and monetary quintiles per customer
+-- name: rfm_scores
+-- params: limit=50
+WITH customer_stats AS (
+    SELECT 
+        customer_id,
+        MIN(customer_name) AS customer_name,
+        MIN(segment) AS segment,
+        CAST(JULIANDAY((SELECT MAX(order_date) FROM superstore)) - JULIANDAY(MAX(order_date)) AS INTEGER) AS recency_days,
+        COUNT(DISTINCT order_id) AS frequency,
+        ROUND(SUM(sales), 2) AS monetary
+    FROM superstore
+    GROUP BY customer_id
+),
+scored AS (
+    SELECT 
+        *,
+        NTILE(5) OVER (ORDER BY recency_days DESC, customer_id) AS r_score,
+        NTILE(5) OVER (ORDER BY frequency, customer_id) AS f_score,
+        NTILE(5) OVER (ORDER BY monetary, customer_id) AS m_score
+    FROM customer_stats
+)
+SELECT 
+    customer_id,
+    customer_name,
+    segment,
+    recency_days,
+    frequency,
+    monetary,
+    r_score,
+    f_score,
+    m_score,
+    r_score * 100 + f_score * 10 + m_score AS rfm_score
+FROM scored
+ORDER BY r_score + f_score + m_score DESC, monetary DESC, customer_id
+LIMIT :limit;
+
+-- EXPLANATION:
+-- customer_stats: Days since last order (relative to the latest order in
+--   the data), number of orders and total sales per customer
+-- NTILE(5): Splits customers into quintiles, 5 = most recent / most
+--   frequent / highest spend; customer_id breaks ties
+-- rfm_score: The three scores as one code (555 = best customers)
+-- LIMIT -1 returns every customer
+-- ============================================================================
@@ -2,10 +2,14 @@
 -- FILE: 04_product_analysis.sql
 -- PURPOSE: Analyze product performance and shipping methods
 -- AUTHOR: yusufehtesham29
+-- NOTE: Named queries (-- name:) are loaded by scripts/query_library.py;
+--       :params are bound at run time, defaults are listed under -- params:
 -- ============================================================================
 
 -- Query 1: Top 10 Products by Sales
 -- Identify best-selling products
+-- name: top_products_by_sales
+-- params: limit=10
 SELECT 
     product_id,
     product_name,
@@ -19,7 +23,7 @@ SELECT
 FROM superstore
 GROUP BY product_id, product_name, category, sub_category
 ORDER BY total_sales DESC
-LIMIT 10;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Groups by product_id to analyze individual product performance
@@ -31,6 +35,8 @@ LIMIT 10;
 
 -- Query 2: Top 10 Products by Profit
 -- Identify most profitable products
+-- name: top_products_by_profit
+-- params: limit=10
 SELECT 
     product_id,
     product_name,
@@ -43,7 +49,7 @@ SELECT
 FROM superstore
 GROUP BY product_id, product_name, category, sub_category
 ORDER BY total_profit DESC
-LIMIT 10;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Focuses on profit instead of just revenue
@@ -54,6 +60,8 @@ LIMIT 10;
 
 -- Query 3: Loss-Making Products
 -- Identify products that are losing money
+-- name: loss_making_products
+-- params: max_profit=0, limit=20
 SELECT 
     product_id,
     product_name,
@@ -65,20 +73,24 @@ SELECT
     ROUND(AVG(discount) * 100, 2) AS avg_discount_percent
 FROM superstore
 GROUP BY product_id, product_name, category, sub_category
-HAVING SUM(profit) < 0
+HAVING SUM(profit) < :max_profit
 ORDER BY total_profit ASC
-LIMIT 20;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- HAVING SUM(profit) < 0: Filters only unprofitable products
 -- avg_discount_percent: Shows if high discounts are causing losses
 -- Business decision needed: discontinue, reprice, or reduce discounts
 -- Critical for inventory and pricing strategy
+-- The loader also maintains product_summary (integer product_key, indexed on
+-- total_profit), so scripts read this list without the text-key GROUP BY:
+--   SELECT ... FROM product_summary WHERE total_profit < 0 ORDER BY total_profit
 -- ============================================================================
 
 
 -- Query 4: Sales by Ship Mode
 -- Analyze shipping method preferences and performance
+-- name: sales_by_ship_mode
 SELECT 
     ship_mode,
     COUNT(DISTINCT order_id) AS total_orders,
@@ -100,6 +112,7 @@ ORDER BY total_sales DESC;
 
 -- Query 5: Discount Impact Analysis
 -- Understand the relationship between discounts and profitability
+-- name: discount_impact
 SELECT 
     CASE 
         WHEN discount = 0 THEN 'No Discount'
@@ -127,6 +140,8 @@ ORDER BY avg_discount_percent;
 
 -- Query 6: State-wise Performance
 -- Top 10 states by sales
+-- name: top_states_by_sales
+-- params: limit=10
 SELECT 
     state,
     COUNT(DISTINCT order_id) AS total_orders,
@@ -137,7 +152,7 @@ SELECT
 FROM superstore
 GROUP BY state
 ORDER BY total_sales DESC
-LIMIT 10;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Identifies top-performing states (geographic market analysis)
@@ -145,3 +160,30 @@ LIMIT 10;
 -- Helps plan regional marketing and distribution strategies
 -- Can reveal untapped markets or areas needing attention
 -- ============================================================================
+
+
+-- Query 7: Sub-Categories with Excessive Discounts
+-- Sub-categories whose average discount (when discounted) is above a threshold
+-- name: high_discount_sub_categories
+-- params: min_avg_discount=0.15, limit=10
+SELECT 
+    category,
+    sub_category,
+    COUNT(DISTINCT order_id) AS orders,
+    ROUND(AVG(discount) * 100, 2) AS avg_discount_percent,
+    ROUND(MAX(discount) * 100, 2) AS max_discount_percent,
+    ROUND(SUM(sales), 2) AS total_sales,
+    ROUND(SUM(profit), 2) AS total_profit,
+    ROUND(SUM(profit) / SUM(sales) * 100, 2) AS profit_margin_percent
+FROM superstore
+WHERE discount > 0
+GROUP BY category, sub_category
+HAVING AVG(discount) > :min_avg_discount
+ORDER BY avg_discount_percent DESC, sub_category
+LIMIT :limit;
+
+-- EXPLANATION:
+-- WHERE discount > 0: Only discounted line items
+-- HAVING AVG(discount) > :min_avg_discount: Default 15% average discount
+-- Low profit margins here mean discounts are eroding profitability
+-- ============================================================================
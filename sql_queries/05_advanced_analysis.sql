@@ -2,10 +2,14 @@
 -- FILE: 05_advanced_analysis.sql
 -- PURPOSE: Advanced SQL analysis using window functions and complex queries
 -- AUTHOR: yusufehtesham29
+-- NOTE: Named queries (-- name:) are loaded by scripts/query_library.py;
+--       :params are bound at run time, defaults are listed under -- params:
 -- ============================================================================
 
 -- Query 1: Rank Products by Profit within Each Category
 -- Use window functions to rank products
+-- name: product_profit_rank_by_category
+-- params: limit=30
 SELECT 
     category,
     sub_category,
@@ -16,7 +20,7 @@ SELECT
 FROM superstore
 GROUP BY category, sub_category, product_name
 ORDER BY category, profit_rank
-LIMIT 30;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- PARTITION BY category: Separates ranking by each category
@@ -29,6 +33,8 @@ LIMIT 30;
 
 -- Query 2: Running Total of Sales by Date
 -- Calculate cumulative sales over time
+-- name: running_sales_total
+-- params: limit=50
 SELECT 
     order_date,
     ROUND(SUM(sales), 2) AS daily_sales,
@@ -36,7 +42,7 @@ SELECT
 FROM superstore
 GROUP BY order_date
 ORDER BY order_date
-LIMIT 50;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Inner SUM(sales): Calculates daily sales
@@ -44,11 +50,14 @@ LIMIT 50;
 -- ORDER BY order_date: Running total increases chronologically
 -- Shows business growth trajectory over time
 -- Useful for tracking progress toward annual goals
+-- For 7/30/90-day rolling windows per region or category, see
+-- scripts/rolling_metrics.py (prefix sums over the daily series)
 -- ============================================================================
 
 
 -- Query 3: Month-over-Month Sales Growth
 -- Calculate monthly sales and percentage growth
+-- name: monthly_sales_growth
 WITH monthly_sales AS (
     SELECT 
         strftime('%Y-%m', order_date) AS year_month,
@@ -76,11 +85,15 @@ ORDER BY year_month;
 -- LAG(): Window function that accesses previous row's value
 -- Calculates month-over-month growth rate percentage
 -- Identifies growth trends and seasonality patterns
+-- scripts/rolling_metrics.py computes the same MoM (plus YoY) growth for
+-- any dimension slice from one pass over the daily series
 -- ============================================================================
 
 
 -- Query 4: Top 5 Customers per Region
 -- Identify VIP customers in each region
+-- name: top_customers_per_region
+-- params: top_n=5
 WITH customer_sales AS (
     SELECT 
         region,
@@ -98,7 +111,7 @@ SELECT
     total_sales,
     rank
 FROM customer_sales
-WHERE rank <= 5
+WHERE rank <= :top_n
 ORDER BY region, rank;
 
 -- EXPLANATION:
@@ -112,6 +125,8 @@ ORDER BY region, rank;
 
 -- Query 5: Product Performance with Category Average
 -- Compare each product to its category average
+-- name: product_vs_category_average
+-- params: limit=50
 SELECT 
     category,
     sub_category,
@@ -126,7 +141,7 @@ FROM superstore
 GROUP BY category, sub_category, product_name
 HAVING SUM(profit) IS NOT NULL
 ORDER BY category, product_profit DESC
-LIMIT 50;
+LIMIT :limit;
 
 -- EXPLANATION:
 -- Calculates each product's profit
@@ -139,6 +154,7 @@ LIMIT 50;
 
 -- Query 6: Quarterly Performance Summary
 -- Aggregate sales by quarter
+-- name: quarterly_performance
 SELECT 
     CAST(strftime('%Y', order_date) AS INTEGER) AS year,
     CASE 
@@ -0,0 +1,48 @@
+"""
+============================================================================
+FILE: conftest.py
+PURPOSE: Shared fixtures: a small Superstore database built per test session
+AUTHOR: yusufehtesham29
+============================================================================
+
+The scripts import each other flat from scripts/ and read sql_queries/
+relative to the project root, so tests run from the root with scripts/ on
+sys.path, like `python scripts/...` does.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+SOURCE_DB = os.path.join(ROOT, 'database', 'superstore.db')
+SCHEMA_PATH = os.path.join(ROOT, 'sql_queries', '01_create_table.sql')
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope='session')
+def fixture_db(tmp_path_factory):
+    """Every 4th order of the committed database (~2,500 line items), loader schema and indexes."""
+    path = str(tmp_path_factory.mktemp('db') / 'superstore.db')
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("ATTACH DATABASE ? AS source", (f"file:{SOURCE_DB}?mode=ro",))
+    # Whole orders only, so an order never loses line items
+    conn.execute("""
+    INSERT INTO superstore
+    SELECT * FROM source.superstore
+    WHERE order_id IN (SELECT order_id FROM source.superstore GROUP BY order_id HAVING MIN(rowid) % 4 = 0)
+    """)
+    conn.commit()
+    conn.execute("DETACH DATABASE source")
+    conn.close()
+    return path
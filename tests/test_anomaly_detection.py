@@ -0,0 +1,108 @@
+"""
+============================================================================
+FILE: test_anomaly_detection.py
+PURPOSE: Anomalies are reported once, on their own day, and state is incremental
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_detection import late_rows, update
+
+START = pd.Timestamp('2017-01-01')
+SPIKE_DAY = 80
+
+
+def make_db(days=120, spike=True):
+    """Two series with noisy daily sales/profit; West/Technology has one huge loss-making day."""
+    rng = np.random.default_rng(3)
+    rows = []
+    for d in range(days):
+        for region, category in (('West', 'Technology'), ('East', 'Furniture')):
+            for _ in range(rng.integers(1, 4)):
+                sales = float(rng.uniform(50, 150))
+                rows.append(((START + pd.Timedelta(days=d)).strftime('%Y-%m-%d'), region, category,
+                             sales, sales * 0.1))
+        if spike and d == SPIKE_DAY:
+            rows.append(((START + pd.Timedelta(days=d)).strftime('%Y-%m-%d'), 'West', 'Technology',
+                         20000.0, -5000.0))
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""CREATE TABLE superstore (row_id INTEGER PRIMARY KEY, order_date TEXT, region TEXT,
+                                             category TEXT, sales REAL, profit REAL)""")
+    conn.execute("CREATE INDEX idx_order_date ON superstore(order_date)")
+    conn.executemany("INSERT INTO superstore (order_date, region, category, sales, profit) VALUES (?, ?, ?, ?, ?)",
+                     rows)
+    conn.commit()
+    return conn
+
+
+def all_anomalies(conn):
+    return pd.read_sql_query("SELECT * FROM anomalies ORDER BY order_date, region, category, metric", conn)
+
+
+def state(conn):
+    return pd.read_sql_query("SELECT * FROM anomaly_state ORDER BY series_key, metric", conn)
+
+
+def test_outlier_is_reported_once_on_its_day():
+    conn = make_db()
+    df = update(conn)
+    spike_date = (START + pd.Timedelta(days=SPIKE_DAY)).strftime('%Y-%m-%d')
+    west = df[(df['region'] == 'West') & (df['category'] == 'Technology')]
+    # Not repeated on the following days while the spike is still in the 7-day window
+    assert west['order_date'].tolist() == [spike_date, spike_date]
+    assert dict(zip(west['metric'], west['direction'])) == {'sales': 'spike', 'profit': 'drop'}
+    profit = west[west['metric'] == 'profit'].iloc[0]
+    assert profit['day_value'] < 0 and profit['z_score'] < -4.5
+    assert df[df['region'] == 'East'].empty
+
+
+def test_no_outlier_no_anomalies():
+    assert update(make_db(spike=False)).empty
+
+
+def test_incremental_runs_match_one_run():
+    full = make_db()
+    update(full)
+
+    conn = make_db()
+    cutoff = (START + pd.Timedelta(days=SPIKE_DAY + 3)).strftime('%Y-%m-%d')
+    later = conn.execute("SELECT * FROM superstore WHERE order_date >= ?", (cutoff,)).fetchall()
+    conn.execute("DELETE FROM superstore WHERE order_date >= ?", (cutoff,))
+    update(conn)
+    conn.executemany("INSERT INTO superstore VALUES (?, ?, ?, ?, ?, ?)", later)
+    assert late_rows(conn) == 0
+    # Nothing new on a second run before the load
+    update(conn)
+    pd.testing.assert_frame_equal(all_anomalies(conn), all_anomalies(full))
+    pd.testing.assert_frame_equal(state(conn), state(full))
+
+
+@pytest.mark.parametrize('change', ['late_append', 'replaced_row'])
+def test_late_rows_replay_the_history(change):
+    conn = make_db()
+    update(conn)
+    if change == 'late_append':
+        conn.execute("INSERT INTO superstore (order_date, region, category, sales, profit) "
+                     "VALUES ('2017-02-01', 'East', 'Furniture', 30000, -9000)")
+    else:
+        conn.execute("DELETE FROM superstore WHERE row_id = 5")
+    conn.commit()
+    assert late_rows(conn) > 0
+    update(conn)
+    assert late_rows(conn) == 0
+
+    # Same result as scoring the changed table from scratch
+    fresh = sqlite3.connect(':memory:')
+    conn.backup(fresh)
+    for table in ('anomaly_state', 'anomalies', 'anomaly_watermark'):
+        fresh.execute(f"DROP TABLE {table}")
+    update(fresh)
+    pd.testing.assert_frame_equal(all_anomalies(conn), all_anomalies(fresh))
+    if change == 'late_append':
+        assert '2017-02-01' in all_anomalies(conn)['order_date'].tolist()
@@ -0,0 +1,87 @@
+"""
+============================================================================
+FILE: test_bitmap_index.py
+PURPOSE: Bitmap distinct counts match SQL COUNT(DISTINCT ...)
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import shutil
+import sqlite3
+
+import numpy as np
+import pytest
+
+from bitmap_index import BitmapIndex, RoaringBitmap, build_bitmap_index, parse_terms, run_check, sql_distinct
+
+
+@pytest.fixture(scope='module')
+def conn(fixture_db, tmp_path_factory):
+    # Building writes tables: work on a copy of the shared fixture
+    path = str(tmp_path_factory.mktemp('bitmaps') / 'superstore.db')
+    shutil.copyfile(fixture_db, path)
+    conn = sqlite3.connect(path)
+    build_bitmap_index(conn, chunk_rows=500)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('codes', [[], [0, 3, 70_000], list(range(0, 200_000, 3)), list(range(5000))],
+                         ids=['empty', 'sparse', 'dense', 'run'])
+def test_roaring_round_trip(codes):
+    bitmap = RoaringBitmap.from_codes(np.array(codes, dtype=np.int64))
+    assert bitmap.to_codes().tolist() == codes
+    assert bitmap.cardinality() == len(codes)
+    assert RoaringBitmap.from_bytes(bitmap.to_bytes()) == bitmap
+
+
+def test_roaring_set_operations():
+    a_codes, b_codes = set(range(0, 150_000, 2)), set(range(0, 150_000, 3)) | {7, 70_001}
+    a = RoaringBitmap.from_codes(np.array(sorted(a_codes)))
+    b = RoaringBitmap.from_codes(np.array(sorted(b_codes)))
+    assert (a & b).to_codes().tolist() == sorted(a_codes & b_codes)
+    assert (a | b).to_codes().tolist() == sorted(a_codes | b_codes)
+    assert (a - b).to_codes().tolist() == sorted(a_codes - b_codes)
+
+
+def test_every_count_matches_sql(conn):
+    df_check = run_check(conn)
+    mismatches = df_check[df_check['status'] != 'match']
+    assert mismatches.empty, mismatches.to_string()
+
+
+def test_customers_default_to_the_matching_orders(conn):
+    index = BitmapIndex(conn)
+    filters = {'region': 'West', 'category': 'Technology'}
+    (expected,) = conn.execute("SELECT COUNT(DISTINCT customer_id) FROM superstore "
+                               "WHERE region = 'West' AND category = 'Technology'").fetchone()
+    assert index.count('customers', filters) == expected
+    # any_order: one order in the West and any (possibly other) order with Technology
+    sql, params = sql_distinct('customers', filters, any_order=True)
+    (any_order,) = conn.execute(sql, params).fetchone()
+    assert index.count('customers', filters, any_order=True) == any_order >= expected
+
+
+def test_counts_by_matches_group_by(conn):
+    index = BitmapIndex(conn)
+    expected = dict(conn.execute("SELECT region, COUNT(DISTINCT customer_id) FROM superstore "
+                                 "WHERE category = 'Furniture' GROUP BY region").fetchall())
+    df_counts = index.counts_by('customers', 'region', {'category': 'Furniture'})
+    actual = dict(zip(df_counts['region'], df_counts['distinct_customers']))
+    assert {k: v for k, v in actual.items() if v} == expected
+
+
+def test_ids_are_the_sql_rows(conn):
+    index = BitmapIndex(conn)
+    orders = index.select('orders', {'ship_mode': 'Same Day'}, {'region': 'South'})
+    expected = [i for (i,) in conn.execute("SELECT DISTINCT order_id FROM superstore "
+                                           "WHERE ship_mode = 'Same Day' AND region != 'South' "
+                                           "ORDER BY order_id")]
+    assert index.ids('orders', orders) == expected
+
+
+def test_parse_terms():
+    assert parse_terms(['region=West,East', 'category!=Furniture']) == (
+        {'region': ['West', 'East']}, {'category': ['Furniture']})
+    with pytest.raises(ValueError):
+        parse_terms(['region'])
@@ -0,0 +1,97 @@
+"""
+============================================================================
+FILE: test_clv_models.py
+PURPOSE: BG/NBD and Gamma-Gamma fits recover known parameters and refuse bad data
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from clv_models import (MIN_REPEAT_CUSTOMERS, _gammaln, _hyp2f1, expected_spend, fit_bgnbd,
+                        fit_clv_models, fit_gamma_gamma, load_rfm_summary, score_customers, write_clv)
+
+
+@pytest.fixture(scope='module')
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_gammaln_matches_math():
+    x = np.array([0.01, 0.5, 1.0, 2.5, 6.9, 7.0, 40.0, 1e5])
+    np.testing.assert_allclose(_gammaln(x), [math.lgamma(v) for v in x], rtol=1e-10, atol=1e-10)
+
+
+def test_hyp2f1_closed_form():
+    z = np.array([0.0, 0.1, 0.5, 0.9])
+    # 2F1(1, 1; 2; z) = -ln(1 - z) / z
+    expected = np.where(z > 0, -np.log1p(-z) / np.where(z > 0, z, 1), 1.0)
+    np.testing.assert_allclose(_hyp2f1(1, 1, 2, z), expected, rtol=1e-8)
+
+
+def test_gamma_gamma_recovers_parameters(rng):
+    p, q, v, n = 6.0, 4.0, 15.0, 4000
+    nu = rng.gamma(q, 1 / v, n)
+    frequency = rng.integers(1, 8, n)
+    monetary = np.array([rng.gamma(p, 1 / nu[i], frequency[i]).mean() for i in range(n)])
+    params, _ = fit_gamma_gamma(frequency.astype(float), monetary, penalizer=0.0)
+    np.testing.assert_allclose(params, [p, q, v], rtol=0.15)
+
+
+def test_bgnbd_recovers_parameters(rng):
+    r, alpha, a, b, n = 0.8, 5.0, 0.8, 2.5, 4000
+    rate, dropout = rng.gamma(r, 1 / alpha, n), rng.beta(a, b, n)
+    T = rng.uniform(30, 52, n)
+    frequency, recency = np.zeros(n), np.zeros(n)
+    for i in range(n):
+        t = 0.0
+        while True:
+            t += rng.exponential(1 / rate[i])
+            if t > T[i]:
+                break
+            frequency[i] += 1
+            recency[i] = t
+            if rng.random() < dropout[i]:
+                break
+    params, _ = fit_bgnbd(frequency, recency, T, penalizer=0.0)
+    np.testing.assert_allclose(params, [r, alpha, a, b], rtol=0.15)
+
+
+def test_unidentified_fit_is_rejected():
+    # Identical spend: no heterogeneity, so q and v run off to infinity
+    frequency = np.full(500, 3.0)
+    with pytest.raises(ValueError, match='bound'):
+        fit_gamma_gamma(frequency, np.full(500, 50.0), penalizer=0.0)
+
+
+def test_too_few_repeat_buyers():
+    frequency = np.array([0.0] * 100 + [2.0] * (MIN_REPEAT_CUSTOMERS - 1))
+    with pytest.raises(ValueError, match='repeat purchase'):
+        fit_gamma_gamma(frequency, np.where(frequency > 0, 80.0, 0.0))
+
+
+def test_expected_spend_needs_q_above_one():
+    with pytest.raises(ValueError):
+        expected_spend((2.0, 1.0, 10.0), np.array([1.0]), np.array([50.0]))
+
+
+def test_fit_and_score_fixture(fixture_db):
+    conn = sqlite3.connect(fixture_db)
+    summary = load_rfm_summary(conn)
+    conn.close()
+    models = fit_clv_models(summary)
+    assert models['gamma_gamma'][1] > 1
+    scores = score_customers(summary, models, horizon=52, chunk_size=97)
+    assert len(scores) == len(summary) == scores['customer_id'].nunique()
+    assert scores[['probability_alive', 'expected_purchases', 'expected_spend']].notna().all().all()
+    assert scores['probability_alive'].between(0, 1).all()
+    assert (scores['expected_spend'] > 0).all()
+    # Histories differ, so predictions must too (a degenerate fit gives one value for everybody)
+    assert scores['expected_purchases'].nunique() > 10
+
+    with sqlite3.connect(':memory:') as out:
+        assert write_clv(out, summary, models, chunk_size=97) == len(summary)
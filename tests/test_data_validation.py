@@ -0,0 +1,110 @@
+"""
+============================================================================
+FILE: test_data_validation.py
+PURPOSE: Ingest rules, quarantine reasons and duplicate row_id tracking
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_validation import RULES, RowValidator
+
+
+def rows(*overrides):
+    """One valid line item per override dict."""
+    base = {'row_id': 1, 'order_id': 'CA-1', 'order_date': '2017-01-02', 'ship_date': '2017-01-05',
+            'customer_id': 'AB-1', 'product_id': 'P-1', 'sales': 10.0, 'quantity': 2, 'discount': 0.0}
+    return pd.DataFrame([{**base, **o} for o in overrides])
+
+
+@pytest.mark.parametrize('override, rule', [
+    ({'customer_id': None}, 'missing_required'),
+    ({'quantity': 0}, 'non_positive_quantity'),
+    ({'sales': -1.0}, 'negative_sales'),
+    ({'discount': 1.5}, 'discount_out_of_range'),
+    ({'ship_date': '2016-12-31'}, 'ship_before_order'),
+    ({'row_id': 2.5}, 'invalid_row_id'),
+    ({'row_id': 'abc'}, 'invalid_row_id'),
+])
+def test_each_rule(override, rule):
+    validator = RowValidator()
+    valid, bad = validator.validate(rows({'row_id': 7}, {'row_id': 8, **override}))
+    assert valid['row_id'].tolist() == [7]
+    assert bad['reason'].tolist() == [rule]
+    assert validator.counts[rule] == 1 and validator.rows_quarantined == 1
+
+
+def test_bad_date_keeps_the_raw_string():
+    df = rows({'row_id': 1}, {'row_id': 2, 'order_date': None})
+    unparsed = {'order_date': pd.Series(['31/31/2017'], index=[1])}
+    valid, bad = RowValidator().validate(df, unparsed=unparsed)
+    assert len(valid) == 1
+    # bad_date, not missing_required: the value was there
+    assert bad['reason'].tolist() == ['bad_date']
+    assert bad['order_date'].tolist() == ['31/31/2017']
+
+
+def test_several_reasons():
+    _, bad = RowValidator().validate(rows({'quantity': -1, 'sales': -5.0}))
+    assert bad['reason'].tolist() == ['non_positive_quantity,negative_sales']
+
+
+def test_duplicates_within_and_across_chunks():
+    validator = RowValidator()
+    valid, bad = validator.validate(rows({'row_id': 1}, {'row_id': 2}, {'row_id': 1}))
+    assert valid['row_id'].tolist() == [1, 2]
+    assert bad['reason'].tolist() == ['duplicate_row_id']
+    valid, bad = validator.validate(rows({'row_id': 2}, {'row_id': 3}))
+    assert valid['row_id'].tolist() == [3]
+    assert bad['reason'].tolist() == ['duplicate_row_id']
+
+
+def test_quarantined_row_does_not_take_its_id():
+    validator = RowValidator()
+    # A bad row, then its corrected copy in the same chunk and in a later one
+    valid, bad = validator.validate(rows({'row_id': 5, 'quantity': 0}, {'row_id': 5}))
+    assert valid['row_id'].tolist() == [5]
+    assert bad['reason'].tolist() == ['non_positive_quantity']
+
+    _, _ = validator.validate(rows({'row_id': 6, 'discount': 2.0}))
+    valid, bad = validator.validate(rows({'row_id': 6}))
+    assert valid['row_id'].tolist() == [6] and bad.empty
+    assert validator.counts['duplicate_row_id'] == 0
+
+
+def test_mark_seen_for_appends():
+    validator = RowValidator()
+    validator.mark_seen([10, 11])
+    valid, bad = validator.validate(rows({'row_id': 11}, {'row_id': 12}))
+    assert valid['row_id'].tolist() == [12]
+    assert bad['reason'].tolist() == ['duplicate_row_id']
+
+
+def test_seen_ids_match_a_set_over_many_chunks():
+    rng = np.random.default_rng(0)
+    validator = RowValidator()
+    seen = set()
+    for _ in range(60):
+        ids = rng.integers(0, 5000, rng.integers(1, 200))
+        df = rows(*({'row_id': int(i)} for i in ids))
+        valid, bad = validator.validate(df)
+        expected_valid = []
+        for i in ids.tolist():
+            if i not in seen:
+                seen.add(i)
+                expected_valid.append(i)
+        assert valid['row_id'].tolist() == expected_valid
+    # Runs stay few (logarithmic merging)
+    assert len(validator.seen_runs) <= 12
+    assert sum(len(run) for run in validator.seen_runs) == len(seen)
+
+
+def test_report_lists_every_rule():
+    validator = RowValidator()
+    validator.validate(rows({'sales': -1.0}))
+    df_report = validator.report()
+    assert df_report['rule'].tolist() == list(RULES)
+    assert df_report.set_index('rule').loc['negative_sales', 'failed_rows'] == 1
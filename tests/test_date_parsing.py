@@ -0,0 +1,64 @@
+"""
+============================================================================
+FILE: test_date_parsing.py
+PURPOSE: Format detection and cached date parsing at ingest
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from date_parsing import CANDIDATE_FORMATS, detect_date_format, parse_dates, unparsed_values
+
+
+@pytest.mark.parametrize('fmt', CANDIDATE_FORMATS)
+def test_detects_each_format(fmt):
+    days = pd.date_range('2016-12-25', periods=40, freq='D')
+    values = pd.Series(days.strftime(fmt))
+    detected = detect_date_format(values)
+    # Day-first and month-first read the same when no day exceeds 12; parsing must still agree
+    assert pd.to_datetime(values, format=detected).equals(pd.Series(days))
+
+
+def test_month_first_wins_when_ambiguous():
+    assert detect_date_format(pd.Series(['01/02/2017', '03/04/2017'])) == '%m/%d/%Y'
+
+
+def test_a_few_typos_keep_the_fixed_format():
+    values = pd.Series([f"{m}/{d}/2017" for m in range(1, 13) for d in range(1, 29)] + ['13/45/2017'])
+    assert detect_date_format(values) == '%m/%d/%Y'
+    # Too many failures: no fixed format
+    assert detect_date_format(pd.Series(['1/2/2017', 'soon', 'later'])) is None
+
+
+def test_parse_dates_outputs():
+    values = pd.Series(['11/8/2016', None, '6/12/2016', '11/8/2016'], index=[10, 11, 12, 13], name='d')
+    iso = parse_dates(values)
+    assert iso[[10, 12, 13]].tolist() == ['2016-11-08', '2016-06-12', '2016-11-08'] and pd.isna(iso[11])
+    assert iso.index.tolist() == [10, 11, 12, 13] and iso.name == 'd'
+
+    days = parse_dates(values, output='days')
+    assert days[10] == (np.datetime64('2016-11-08') - np.datetime64('1970-01-01')).astype(int)
+    assert days[11] == -1
+
+    dt = parse_dates(values, output='datetime')
+    assert dt[12] == pd.Timestamp('2016-06-12') and pd.isna(dt[11])
+
+    with pytest.raises(ValueError):
+        parse_dates(values, output='epoch')
+
+
+def test_unparseable_values_come_back_missing():
+    values = pd.Series(['1/2/2017'] * 300 + ['2/30/2017', None])
+    parsed = parse_dates(values)
+    assert parsed.iloc[0] == '2017-01-02'
+    assert parsed.iloc[300:].isna().all()
+    # Only the value that was present is reported as unparsed
+    assert unparsed_values(values, parsed).to_dict() == {300: '2/30/2017'}
+
+
+def test_mixed_formats_fall_back_per_distinct_value():
+    values = pd.Series(['2017-01-02', '01/03/2017', '2017-01-04 00:00:00'])
+    assert parse_dates(values).tolist() == ['2017-01-02', '2017-01-03', '2017-01-04']
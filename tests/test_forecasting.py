@@ -0,0 +1,38 @@
+"""
+============================================================================
+FILE: test_forecasting.py
+PURPOSE: Monthly series loading and forecast totals with their intervals
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from forecasting import forecast_totals, load_monthly_series
+
+
+@pytest.fixture
+def conn(fixture_db):
+    conn = sqlite3.connect(f"file:{fixture_db}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+def test_grand_total_series_is_the_sum_of_the_regions(conn):
+    keys, months, Y = load_monthly_series(conn, dimensions=['region'])
+    total_keys, total_months, total = load_monthly_series(conn, dimensions=())
+    assert len(total_keys) == 1 and total.shape == (1, len(months))
+    assert (total_months == months).all()
+    np.testing.assert_allclose(total[0], Y.sum(axis=0))
+
+
+@pytest.mark.parametrize('dimensions', [(), ('region',), ('category', 'segment')])
+def test_forecast_totals_have_intervals(conn, dimensions):
+    totals = forecast_totals(conn, dimensions=dimensions, horizon=12)
+    assert list(totals.columns) == list(dimensions) + ['forecast', 'lower_bound', 'upper_bound']
+    assert (totals['lower_bound'] <= totals['forecast']).all()
+    assert (totals['forecast'] <= totals['upper_bound']).all()
+    assert (totals['lower_bound'] >= 0).all()
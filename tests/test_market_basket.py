@@ -0,0 +1,70 @@
+"""
+============================================================================
+FILE: test_market_basket.py
+PURPOSE: Streamed pair counts and FP-growth itemsets match brute force
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import itertools
+import sqlite3
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+import market_basket
+from market_basket import association_rules, frequent_itemsets, pair_counts
+
+
+@pytest.fixture(scope='module')
+def conn(fixture_db):
+    conn = sqlite3.connect(f"file:{fixture_db}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+def baskets(conn, item_level):
+    df = pd.read_sql_query(f"SELECT DISTINCT order_id, {item_level} AS item FROM superstore", conn)
+    return df.groupby('order_id')['item'].apply(lambda s: sorted(s)).tolist()
+
+
+def named_pairs(freq, pairs):
+    names = freq['item'].to_numpy()
+    return {tuple(sorted((names[a], names[b]))): n
+            for a, b, n in zip(pairs['item_a'], pairs['item_b'], pairs['pair_orders'])}
+
+
+@pytest.mark.parametrize('item_level', ['sub_category', 'product_id'])
+@pytest.mark.parametrize('dense', [True, False], ids=['dense', 'sparse'])
+def test_pair_counts_match_brute_force(conn, monkeypatch, item_level, dense):
+    if not dense:
+        monkeypatch.setattr(market_basket, 'DENSE_PAIR_KEYS', 0)
+    expected = Counter(pair for basket in baskets(conn, item_level)
+                       for pair in itertools.combinations(basket, 2))
+    # Small chunks: orders are split across fetches and carried over
+    freq, n_orders, pairs = pair_counts(conn, item_level, chunk_rows=97)
+    assert n_orders == len(baskets(conn, item_level))
+    assert named_pairs(freq, pairs) == dict(expected)
+
+
+def test_rules_are_consistent(conn):
+    rules = association_rules(conn, min_support=0.01)
+    assert (rules['support'] >= 0.01).all()
+    assert ((rules['confidence'] > 0) & (rules['confidence'] <= 1)).all()
+    # Both directions of a pair share its support
+    both = rules.merge(rules, left_on=['antecedent', 'consequent'], right_on=['consequent', 'antecedent'])
+    assert len(both) == len(rules)
+    assert (both['support_x'] == both['support_y']).all()
+
+
+def test_frequent_itemsets_match_brute_force(conn):
+    all_baskets = baskets(conn, 'sub_category')
+    min_support = 0.01
+    itemsets = frequent_itemsets(conn, min_support=min_support, max_size=3, chunk_rows=97)
+    counts = Counter(combo for basket in all_baskets for size in (1, 2, 3)
+                     for combo in itertools.combinations(basket, size))
+    min_count = min_support * len(all_baskets)
+    expected = {frozenset(combo): n for combo, n in counts.items() if n >= min_count}
+    actual = {frozenset(s.split(' + ')): n for s, n in zip(itemsets['itemset'], itemsets['orders'])}
+    assert actual == expected
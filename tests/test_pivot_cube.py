@@ -0,0 +1,71 @@
+"""
+============================================================================
+FILE: test_pivot_cube.py
+PURPOSE: Every cube marginal matches SQL GROUP BY
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from pivot_cube import build_cube, run_check, sql_marginal
+from report_filters import ReportFilter
+
+
+@pytest.fixture
+def conn(fixture_db):
+    conn = sqlite3.connect(f"file:{fixture_db}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('axes', [('segment', 'region', 'category'), ('year', 'ship_mode'), ('state',)],
+                         ids=['default', 'year_ship_mode', 'state'])
+def test_every_marginal_matches_sql(conn, axes):
+    df_check, _ = run_check(conn, axes)
+    assert len(df_check) == 2 ** len(axes)
+    mismatches = df_check[df_check['status'] != 'match']
+    assert mismatches.empty, mismatches.to_string()
+
+
+def test_chunking_does_not_change_the_cube(conn):
+    whole = build_cube(conn)
+    chunked = build_cube(conn, chunk_rows=97)
+    assert whole.labels == chunked.labels
+    for name, values in whole.measures.items():
+        np.testing.assert_allclose(values, chunked.measures[name], rtol=1e-9)
+
+
+def test_filtered_cube_matches_filtered_sql(conn):
+    report_filter = ReportFilter(start_date='2016-01-01', region=['West', 'East'])
+    cube = build_cube(conn, ('segment', 'category'), report_filter=report_filter)
+    assert cube.labels['segment'] == ['Consumer', 'Corporate', 'Home Office']
+
+    actual = cube.to_frame()
+    expected = report_filter.read_sql("""
+    SELECT segment, category, SUM(sales) AS sales, SUM(profit) AS profit, COUNT(*) AS line_items
+    FROM superstore
+    GROUP BY segment, category
+    ORDER BY segment, category;
+    """, conn)
+    actual = actual[actual['line_items'] > 0].reset_index(drop=True)
+    assert actual[['segment', 'category']].equals(expected[['segment', 'category']])
+    np.testing.assert_allclose(actual[['sales', 'profit', 'line_items']], expected[['sales', 'profit', 'line_items']])
+
+
+def test_slices_and_shares(conn):
+    cube = build_cube(conn)
+    west = cube.slice(region='West')
+    assert west.axes == ('segment', 'category')
+    expected = sql_marginal(conn, ('segment', 'category'))
+    np.testing.assert_allclose(cube.marginal('segment', 'category').measures['sales'].ravel(), expected['sales'])
+    # Shares within a region add up to 100% per region
+    shares = cube.marginal('region', 'category').share(within=('region',))
+    np.testing.assert_allclose(shares.sum(axis=1), 100)
+    assert cube.matrix('region', 'category', segment='Consumer').shape == (len(cube.labels['region']),
+                                                                          len(cube.labels['category']))
+    with pytest.raises(ValueError):
+        cube.slice(region='Atlantis')
@@ -0,0 +1,71 @@
+"""
+============================================================================
+FILE: test_preview_sample.py
+PURPOSE: Appends fold into the stored reservoir like a full rebuild would
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import shutil
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from preview_sample import build_sample, has_sample, load_sample, preview_aggregate, update_sample
+
+K = 20
+
+
+@pytest.fixture
+def conn(fixture_db, tmp_path):
+    path = str(tmp_path / 'superstore.db')
+    shutil.copy(fixture_db, path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def test_append_matches_bottom_k_of_all_rows(conn):
+    # Load half the rows, sample them, then append the rest in three batches
+    df = pd.read_sql_query("SELECT * FROM superstore ORDER BY row_id", conn)
+    half = len(df) // 2
+    conn.execute("DELETE FROM superstore WHERE row_id > ?", (int(df['row_id'].iloc[half - 1]),))
+    conn.commit()
+    build_sample(conn, rows_per_stratum=K)
+    assert has_sample(conn)
+    initial = load_sample(conn)
+
+    taken = 0
+    for seed, batch in enumerate((df.iloc[half:half + 300], df.iloc[half + 300:half + 301], df.iloc[half + 301:])):
+        batch.to_sql('superstore', conn, if_exists='append', index=False)
+        taken += update_sample(conn, batch, rows_per_stratum=K, seed=seed)
+
+    sample = load_sample(conn)
+    year = pd.to_datetime(df['order_date']).dt.year.astype(str)
+    truth = (df['region'] + '|' + df['category'] + '|' + year).value_counts()
+    per_stratum = sample.groupby('stratum').agg(
+        N=('stratum_rows', 'first'), n=('stratum_rows', 'size'),
+        n_stored=('stratum_sample_rows', 'first'), weight=('sample_weight', 'sum'))
+    assert per_stratum['N'].sort_index().to_dict() == truth.sort_index().to_dict()
+    assert (per_stratum['n'] == per_stratum['N'].clip(upper=K)).all()
+    assert (per_stratum['n_stored'] == per_stratum['n']).all()
+    assert per_stratum['weight'].round(6).tolist() == per_stratum['N'].astype(float).tolist()
+    # Bottom-k: the cutoff only falls, and initial rows under it were all kept
+    assert sample['row_id'].is_unique
+    assert taken >= len(sample) - len(initial)
+    cutoff = sample.groupby('stratum')['sample_key'].max()
+    full = initial.groupby('stratum')['sample_key'].agg(['max', 'size'])
+    full = full[full['size'] == K]
+    assert (cutoff[full.index] <= full['max']).all()
+    survivors = initial[initial['sample_key'] <= initial['stratum'].map(cutoff)]
+    assert set(survivors['row_id']) <= set(sample['row_id'])
+
+    total = preview_aggregate(sample)
+    assert total['rows'].iloc[0] == pytest.approx(len(df))
+
+
+def test_old_sample_without_keys_needs_rebuild(conn):
+    build_sample(conn, rows_per_stratum=K)
+    conn.execute("ALTER TABLE superstore_sample DROP COLUMN sample_key")
+    assert not has_sample(conn)
@@ -0,0 +1,50 @@
+"""
+============================================================================
+FILE: test_query_engine.py
+PURPOSE: Every named query gives the same result on each engine
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import pytest
+
+from query_engine import check_parity, close_engines, get_engine, translate_sqlite
+from query_library import load_queries
+
+
+@pytest.fixture
+def queries():
+    return [(name, *query.bind()) for name, query in load_queries().items()]
+
+
+@pytest.fixture(autouse=True)
+def fresh_engines():
+    yield
+    close_engines()
+
+
+def test_translate_sqlite_dates_and_params():
+    sql = "SELECT strftime('%Y-%m', order_date), DATE(ship_date) FROM superstore WHERE region = :region"
+    assert translate_sqlite(sql) == ("SELECT sqlite_strftime('%Y-%m', order_date), sqlite_date(ship_date) "
+                                     "FROM superstore WHERE region = $region")
+    # Time literals and casts are not parameters
+    assert translate_sqlite("SELECT '12:30', x::TEXT") == "SELECT '12:30', x::TEXT"
+
+
+def test_engines_are_shared_per_database(fixture_db):
+    assert get_engine('sqlite', fixture_db) is get_engine('SQLite', fixture_db)
+    with pytest.raises(ValueError):
+        get_engine('oracle', fixture_db)
+
+
+def test_sqlite_parity_with_itself(queries, fixture_db):
+    # The harness itself: identical results always match
+    df_parity = check_parity(queries, 'sqlite', fixture_db)
+    assert (df_parity['status'] == 'match').all(), df_parity.to_string()
+
+
+def test_duckdb_parity(queries, fixture_db):
+    pytest.importorskip('duckdb')
+    df_parity = check_parity(queries, 'duckdb', fixture_db)
+    mismatches = df_parity[df_parity['status'] != 'match']
+    assert mismatches.empty, mismatches.to_string()
@@ -0,0 +1,45 @@
+"""
+============================================================================
+FILE: test_query_service.py
+PURPOSE: The HTTP front end answers bad requests with 400, not a crash
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import asyncio
+
+import pytest
+
+from query_service import handle_connection
+
+
+async def exchange(raw):
+    """Send raw bytes to a one-connection server; everything it answers before closing."""
+    server = await asyncio.start_server(lambda r, w: handle_connection(None, r, w), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    reply = await asyncio.wait_for(reader.read(), timeout=10)
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return reply
+
+
+def test_request_body_is_skipped_on_keep_alive():
+    reply = asyncio.run(exchange(
+        b"GET /health HTTP/1.1\r\nContent-Length: 2\r\n\r\nhi"
+        b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n"))
+    assert reply.count(b'HTTP/1.1 200') == 2
+
+
+@pytest.mark.parametrize('value', [b'abc', b'-5', b'1.5'])
+def test_invalid_content_length_is_a_bad_request(value):
+    reply = asyncio.run(exchange(
+        b"GET /health HTTP/1.1\r\nContent-Length: " + value + b"\r\n\r\n"
+        b"GET /health HTTP/1.1\r\n\r\n"))
+    assert reply.startswith(b'HTTP/1.1 400')
+    assert b'invalid Content-Length' in reply
+    # The connection is closed instead of guessing where the next request starts
+    assert reply.count(b'HTTP/1.1') == 1
@@ -0,0 +1,47 @@
+"""
+============================================================================
+FILE: test_report_args.py
+PURPOSE: Report flags are validated before a report runs
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import pytest
+
+from report_args import parse_report_args
+from report_filters import ReportFilter
+
+
+def test_valid_filter_flags():
+    args = parse_report_args(argv=['--start-date', '2017-01-01', '--end-date', '2017-07-01',
+                                   '--region', 'West', 'East', '--last-days', '1'])
+    report_filter = ReportFilter.from_args(args)
+    assert (report_filter.start_date, report_filter.end_date) == ('2017-01-01', '2017-07-01')
+    assert report_filter.dimensions == {'region': ['West', 'East']}
+    assert report_filter.last_days == 1
+
+
+@pytest.mark.parametrize('argv', [
+    ['--start-date', '2017-6-1'],
+    ['--start-date', '20170601'],
+    ['--end-date', '2017-02-30'],
+    ['--start-date', '2017-06-01', '--end-date', '2017-01-01'],
+    ['--start-date', '2017-06-01', '--end-date', '2017-06-01'],
+    ['--last-days', '0'],
+    ['--last-days', 'week'],
+    ['--regoin', 'West'],
+], ids=['unpadded', 'compact', 'no_such_day', 'inverted', 'empty_range', 'zero_days', 'not_a_number', 'typo'])
+def test_invalid_flags_are_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        parse_report_args(argv=argv)
+    assert exc.value.code == 2
+    assert 'error:' in capsys.readouterr().err
+
+
+def test_require_rows_stops_the_report(capsys):
+    report_filter = ReportFilter(region='Nowhere')
+    report_filter.require_rows(1)
+    with pytest.raises(SystemExit) as exc:
+        report_filter.require_rows(0)
+    assert exc.value.code == 1
+    assert 'No rows match the filter (region = Nowhere)' in capsys.readouterr().out
@@ -0,0 +1,47 @@
+"""
+============================================================================
+FILE: test_report_output.py
+PURPOSE: Report runs are only diffed against runs with the same filters
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import pandas as pd
+
+from report_output import ReportOutput
+
+
+def run(output_dir, filters, df):
+    out = ReportOutput('sales', output_dir=str(output_dir), print_tables=False, filters=filters)
+    out.table('totals', df)
+    return out.finish()
+
+
+def test_unchanged_rerun_reuses_files(tmp_path):
+    df = pd.DataFrame({'region': ['West', 'East'], 'sales': [1.0, 2.0]})
+    first = run(tmp_path, None, df)
+    second = run(tmp_path, None, df)
+    assert second['previous_run'] == first['run']
+    assert second['sections']['totals']['status'] == 'unchanged'
+    assert second['sections']['totals']['run'] == first['run']
+
+
+def test_baselines_are_kept_per_filter(tmp_path):
+    full = pd.DataFrame({'region': ['West', 'East'], 'sales': [1.0, 2.0]})
+    west = pd.DataFrame({'region': ['West'], 'sales': [1.0]})
+    first_full = run(tmp_path, 'none (full history)', full)
+
+    first_west = run(tmp_path, 'region = West', west)
+    assert first_west['previous_run'] is None
+    assert first_west['sections']['totals']['status'] == 'added'
+
+    # Neither run becomes the other's baseline
+    second_full = run(tmp_path, 'none (full history)', full)
+    assert second_full['previous_run'] == first_full['run']
+    assert second_full['sections']['totals']['status'] == 'unchanged'
+    second_west = run(tmp_path, 'region = West', west)
+    assert second_west['previous_run'] == first_west['run']
+    assert second_west['sections']['totals']['status'] == 'unchanged'
+
+    # No filter object and an empty filter share the unfiltered baseline
+    assert run(tmp_path, None, full)['previous_run'] == second_full['run']
@@ -0,0 +1,24 @@
+"""
+============================================================================
+FILE: test_report_worker.py
+PURPOSE: Every report stays within its import-time budget
+AUTHOR: yusufehtesham29
+============================================================================
+
+The same check as `python scripts/report_worker.py --check-imports`, run
+with the suite so a heavy top-level import fails the build.
+"""
+
+import pytest
+
+from report_worker import IMPORT_BUDGET_MS, REPORT_SCRIPTS, check_imports
+
+
+def test_every_report_has_a_budget():
+    assert set(IMPORT_BUDGET_MS) == set(REPORT_SCRIPTS)
+
+
+@pytest.mark.parametrize('script', sorted(IMPORT_BUDGET_MS))
+def test_import_time_within_budget(script):
+    [(_, ms, budget)] = check_imports({script: IMPORT_BUDGET_MS[script]})
+    assert ms <= budget, f"{script} imports in {ms:.0f} ms (budget {budget} ms)"
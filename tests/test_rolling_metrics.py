@@ -0,0 +1,64 @@
+"""
+============================================================================
+FILE: test_rolling_metrics.py
+PURPOSE: Monthly growth from prefix sums: totals and complete months
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_metrics import load_daily_series, monthly_growth, rolling_metrics
+
+
+@pytest.fixture(scope='module')
+def daily(fixture_db):
+    conn = sqlite3.connect(f"file:{fixture_db}?mode=ro", uri=True)
+    daily = load_daily_series(conn)
+    monthly = pd.read_sql_query(
+        "SELECT strftime('%Y-%m', order_date) AS year_month, SUM(sales) AS sales "
+        "FROM superstore GROUP BY 1", conn)
+    conn.close()
+    return daily, monthly
+
+
+def test_monthly_totals_match_sql(daily):
+    daily, monthly = daily
+    growth = monthly_growth(daily)
+    merged = growth.merge(monthly, on='year_month', how='left').fillna({'sales': 0})
+    assert np.allclose(merged['monthly_sales'], merged['sales'])
+
+
+def test_last_month_of_data_is_complete(daily):
+    daily, _ = daily
+    # The data stops before the month's last day; that is not a partial month
+    assert not daily['order_date'].max().is_month_end
+    growth = monthly_growth(daily)
+    assert growth['complete_month'].all()
+    last = growth.iloc[-1]
+    assert not np.isnan(last['mom_growth_percent'])
+    assert not np.isnan(last['yoy_growth_percent'])
+
+
+@pytest.mark.parametrize('start_date, end_date, partial', [
+    ('2017-03-10', None, ['2017-03']),
+    ('2017-03-01', None, []),
+    (None, '2017-12-15', ['2017-12']),
+    ('2016-06-02', '2017-01-01', ['2016-06']),
+])
+def test_only_months_the_filter_cuts_are_partial(daily, start_date, end_date, partial):
+    daily, _ = daily
+    growth = monthly_growth(daily, start_date=start_date, end_date=end_date)
+    assert growth.loc[~growth['complete_month'], 'year_month'].tolist() == partial
+    assert growth.loc[~growth['complete_month'], 'mom_growth_percent'].isna().all()
+
+
+def test_rolling_calendar_stops_at_the_data(daily):
+    daily, _ = daily
+    rolling = rolling_metrics(daily)
+    assert rolling['order_date'].max() == daily['order_date'].max()
+    assert rolling['running_total'].iloc[-1] == pytest.approx(daily['sales'].sum())
@@ -0,0 +1,37 @@
+"""
+============================================================================
+FILE: test_shadow_db.py
+PURPOSE: Full loads start from an empty shadow and keep other scripts' tables
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import sqlite3
+
+from shadow_db import carry_over, open_shadow, swap_in
+
+
+def test_full_load_keeps_tables_it_does_not_build(tmp_path):
+    db_path = str(tmp_path / 'superstore.db')
+    live = sqlite3.connect(db_path)
+    live.execute("CREATE TABLE superstore (row_id INTEGER)")
+    live.executemany("INSERT INTO superstore VALUES (?)", [(1,), (2,)])
+    live.execute("CREATE TABLE customer_clv (customer_id TEXT, clv REAL)")
+    live.execute("CREATE INDEX idx_clv ON customer_clv (customer_id)")
+    live.execute("INSERT INTO customer_clv VALUES ('C1', 10.0)")
+    live.commit()
+    live.close()
+
+    shadow = open_shadow(db_path)
+    # Nothing is copied up front
+    assert shadow.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+    shadow.execute("CREATE TABLE superstore (row_id INTEGER)")
+    shadow.execute("INSERT INTO superstore VALUES (3)")
+    assert carry_over(shadow, db_path) == ['customer_clv']
+    swap_in(shadow, db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT row_id FROM superstore").fetchall() == [(3,)]
+    assert conn.execute("SELECT * FROM customer_clv").fetchall() == [('C1', 10.0)]
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall() == [('idx_clv',)]
+    conn.close()
@@ -0,0 +1,82 @@
+"""
+============================================================================
+FILE: test_sharding.py
+PURPOSE: Sharded mode matches single-file mode (and SCATTER_GATHER does not drift)
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from query_library import get_library
+from shadow_db import begin_snapshot
+from sharding import SCATTER_GATHER, build_shards, check_shards, connect_shards, get_sharded_library
+
+FILTERED = {'start_date': '2016-01-01', 'filters': {'region': ['West', 'East']}}
+
+
+@pytest.fixture(scope='module', params=[('year', 4), ('customer', 3)], ids=['year', 'customer'])
+def shard_dir(request, fixture_db, tmp_path_factory):
+    scheme, n_shards = request.param
+    path = str(tmp_path_factory.mktemp(f'shards_{scheme}') / 'shards')
+    build_shards(fixture_db, path, scheme, n_shards)
+    yield path
+    get_sharded_library(path).close()
+
+
+def test_scatter_gather_queries_are_named_queries(fixture_db):
+    # A hand-written merge for a query that was renamed or removed would never run
+    assert set(SCATTER_GATHER) <= set(get_library(fixture_db).queries)
+
+
+@pytest.mark.parametrize('kwargs', [{}, FILTERED], ids=['all', 'filtered'])
+def test_every_query_matches_single_file(shard_dir, fixture_db, kwargs):
+    df_check = check_shards(shard_dir, fixture_db, **kwargs)
+    mismatches = df_check[df_check['status'] != 'match']
+    assert mismatches.empty, mismatches.to_string()
+    assert set(SCATTER_GATHER) <= set(df_check.loc[df_check['mode'] == 'scatter-gather', 'query'])
+
+
+@pytest.mark.parametrize('limit', [1, 3, 50])
+def test_top_k_by_customer_any_limit(shard_dir, fixture_db, limit):
+    # Customer shards return only their local top K; the merge must still be exact
+    for name in ('top_customers_by_sales', 'top_customers_by_profit'):
+        expected = get_library(fixture_db).run(name, limit=limit)
+        actual = get_sharded_library(shard_dir).run(name, limit=limit)
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, atol=0.01)
+
+
+def test_report_can_write_under_its_snapshot(shard_dir):
+    # 05 --shards writes customer_clv while its read snapshot is open
+    conn = begin_snapshot(connect_shards(shard_dir))
+    try:
+        assert conn.execute("PRAGMA main.journal_mode").fetchone()[0] == 'wal'
+        conn.execute("SELECT COUNT(*) FROM superstore").fetchone()
+        writer = connect_shards(shard_dir)
+        writer.execute("CREATE TABLE report_output AS SELECT 1 AS x")
+        writer.commit()
+        writer.execute("DROP TABLE report_output")
+        writer.commit()
+        writer.close()
+    finally:
+        conn.close()
+
+
+def test_report_runs_under_spawn(shard_dir, tmp_path):
+    # spawn (macOS/Windows default) re-imports __main__ in every worker process; the
+    # report scripts run at module level, so scatter-gather must not start processes
+    site = tmp_path / 'site'
+    site.mkdir()
+    (site / 'sitecustomize.py').write_text("import multiprocessing\nmultiprocessing.set_start_method('spawn')\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(site), os.environ.get('PYTHONPATH')])))
+    env.pop('SUPERSTORE_SHARDS', None)
+    result = subprocess.run([sys.executable, os.path.join('scripts', '02_sql_analysis.py'),
+                             '--shards', shard_dir, '--no-charts'],
+                            capture_output=True, text=True, env=env, timeout=300)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert 'SQL ANALYSIS COMPLETED' in result.stdout
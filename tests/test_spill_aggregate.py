@@ -0,0 +1,81 @@
+"""
+============================================================================
+FILE: test_spill_aggregate.py
+PURPOSE: Spilling GROUP BY matches SQLite, in memory and spilled to disk
+AUTHOR: yusufehtesham29
+============================================================================
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from spill_aggregate import CHECKS, SpillingAggregator, aggregate_query, compare_frames, top_n
+
+
+@pytest.fixture
+def conn(fixture_db):
+    conn = sqlite3.connect(f"file:{fixture_db}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+def _aggregate(conn, by, aggs, memory_mb, spill_dir, partitions=8, chunk_rows=300):
+    columns = sorted(set(by) | {col for _, col in aggs.values()})
+    aggregator = SpillingAggregator(by, aggs, memory_mb, partitions, spill_dir=spill_dir)
+    parts = list(aggregate_query(conn, f"SELECT {', '.join(columns)} FROM superstore", by, aggs,
+                                 chunk_rows=chunk_rows, aggregator=aggregator))
+    return pd.concat(parts, ignore_index=True), aggregator
+
+
+@pytest.mark.parametrize('memory_mb', [256, 0.02], ids=['in_memory', 'spilling'])
+@pytest.mark.parametrize('name, by, aggs, sql', CHECKS, ids=[check[0] for check in CHECKS])
+def test_matches_sqlite(conn, tmp_path, name, by, aggs, sql, memory_mb):
+    expected = pd.read_sql_query(sql, conn)
+    actual, aggregator = _aggregate(conn, by, aggs, memory_mb, str(tmp_path))
+    assert compare_frames(expected, actual, by)
+    if memory_mb < 1:
+        assert aggregator.spilled_bytes > 0
+    # Spill files and the private directory are removed once the results are read
+    assert os.listdir(tmp_path) == []
+
+
+def test_repartitions_oversized_partitions(conn, tmp_path):
+    # One partition and a tiny budget: the merge has to split it again on another hash
+    name, by, aggs, sql = CHECKS[0]
+    expected = pd.read_sql_query(sql, conn)
+    actual, aggregator = _aggregate(conn, by, aggs, 0.005, str(tmp_path), partitions=1)
+    assert aggregator.spilled_bytes > 0
+    assert compare_frames(expected, actual, by)
+
+
+def test_null_keys_and_values_follow_sqlite(tmp_path):
+    rows = pd.DataFrame({'k': ['a', 'a', None, None, 'b'], 'v': [1.0, None, 2.0, 3.0, None],
+                         'o': ['x', 'x', 'y', None, None]})
+    aggs = {'total': ('sum', 'v'), 'avg': ('mean', 'v'), 'n': ('count', 'v'),
+            'rows': ('size', 'v'), 'orders': ('nunique', 'o')}
+    aggregator = SpillingAggregator(['k'], aggs, spill_dir=str(tmp_path))
+    for start in range(0, len(rows), 2):
+        aggregator.add(rows.iloc[start:start + 2])
+    actual = pd.concat(aggregator.results(), ignore_index=True)
+
+    conn = sqlite3.connect(':memory:')
+    rows.to_sql('t', conn, index=False)
+    expected = pd.read_sql_query("""SELECT k, SUM(v) AS total, AVG(v) AS avg, COUNT(v) AS n,
+                                           COUNT(*) AS rows, COUNT(DISTINCT o) AS orders
+                                    FROM t GROUP BY k""", conn)
+    conn.close()
+    assert compare_frames(expected, actual, ['k'])
+
+
+def test_unknown_function_is_rejected():
+    with pytest.raises(ValueError):
+        SpillingAggregator(['k'], {'x': ('median', 'v')})
+
+
+def test_top_n_across_partitions():
+    parts = [pd.DataFrame({'g': ['a', 'b'], 'v': [1, 5]}), pd.DataFrame({'g': ['a', 'b'], 'v': [3, 2]})]
+    assert top_n(parts, 2, 'v')['v'].tolist() == [5, 3]
+    assert top_n(parts, 1, 'v', group='g')[['g', 'v']].values.tolist() == [['a', 3], ['b', 5]]